@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Synthetic Documentation Corpus for the NTR tooling benchmarks
+Generates N sections x M locales x K KB pages plus matching config files and git history
+"""
+
+import os
+import json
+import random
+import subprocess
+from typing import Dict, List
+
+# (config locale, DeepL code, docs folder) for up to 12 synthetic locales
+LOCALES = [
+    ("en-se", "EN", "en"), ("sv-se", "SV", "sv"), ("de-de", "DE", "de"), ("fr-fr", "FR", "fr"),
+    ("es-es", "ES", "es"), ("it-it", "IT", "it"), ("nl-nl", "NL", "nl"), ("pl-pl", "PL", "pl"),
+    ("fi-fi", "FI", "fi"), ("da-dk", "DA", "da"), ("pt-pt", "PT", "pt"), ("cs-cz", "CS", "cs"),
+]
+
+CATEGORIES = ["general", "user", "admin"]
+
+
+def _words(rng: random.Random, vocabulary: List[str], count: int) -> str:
+    return ' '.join(rng.choice(vocabulary) for _ in range(count))
+
+
+def generate_page(rng: random.Random, vocabulary: List[str], title: str, page_kb: int) -> str:
+    """A markdown page of roughly page_kb kilobytes mixing headings, prose, lists and code."""
+    lines = [f"# {title}", ""]
+    target = page_kb * 1024
+    size = 0
+    while size < target:
+        block = [f"## {_words(rng, vocabulary, 3).capitalize()}", ""]
+        block.append(' '.join(f"{_words(rng, vocabulary, rng.randint(6, 14)).capitalize()}."
+                              for _ in range(rng.randint(2, 4))))
+        block.append("")
+        block.extend(f"- **{rng.choice(vocabulary).capitalize()}**: {_words(rng, vocabulary, rng.randint(4, 10))}"
+                     for _ in range(rng.randint(2, 5)))
+        block.append("")
+        if rng.random() < 0.2:
+            block.extend(["```", f"{rng.choice(vocabulary)} = {rng.randint(0, 100)}", "```", ""])
+        size += sum(len(line) + 1 for line in block)
+        lines.extend(block)
+    return '\n'.join(lines)
+
+
+def generate_corpus(root: str, sections: int, locales: int, page_kb: int,
+                    changed_fraction: float = 0.05, seed: int = 42) -> Dict:
+    """Write a synthetic doc tree under root and commit it in a fresh git repository.
+
+    A second commit edits ``changed_fraction`` of the source-locale pages so change
+    detection and smart-translate have a realistic range to work on.
+    """
+    if locales > len(LOCALES):
+        raise ValueError(f"At most {len(LOCALES)} synthetic locales are supported")
+    rng = random.Random(seed)
+    vocabulary = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(2, 10)))
+                  for _ in range(3000)]
+    section_ids = [f"section-{i:04d}" for i in range(sections)]
+    selected = LOCALES[:locales]
+
+    help_config = {"apps": {"ntr-app": {"name": "Benchmark App", "baseUrl": "bench", "locales": {}}}, "sections": []}
+    for locale, code, folder in selected:
+        help_config["apps"]["ntr-app"]["locales"][locale] = {
+            "code": code,
+            "name": locale,
+            "file_paths": {section: f"docs/{folder}/{section}.md" for section in section_ids}
+        }
+    for section in section_ids:
+        help_config["sections"].append({
+            "id": section,
+            "title": {folder: f"{section} ({folder})" for _, _, folder in selected},
+            "keywords": rng.sample(vocabulary, 4),
+            "category": rng.choice(CATEGORIES)
+        })
+
+    translation_config = {"translation": {
+        "provider": "local",
+        "api_settings": {"local": {"latency_ms": 20}},
+        "pipeline": {"memory_file": ".translation-memory.sqlite", "fuzzy_threshold": 0.85},
+        "rate_control": {"initial_concurrency": 4, "max_concurrency": 16},
+        "git_integration": {"create_pull_requests": False},
+    }}
+
+    for _, _, folder in selected:
+        os.makedirs(os.path.join(root, "docs", folder), exist_ok=True)
+        for section in section_ids:
+            with open(os.path.join(root, "docs", folder, f"{section}.md"), 'w', encoding='utf-8') as f:
+                f.write(generate_page(rng, vocabulary, f"{section} {folder}", page_kb))
+    with open(os.path.join(root, "help-config.json"), 'w', encoding='utf-8') as f:
+        json.dump(help_config, f, indent=2)
+    with open(os.path.join(root, "translation-config.json"), 'w', encoding='utf-8') as f:
+        json.dump(translation_config, f, indent=2)
+
+    def git(*args: str) -> str:
+        return subprocess.run(
+            ['git', '-c', 'user.name=bench', '-c', 'user.email=bench@example.com', *args],
+            cwd=root, capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+    git('init', '-q')
+    git('add', '-A')
+    git('commit', '-q', '-m', 'Synthetic corpus')
+    base = git('rev-parse', 'HEAD')
+
+    source_folder = selected[0][2]
+    changed = rng.sample(section_ids, max(1, int(sections * changed_fraction)))
+    for section in changed:
+        path = os.path.join(root, "docs", source_folder, f"{section}.md")
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(f"\n## {_words(rng, vocabulary, 3).capitalize()}\n\n{_words(rng, vocabulary, 12).capitalize()}.\n")
+    git('commit', '-q', '-am', 'Edit pages')
+    head = git('rev-parse', 'HEAD')
+
+    return {"base": base, "head": head, "changed_pages": len(changed),
+            "pages": sections * locales, "section_ids": section_ids}
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Scaling Benchmarks for the NTR documentation tooling
+Times translate.py and stackedit_integration.py on synthetic multi-locale corpora
+against JSON baselines with regression thresholds
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+from typing import Callable, Dict, List, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, BENCHMARK_DIR)
+
+from corpus import generate_corpus  # noqa: E402
+from markdown_segments import split_segments  # noqa: E402
+from stackedit_integration import StackEditIntegration  # noqa: E402
+from translate import TranslationManager  # noqa: E402
+
+DEFAULT_BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baselines.json")
+DEFAULT_THRESHOLD = 1.5
+# Slowdowns smaller than this are timer and scheduler noise on the millisecond benchmarks
+DEFAULT_MIN_DELTA = 0.02
+
+
+def measure(operation: Callable[[], object], repeat: int,
+            setup: Optional[Callable[[], None]] = None) -> float:
+    """Best wall-clock time of operation over repeat runs, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        operation()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def reset_worktree(root: str) -> None:
+    """Undo translation output so every timed translation run starts cold."""
+    subprocess.run(['git', 'checkout', '-q', '--', 'docs'], cwd=root, check=True)
+    subprocess.run(['git', 'clean', '-fdq', 'docs'], cwd=root, check=True)
+    for name in ('.translation-memory.sqlite', '.translation-manifest.json', '.language-profiles.json'):
+        if os.path.exists(os.path.join(root, name)):
+            os.remove(os.path.join(root, name))
+
+
+def run_scenario(sections: int, locales: int, page_kb: int, repeat: int,
+                 heavy_repeat: int) -> Dict[str, float]:
+    """Generate a corpus and time each stage of the tooling on it."""
+    root = tempfile.mkdtemp(prefix='ntr-bench-')
+    previous_cwd = os.getcwd()
+    try:
+        corpus = generate_corpus(root, sections, locales, page_kb)
+        os.chdir(root)
+        results: Dict[str, float] = {}
+
+        results['config_load'] = measure(lambda: TranslationManager(), repeat)
+
+        manager = TranslationManager()
+        results['change_detection'] = measure(
+            lambda: manager.get_changed_files_in_range(corpus['base'], corpus['head']), repeat
+        )
+
+        language_configs = manager.get_language_configs()
+        source_locale, target_locale = list(language_configs)[:2]
+        source_paths = list(language_configs[source_locale]['file_paths'].values())
+        contents = []
+        for path in source_paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                contents.append(f.read())
+        results['segmentation'] = measure(lambda: [split_segments(content) for content in contents], repeat)
+
+        texts = [segment.text for content in contents for segment in split_segments(content) if segment.translatable]
+        source_code = language_configs[source_locale]['code']
+        target_code = language_configs[target_locale]['code']
+        manager.pipeline.translate_sync(texts, source_code, target_code)
+        results['cache_lookup'] = measure(
+            lambda: manager.memory.lookup_many(source_code, target_code, texts), repeat
+        )
+
+        def smart_translate() -> None:
+            TranslationManager().translate_only_changed_files(corpus['base'], corpus['head'])
+        results['smart_translate'] = measure(smart_translate, heavy_repeat, lambda: reset_worktree(root))
+
+        results['sync_all'] = measure(lambda: TranslationManager().sync_all_files(), heavy_repeat,
+                                      lambda: reset_worktree(root))
+        reset_worktree(root)
+
+        integration = StackEditIntegration("docs")
+        results['file_listing'] = measure(integration.list_markdown_files, repeat)
+        return results
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float,
+            min_delta: float = DEFAULT_MIN_DELTA) -> List[str]:
+    """Names of benchmarks slower than threshold x their baseline, by more than min_delta seconds."""
+    regressions = []
+    for name, seconds in results.items():
+        reference = baseline.get(name)
+        if reference and seconds > reference * threshold and seconds - reference > min_delta:
+            regressions.append(f"{name}: {seconds:.4f}s vs baseline {reference:.4f}s (x{seconds / reference:.2f})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmarks for the NTR documentation tooling")
+    parser.add_argument('--sections', type=int, default=50, help='Sections (pages per locale)')
+    parser.add_argument('--locales', type=int, default=3, help='Number of locales')
+    parser.add_argument('--page-kb', type=int, default=4, help='Approximate page size in KB')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per fast benchmark (best is kept)')
+    parser.add_argument('--heavy-repeat', type=int, default=1, help='Runs per full translation benchmark')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH, help='Baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='Store the results as the baseline for this scenario')
+    parser.add_argument('--check', action='store_true', help='Exit non-zero if any benchmark regressed')
+    parser.add_argument('--threshold', type=float, help='Allowed slowdown factor (overrides the baseline file)')
+    parser.add_argument('--min-delta', type=float,
+                        help='Slowdown in seconds always tolerated (overrides the baseline file)')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    scenario = f"s{args.sections}-l{args.locales}-k{args.page_kb}"
+    print(f"Running scenario {scenario} ({args.sections * args.locales} pages)")
+    results = run_scenario(args.sections, args.locales, args.page_kb, args.repeat, args.heavy_repeat)
+    for name, seconds in results.items():
+        print(f"  {name:<18} {seconds * 1000:10.2f} ms")
+
+    report = {
+        "scenario": scenario,
+        "python": platform.python_version(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    baselines = {"threshold": DEFAULT_THRESHOLD, "min_delta": DEFAULT_MIN_DELTA, "scenarios": {}}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baselines = json.load(f)
+
+    if args.save_baseline:
+        baselines["scenarios"][scenario] = {name: round(seconds, 6) for name, seconds in results.items()}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"Baseline for {scenario} saved to {args.baseline}")
+
+    baseline = baselines["scenarios"].get(scenario)
+    if not baseline:
+        print(f"No baseline for {scenario}")
+        return
+    min_delta = args.min_delta if args.min_delta is not None else baselines.get("min_delta", DEFAULT_MIN_DELTA)
+    regressions = compare(results, baseline, args.threshold or baselines.get("threshold", DEFAULT_THRESHOLD), min_delta)
+    if regressions:
+        print("Regressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        if args.check:
+            sys.exit(1)
+    else:
+        print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Context Map for NTR Documentation
+Compiles (app, locale, section ID, keyword or app context key) → section, heading anchor and
+byte range of the markdown page, so the app can fetch and render just the fragment it needs
+"""
+
+import os
+import sys
+import json
+import hashlib
+import logging
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from file_utils import atomic_write_text
+from markdown_sections import split_sections, toc_slugify
+from search_shards import TITLE_WEIGHT, Stemmer
+
+logger = logging.getLogger(__name__)
+
+MAP_VERSION = 1
+CONTEXT_MAP_FILE = 'context-map.json'
+DEFAULT_CACHE_PATH = '.site-build/context-sections.json'
+# Keywords in help-config.json are written in this language
+DEFAULT_KEYWORD_CODE = 'EN'
+
+# [section ID, anchor ('' for the whole page), start byte, end byte (exclusive)]
+MapEntry = List
+
+
+class ContextMapBuilder:
+    """Builds the context map from help-config.json and the markdown pages it points to.
+
+    A section ID maps to its whole page. A keyword (or the phrase of an app context key,
+    see ``contexts`` in help-config.json) maps to the heading of the page that matches all
+    its words best, in the keyword locale; other locales get the heading at the same position
+    when their pages have the same heading structure, and the whole page otherwise.
+    Parsed pages are cached by content hash, so only changed pages are read again.
+    """
+
+    def __init__(self, config_path: str = "help-config.json", mkdocs_config: str = "mkdocs.yml",
+                 cache_path: str = DEFAULT_CACHE_PATH, keyword_locale: Optional[str] = None):
+        with open(config_path, 'r', encoding='utf-8') as f:
+            self.config = json.load(f)
+        self.slug, self.separator = toc_slugify(mkdocs_config)
+        self.cache_path = Path(cache_path)
+        self.keyword_locale = keyword_locale
+        # Anchors depend on the toc settings, so cached pages are only valid for the same mkdocs.yml
+        try:
+            self.settings = f"{MAP_VERSION}:{hashlib.sha256(Path(mkdocs_config).read_bytes()).hexdigest()}"
+        except OSError:
+            self.settings = f"{MAP_VERSION}:"
+        self.cache = self.load_cache()
+        self.pages_read = 0
+
+    def load_cache(self) -> Dict[str, Dict]:
+        if not self.cache_path.exists():
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not read section cache {self.cache_path}: {e}. Reading every page.")
+            return {}
+        return cache.get('pages', {}) if cache.get('settings') == self.settings else {}
+
+    def save_cache(self, used: List[str]) -> None:
+        pages = {path: self.cache[path] for path in sorted(used) if path in self.cache}
+        atomic_write_text(str(self.cache_path), json.dumps({'settings': self.settings, 'pages': pages}, ensure_ascii=False))
+
+    def page_sections(self, file_path: str, language: str) -> Optional[Dict]:
+        """Headings of a page with their subtree byte ranges and stemmed terms, None if it is missing."""
+        try:
+            data = Path(file_path).read_bytes()
+        except OSError as e:
+            logger.warning(f"Skipping {file_path}: {e}")
+            return None
+        digest = hashlib.sha256(data).hexdigest()
+        cached = self.cache.get(file_path)
+        if cached and cached['hash'] == digest and cached['language'] == language:
+            return cached
+
+        self.pages_read += 1
+        stemmer = Stemmer(language)
+        # Decoded without newline translation, so offsets are byte offsets of the file as served
+        sections = [section for section in split_sections(data.decode('utf-8'), self.slug, self.separator)
+                    if section.level]
+        headings = []
+        for index, section in enumerate(sections):
+            # A heading's fragment runs to the next heading of the same or a higher level
+            end = next((following.start for following in sections[index + 1:] if following.level <= section.level),
+                       len(data))
+            terms: Dict[str, int] = {}
+            for term in stemmer.terms(section.title):
+                terms[term] = terms.get(term, 0) + TITLE_WEIGHT
+            for term in stemmer.terms(section.text):
+                terms[term] = terms.get(term, 0) + 1
+            headings.append({'level': section.level, 'title': section.title, 'anchor': section.anchor,
+                             'start': section.start, 'end': end, 'terms': terms})
+        page = {'hash': digest, 'language': language, 'size': len(data), 'headings': headings}
+        self.cache[file_path] = page
+        return page
+
+    @staticmethod
+    def match_heading(page: Dict, phrase: str, stemmer: Stemmer) -> Optional[Tuple[int, int]]:
+        """Index and score of the heading below the page title matching every word of phrase best."""
+        terms = set(stemmer.terms(phrase))
+        if not terms:
+            return None
+        best = None
+        for index, heading in enumerate(page['headings']):
+            # The page's first heading is the page itself
+            if index == 0 and heading['level'] == 1:
+                continue
+            if not all(term in heading['terms'] for term in terms):
+                continue
+            score = sum(heading['terms'][term] for term in terms)
+            if best is None or score > best[1]:
+                best = (index, score)
+        return best
+
+    def build(self) -> Dict:
+        """The context map: apps → locale → key → [section ID, anchor, start, end]."""
+        apps = {}
+        used_paths: List[str] = []
+        for app_id, app in self.config.get('apps', {}).items():
+            locales = app.get('locales', {})
+            keyword_locale = self.keyword_locale
+            if keyword_locale not in locales:
+                keyword_locale = next((locale for locale, locale_config in locales.items()
+                                       if locale_config.get('code', '').upper() == DEFAULT_KEYWORD_CODE),
+                                      next(iter(locales), None))
+            # key → (rank, entry) per locale; section IDs outrank keywords, higher scores win, ties keep the first
+            ranked: Dict[str, Dict[str, Tuple[float, MapEntry]]] = {locale: {} for locale in locales}
+
+            for section in self.config.get('sections', []):
+                section_id = section['id']
+                pages = {}
+                for locale, locale_config in locales.items():
+                    file_path = locale_config.get('file_paths', {}).get(section_id)
+                    if not file_path:
+                        continue
+                    page = self.page_sections(file_path, locale_config.get('code', 'en').lower())
+                    if page:
+                        pages[locale] = page
+                        used_paths.append(file_path)
+                for locale, page in pages.items():
+                    ranked[locale][section_id.lower()] = (float('inf'), [section_id, '', 0, page['size']])
+
+                phrases = {keyword.lower(): keyword for keyword in section.get('keywords', [])}
+                phrases.update({key.lower(): phrase for key, phrase in section.get('contexts', {}).items()})
+                source = pages.get(keyword_locale)
+                stemmer = Stemmer(locales[keyword_locale].get('code', 'en').lower()) if source else None
+                for key, phrase in phrases.items():
+                    match = self.match_heading(source, phrase, stemmer) if source else None
+                    score = match[1] if match else 0
+                    for locale, page in pages.items():
+                        entry = [section_id, '', 0, page['size']]
+                        if match and [h['level'] for h in page['headings']] == [h['level'] for h in source['headings']]:
+                            heading = page['headings'][match[0]]
+                            entry = [section_id, heading['anchor'], heading['start'], heading['end']]
+                        if key not in ranked[locale] or score > ranked[locale][key][0]:
+                            ranked[locale][key] = (score, entry)
+
+            apps[app_id] = {locale: {key: entry for key, (_, entry) in sorted(entries.items())}
+                            for locale, entries in ranked.items()}
+        self.save_cache(used_paths)
+        return {'version': MAP_VERSION, 'apps': apps}
+
+    def write(self, output_path: str) -> bool:
+        """Write the context map if it changed; returns True if the file was written."""
+        context_map = self.build()
+        content = json.dumps(context_map, ensure_ascii=False, separators=(',', ':'))
+        entries = sum(len(keys) for app in context_map['apps'].values() for keys in app.values())
+        output = Path(output_path)
+        if output.exists() and output.read_text(encoding='utf-8') == content:
+            logger.info(f"Context map up to date: {entries} entries ({self.pages_read} pages read)")
+            return False
+        atomic_write_text(str(output), content)
+        # Temporary files are private; the map is served like the rest of the site
+        os.chmod(output, 0o644)
+        logger.info(f"Context map written to {output}: {entries} entries ({self.pages_read} pages read)")
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the in-app context map of NTR Documentation")
+    parser.add_argument('--config', default='help-config.json', help='Help configuration file path')
+    parser.add_argument('--mkdocs-config', default='mkdocs.yml', help='mkdocs configuration with the toc settings')
+    parser.add_argument('--output', default=f"site/{CONTEXT_MAP_FILE}", help='Context map file to write')
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help='Cache of parsed pages')
+    parser.add_argument('--keyword-locale', help='Locale the keywords are written in (default: the English one)')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    try:
+        builder = ContextMapBuilder(args.config, args.mkdocs_config, args.cache, args.keyword_locale)
+        builder.write(args.output)
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not build the context map: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
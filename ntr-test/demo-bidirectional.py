@@ -4,57 +4,57 @@ Bidirectional Translation Demo
 Demonstrates the translation system's ability to translate between any languages
 """
 
-import subprocess
 import sys
-import os
+import logging
 
-def run_command(cmd, description):
-    """Run a command and display the result."""
+from translation_errors import TranslationError
+from translation_api import TranslationSession
+
+def report(result, description):
+    """Display the result of one operation."""
     print(f"\n{'='*60}")
     print(f"🔄 {description}")
     print(f"{'='*60}")
-    print(f"Command: {cmd}")
-    print("-" * 60)
     
-    try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, check=True)
+    if result.success:
         print("✅ SUCCESS")
-        print(result.stdout)
-        return True
-    except subprocess.CalledProcessError as e:
+    else:
         print("❌ ERROR")
-        print(f"Error: {e}")
-        print(f"Output: {e.stdout}")
-        print(f"Error: {e.stderr}")
-        return False
+        if result.error:
+            print(f"Error: {result.error}")
+    print(f"Files written: {len(result.translated_files)} in {result.duration_seconds:.2f}s")
+    for path in result.translated_files:
+        print(f"   • {path}")
+    return result.success
 
 def main():
     print("🌍 Bidirectional Translation System Demo")
     print("=" * 60)
     print("This demo shows how the translation system works in all directions")
     
-    # Test 1: Swedish to English
-    success1 = run_command(
-        "python translate.py --mode translate-lang --from-lang sv-se --to-lang en-se",
-        "Translating Swedish to English"
-    )
+    logging.basicConfig(level=logging.WARNING)
     
-    # Test 2: English to Swedish
-    success2 = run_command(
-        "python translate.py --mode translate-lang --from-lang en-se --to-lang sv-se",
-        "Translating English to Swedish"
-    )
+    # All operations run in one process, sharing the provider session, cache and git reader
+    operations = [
+        ({'mode': 'translate-lang', 'from_lang': 'sv-se', 'to_lang': 'en-se'},
+         "Translating Swedish to English"),
+        ({'mode': 'translate-lang', 'from_lang': 'en-se', 'to_lang': 'sv-se'},
+         "Translating English to Swedish"),
+        ({'mode': 'translate-file', 'source_file': 'docs/sv/overview.md', 'target_lang': 'EN', 'source_lang': 'SV'},
+         "Translating specific file (Swedish to English)"),
+        ({'mode': 'sync-all'},
+         "Syncing all languages with each other"),
+    ]
     
-    # Test 3: Specific file translation
-    success3 = run_command(
-        "python translate.py --mode translate-file --source-file docs/sv/overview.md --target-lang EN --source-lang SV",
-        "Translating specific file (Swedish to English)"
-    )
+    try:
+        with TranslationSession() as session:
+            batch = session.run_batch(operation for operation, _ in operations)
+    except TranslationError as e:
+        print(f"❌ ERROR\nError: {e}")
+        sys.exit(1)
     
-    # Test 4: Sync all languages
-    success4 = run_command(
-        "python translate.py --mode sync-all",
-        "Syncing all languages with each other"
+    success1, success2, success3, success4 = (
+        report(result, description) for result, (_, description) in zip(batch.results, operations)
     )
     
     # Summary
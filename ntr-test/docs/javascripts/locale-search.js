@@ -0,0 +1,196 @@
+// Search over the pre-built index shard of the current locale site (see search_shards.py)
+(function () {
+  var script = document.currentScript;
+  // Every locale site has its own copy of this script, so the shard next to it is the locale's
+  var siteRoot = new URL("../", script.src);
+  var shardUrl = new URL("search/shard.json", siteRoot);
+  var messages = {
+    sv: { placeholder: "Sök", none: "Inga träffar" },
+    en: { placeholder: "Search", none: "No results" }
+  };
+  var shard = null;
+  var loading = null;
+
+  function loadShard() {
+    if (!loading) {
+      loading = fetch(shardUrl).then(function (response) {
+        if (!response.ok) throw new Error("HTTP " + response.status);
+        return response.json();
+      }).then(function (data) {
+        shard = data;
+        shard.stopwords = new Set(data.stemmer.stopwords);
+        shard.sortedTerms = Object.keys(data.terms).sort();
+        return shard;
+      });
+    }
+    return loading;
+  }
+
+  // Same rules as Stemmer in search_shards.py
+  function regionStart(word, stemmer) {
+    for (var i = 1; i < word.length; i++) {
+      if (stemmer.vowels.indexOf(word[i]) < 0 && stemmer.vowels.indexOf(word[i - 1]) >= 0) {
+        return Math.max(i + 1, stemmer.r1_min);
+      }
+    }
+    return word.length;
+  }
+
+  function stem(word, stemmer) {
+    var r1 = regionStart(word, stemmer);
+    stemmer.steps.forEach(function (step) {
+      var best = null;
+      step.rules.forEach(function (rule) {
+        var inRegion = !step.region || word.length - rule[0].length >= r1;
+        if (word.endsWith(rule[0]) && inRegion && (!best || rule[0].length > best[0].length)) best = rule;
+      });
+      if (!best) return;
+      var base = word.slice(0, word.length - best[0].length);
+      if (best[2] && !(base && best[2].indexOf(base[base.length - 1]) >= 0)) return;
+      word = base + best[1];
+    });
+    return word;
+  }
+
+  function queryTerms(query) {
+    var words = query.normalize("NFC").toLowerCase().match(/[\p{L}\p{N}\p{M}]+/gu) || [];
+    return words.filter(function (word) {
+      return word.length > 1 && !shard.stopwords.has(word);
+    }).map(function (word) {
+      return stem(word, shard.stemmer);
+    });
+  }
+
+  // Stems starting with prefix, so results follow the last word while it is being typed
+  function prefixTerms(prefix) {
+    var terms = shard.sortedTerms;
+    var low = 0;
+    var high = terms.length;
+    while (low < high) {
+      var middle = (low + high) >> 1;
+      if (terms[middle] < prefix) low = middle + 1; else high = middle;
+    }
+    var found = [];
+    for (var i = low; i < terms.length && terms[i].startsWith(prefix) && found.length < 20; i++) found.push(terms[i]);
+    return found;
+  }
+
+  function search(query, limit) {
+    var terms = queryTerms(query);
+    var total = Math.max(1, shard.docs.length);
+    var scores = {};
+    terms.forEach(function (term, position) {
+      var expanded = position === terms.length - 1 ? prefixTerms(term) : [term];
+      var matched = {};
+      expanded.forEach(function (candidate) {
+        var postings = shard.terms[candidate] || [];
+        var idf = Math.log(1 + total / Math.max(1, postings.length / 2));
+        // Completions of a word rank below the word itself
+        var factor = candidate === term ? 1 : 0.5;
+        for (var i = 0; i < postings.length; i += 2) {
+          var score = scores[postings[i]] || (scores[postings[i]] = [0, 0]);
+          if (!matched[postings[i]]) {
+            matched[postings[i]] = true;
+            score[0] += 1;
+          }
+          score[1] += postings[i + 1] * idf * factor;
+        }
+      });
+    });
+    return Object.keys(scores).map(Number).sort(function (a, b) {
+      return scores[b][0] - scores[a][0] || scores[b][1] - scores[a][1] || a - b;
+    }).slice(0, limit).map(function (number) {
+      return shard.docs[number];
+    });
+  }
+
+  function render(results, list, text) {
+    list.innerHTML = "";
+    if (!results.length) {
+      var empty = document.createElement("li");
+      empty.className = "locale-search__empty";
+      empty.textContent = text.none;
+      list.appendChild(empty);
+      return;
+    }
+    results.forEach(function (doc) {
+      var page = shard.pages[doc[0]];
+      var item = document.createElement("li");
+      var link = document.createElement("a");
+      link.href = new URL(page[0] + (doc[1] ? "#" + doc[1] : ""), siteRoot).href;
+      var title = document.createElement("strong");
+      title.textContent = doc[2] || page[1];
+      link.appendChild(title);
+      if (doc[2]) {
+        var context = document.createElement("span");
+        context.className = "locale-search__page";
+        context.textContent = page[1];
+        link.appendChild(context);
+      }
+      if (doc[3]) {
+        var snippet = document.createElement("span");
+        snippet.className = "locale-search__snippet";
+        snippet.textContent = doc[3];
+        link.appendChild(snippet);
+      }
+      item.appendChild(link);
+      list.appendChild(item);
+    });
+  }
+
+  function setup() {
+    var header = document.querySelector(".md-header__inner");
+    // Sites built with the theme's own search plugin keep using it
+    if (!header || document.querySelector(".md-search")) return;
+    var language = (document.documentElement.lang || "en").slice(0, 2);
+    var text = messages[language] || messages.en;
+
+    var container = document.createElement("div");
+    container.className = "locale-search";
+    var input = document.createElement("input");
+    input.type = "search";
+    input.placeholder = text.placeholder;
+    input.setAttribute("aria-label", text.placeholder);
+    var list = document.createElement("ol");
+    list.className = "locale-search__results";
+    list.hidden = true;
+    container.appendChild(input);
+    container.appendChild(list);
+    header.insertBefore(container, header.querySelector(".md-header__source"));
+
+    input.addEventListener("focus", loadShard);
+    input.addEventListener("input", function () {
+      var query = input.value;
+      if (!query.trim()) {
+        list.hidden = true;
+        return;
+      }
+      loadShard().then(function () {
+        // Drop answers to queries typed over in the meantime
+        if (input.value !== query) return;
+        render(search(query, 10), list, text);
+        list.hidden = false;
+      }).catch(function (error) {
+        console.warn("Search index not available: " + error.message);
+      });
+    });
+    input.addEventListener("keydown", function (event) {
+      if (event.key === "Escape") {
+        input.value = "";
+        list.hidden = true;
+      } else if (event.key === "Enter") {
+        var first = list.querySelector("a");
+        if (first) window.location.href = first.href;
+      }
+    });
+    document.addEventListener("click", function (event) {
+      if (!container.contains(event.target)) list.hidden = true;
+    });
+  }
+
+  if (document.readyState === "loading") {
+    document.addEventListener("DOMContentLoaded", setup);
+  } else {
+    setup();
+  }
+})();
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+File Utilities for the NTR documentation tooling
+"""
+
+import os
+import tempfile
+
+
+def atomic_write_text(path: str, content: str) -> None:
+    """Write a text file atomically: readers see the old or the new content, never a partial file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}-", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
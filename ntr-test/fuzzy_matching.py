@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Fuzzy Matching for the NTR translation memory
+Character n-gram MinHash signatures, LSH band keys and sentence-level partial reuse
+"""
+
+import re
+import zlib
+from dataclasses import dataclass
+from typing import List, Optional, Set, Tuple
+
+from inline_markup import Original, mask
+
+SHINGLE_SIZE = 3
+SIGNATURE_BINS = 24
+ROWS_PER_BAND = 4
+# Shorter segments (headings, list labels) are too small for a near match to be meaningful
+MIN_FUZZY_LENGTH = 20
+
+EMPTY_BIN = 0xFFFFFFFF
+NON_WORD_RE = re.compile(r'[\W_]+', re.UNICODE)
+WHITESPACE_RE = re.compile(r'\s+')
+SENTENCE_RE = re.compile(r'(?<=[.!?:;])(\s+)')
+
+
+@dataclass
+class FuzzyMatch:
+    """A stored segment similar to the one being translated."""
+    source_text: str
+    target_text: str
+    similarity: float
+
+
+def normalize(text: str) -> str:
+    """Case-, punctuation- and whitespace-insensitive form of a segment."""
+    return NON_WORD_RE.sub(' ', text.lower()).strip()
+
+
+def wording(text: str) -> Tuple[str, List[Original]]:
+    """Form of a segment that only ignores the case and spacing of its prose.
+
+    Inline markup is masked and kept verbatim, so a segment whose URL, code or emphasis
+    changed never compares equal to the old one.
+    """
+    masked, originals = mask(text)
+    return WHITESPACE_RE.sub(' ', masked.lower()).strip(), originals
+
+
+def shingles(text: str) -> Set[str]:
+    """Character n-grams of the lowercased, whitespace-collapsed text."""
+    text = WHITESPACE_RE.sub(' ', text.lower()).strip()
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def signature(grams: Set[str]) -> List[int]:
+    """One-permutation MinHash: each shingle hash falls into a bin, keeping the minimum per bin.
+
+    A single CRC32 pass per shingle keeps this cheap enough for per-lookup use, and
+    CRC32 (unlike ``hash()``) is stable across processes, so signatures can be stored.
+    """
+    bins = [EMPTY_BIN] * SIGNATURE_BINS
+    for gram in grams:
+        value = zlib.crc32(gram.encode('utf-8'))
+        index = value % SIGNATURE_BINS
+        if value < bins[index]:
+            bins[index] = value
+    return bins
+
+
+def band_keys(bins: List[int]) -> List[int]:
+    """LSH band keys; segments sharing any key become match candidates.
+
+    Bands whose bins are all empty carry no information and are skipped.
+    """
+    keys = []
+    for band in range(SIGNATURE_BINS // ROWS_PER_BAND):
+        rows = bins[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        if all(row == EMPTY_BIN for row in rows):
+            continue
+        data = band.to_bytes(1, 'big') + b''.join(row.to_bytes(4, 'big') for row in rows)
+        # Signed 63-bit so the key fits an SQLite INTEGER
+        keys.append(zlib.crc32(data) << 31 ^ zlib.adler32(data))
+    return keys
+
+
+def split_sentences(text: str) -> Tuple[List[str], List[str]]:
+    """Split text into sentences and the whitespace separating them."""
+    parts = SENTENCE_RE.split(text)
+    return parts[0::2], parts[1::2]
+
+
+def join_sentences(sentences: List[str], separators: List[str]) -> str:
+    """Inverse of split_sentences()."""
+    parts = [sentences[0]]
+    for separator, sentence in zip(separators, sentences[1:]):
+        parts.extend((separator, sentence))
+    return ''.join(parts)
+
+
+def plan_partial_reuse(text: str, match: FuzzyMatch) -> Optional[Tuple[List[Tuple[str, Optional[str]]], List[str]]]:
+    """Pair each sentence of text with its stored translation when that sentence is unchanged.
+
+    Returns the list of (sentence, translation or None) plus the separators of the stored
+    translation, or None when the stored segment and its translation cannot be aligned
+    sentence by sentence or no sentence is reusable.
+    """
+    sentences, _ = split_sentences(text)
+    old_sentences, _ = split_sentences(match.source_text)
+    old_translations, separators = split_sentences(match.target_text)
+    if not len(sentences) == len(old_sentences) == len(old_translations) or len(sentences) < 2:
+        return None
+    plan = [
+        (sentence, translation if sentence == old_sentence else None)
+        for sentence, old_sentence, translation in zip(sentences, old_sentences, old_translations)
+    ]
+    if all(translation is None for _, translation in plan):
+        return None
+    return plan, separators
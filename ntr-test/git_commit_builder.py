@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Git Commit Builder for NTR Documentation
+Commits files onto a branch with git plumbing (hash-object, mktree, commit-tree, update-ref),
+leaving the working tree, the index and the checked-out branch untouched
+"""
+
+import os
+import logging
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+from git_reader import GitReader
+from translation_errors import GitError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FILE_MODE = '100644'
+TREE_MODE = '40000'
+# Submodules are recorded as commits
+GITLINK_MODE = '160000'
+
+# name → (mode, type, sha)
+TreeEntries = Dict[str, Tuple[str, str, str]]
+
+
+class CommitBuilder:
+    """Builds a commit from a base commit plus files of the working tree.
+
+    Blobs are written by one ``git hash-object --stdin-paths`` process and trees by one
+    ``git mktree --batch`` process. Only the trees on the paths of the committed files are
+    read and rewritten, so the cost grows with the number of files, not the repository.
+    """
+
+    def __init__(self, reader: Optional[GitReader] = None, cwd: Optional[str] = None):
+        self.cwd = cwd
+        self.reader = reader or GitReader(cwd)
+        self.mktree: Optional[subprocess.Popen] = None
+        # Working directory relative to the repository root, e.g. "ntr-test/"
+        self.prefix: Optional[str] = None
+
+    def git(self, *args: str, env: Optional[Dict[str, str]] = None, input: Optional[str] = None) -> str:
+        """Run a git command and return its output. Raises GitError if it fails."""
+        try:
+            result = subprocess.run(['git', *args], cwd=self.cwd, input=input, capture_output=True, text=True,
+                                    check=True, env={**os.environ, **env} if env else None)
+        except (OSError, subprocess.CalledProcessError) as e:
+            stderr = getattr(e, 'stderr', '') or ''
+            raise GitError(f"git {args[0]} failed: {stderr.strip() or e}")
+        return result.stdout
+
+    def repo_path(self, path: str) -> str:
+        """Path relative to the repository root of a path relative to the working directory."""
+        if self.prefix is None:
+            self.prefix = self.git('rev-parse', '--show-prefix').strip()
+        return os.path.normpath(self.prefix + path).replace(os.sep, '/')
+
+    def write_blobs(self, paths: List[str]) -> Dict[str, str]:
+        """Store the working tree files as blobs; returns repository path → blob SHA."""
+        # Paths go through the repository's filters (e.g. line endings), as with git add.
+        # hash-object reads stdin paths from the repository root, so they are made absolute
+        absolute = [os.path.abspath(os.path.join(self.cwd or '', path)) for path in paths]
+        shas = self.git('hash-object', '-w', '--stdin-paths', input='\n'.join(absolute) + '\n').split()
+        if len(shas) != len(paths):
+            raise GitError(f"git hash-object returned {len(shas)} objects for {len(paths)} files")
+        return {self.repo_path(path): sha for path, sha in zip(paths, shas)}
+
+    def read_tree(self, sha: Optional[str]) -> TreeEntries:
+        """Entries of a tree object; empty for None."""
+        if sha is None:
+            return {}
+        found = self.reader.read_object(sha)
+        if not found or found[1] != 'tree':
+            raise GitError(f"Tree {sha} not found")
+        content, digest_size = found[2], len(sha) // 2
+        entries: TreeEntries = {}
+        position = 0
+        while position < len(content):
+            space = content.index(b' ', position)
+            nul = content.index(b'\0', space)
+            mode = content[position:space].decode('ascii')
+            name = content[space + 1:nul].decode('utf-8', errors='surrogateescape')
+            entry_sha = content[nul + 1:nul + 1 + digest_size].hex()
+            kind = 'tree' if mode == TREE_MODE else 'commit' if mode == GITLINK_MODE else 'blob'
+            entries[name] = (mode, kind, entry_sha)
+            position = nul + 1 + digest_size
+        return entries
+
+    def write_tree(self, entries: TreeEntries) -> str:
+        """Store a tree object and return its SHA."""
+        if self.mktree is None or self.mktree.poll() is not None:
+            try:
+                self.mktree = subprocess.Popen(['git', 'mktree', '--batch', '-z'], cwd=self.cwd,
+                                               stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                               stderr=subprocess.DEVNULL)
+            except OSError as e:
+                raise GitError(f"Could not start git mktree: {e}")
+        # -z: NUL-terminated entries, an empty entry ends the tree
+        records = b''.join(f"{mode} {kind} {sha}\t".encode('ascii') + name.encode('utf-8', errors='surrogateescape')
+                           + b'\0' for name, (mode, kind, sha) in entries.items())
+        try:
+            self.mktree.stdin.write(records + b'\0')
+            self.mktree.stdin.flush()
+            sha = self.mktree.stdout.readline().decode('ascii').strip()
+        except OSError as e:
+            raise GitError(f"git mktree failed: {e}")
+        if not sha:
+            raise GitError("git mktree failed")
+        return sha
+
+    def build_tree(self, base_tree: Optional[str], blobs: Dict[str, str]) -> str:
+        """Tree of base_tree with the given files (path relative to the tree → blob SHA) replaced or added."""
+        entries = self.read_tree(base_tree)
+        subdirectories: Dict[str, Dict[str, str]] = {}
+        for path, sha in blobs.items():
+            name, _, rest = path.partition('/')
+            if rest:
+                subdirectories.setdefault(name, {})[rest] = sha
+            else:
+                mode = entries[name][0] if name in entries and entries[name][1] == 'blob' else DEFAULT_FILE_MODE
+                entries[name] = (mode, 'blob', sha)
+        for name, subdirectory_blobs in subdirectories.items():
+            existing = entries.get(name)
+            subtree = existing[2] if existing and existing[1] == 'tree' else None
+            entries[name] = (TREE_MODE, 'tree', self.build_tree(subtree, subdirectory_blobs))
+        return self.write_tree(entries)
+
+    def commit(self, base: str, paths: List[str], message: str, env: Optional[Dict[str, str]] = None) -> str:
+        """Create a commit of base plus the working tree versions of paths; returns its SHA.
+
+        env may set GIT_AUTHOR_* / GIT_COMMITTER_* variables.
+        """
+        base_commit = self.reader.rev_parse(base)
+        if not base_commit:
+            raise GitError(f"Base commit {base} not found")
+        found = self.reader.read_object(f"{base_commit}^{{tree}}")
+        if not found:
+            raise GitError(f"Tree of {base_commit} not found")
+        tree = self.build_tree(found[0], self.write_blobs(paths))
+        if tree == found[0]:
+            logger.info("Translated files are identical to the base commit")
+        return self.git('commit-tree', tree, '-p', base_commit, env=env, input=message).strip()
+
+    def create_branch(self, branch: str, commit: str) -> None:
+        """Point a new branch at commit. Raises GitError if the branch already exists."""
+        # An empty old value makes update-ref refuse to overwrite an existing branch
+        self.git('update-ref', '-m', 'translation commit', f"refs/heads/{branch}", commit, '')
+
+    def close(self) -> None:
+        if self.mktree is None:
+            return
+        try:
+            self.mktree.stdin.close()
+            self.mktree.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.mktree.kill()
+        self.mktree = None
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Git Reader for NTR Documentation
+Reads objects through one long-running ``git cat-file --batch`` process instead of a git process per lookup
+"""
+
+import logging
+import subprocess
+import threading
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class GitReader:
+    def __init__(self, cwd: Optional[str] = None):
+        self.cwd = cwd
+        self.process: Optional[subprocess.Popen] = None
+        self.lock = threading.Lock()
+
+    def start(self) -> bool:
+        """Start the batch process on first use; False if git is unavailable."""
+        if self.process is not None and self.process.poll() is None:
+            return True
+        try:
+            self.process = subprocess.Popen(
+                ['git', 'cat-file', '--batch'], cwd=self.cwd,
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+            return True
+        except OSError as e:
+            logger.warning(f"Could not start git reader: {e}")
+            self.process = None
+            return False
+
+    def read_object(self, spec: str) -> Optional[Tuple[str, str, bytes]]:
+        """Return (sha, type, content) of the object named by spec, or None if it does not exist.
+
+        spec is anything ``git rev-parse`` accepts, e.g. ``HEAD~1:./docs/en/overview.md``.
+        """
+        if '\n' in spec:
+            return None
+        with self.lock:
+            if not self.start():
+                return None
+            try:
+                self.process.stdin.write(spec.encode('utf-8') + b'\n')
+                self.process.stdin.flush()
+                header = self.process.stdout.readline().decode('utf-8').rstrip('\n')
+                if not header or header.endswith(' missing') or header.endswith(' ambiguous'):
+                    return None
+                sha, object_type, size = header.split(' ')
+                content = self.process.stdout.read(int(size))
+                # Each object is followed by a newline
+                self.process.stdout.read(1)
+                return sha, object_type, content
+            except (OSError, ValueError) as e:
+                logger.warning(f"Git reader failed on {spec}: {e}")
+                self.close()
+                return None
+
+    def show(self, rev: str, path: str) -> Optional[str]:
+        """Text of path (relative to the working directory) at rev, or None if it did not exist."""
+        found = self.read_object(f"{rev}:./{path}")
+        if not found or found[1] != 'blob':
+            return None
+        return found[2].decode('utf-8', errors='replace')
+
+    def rev_parse(self, ref: str) -> Optional[str]:
+        """Resolve a ref to a commit SHA, or None if it is not available locally."""
+        found = self.read_object(f"{ref}^{{commit}}")
+        return found[0] if found else None
+
+    def close(self) -> None:
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+        self.process = None
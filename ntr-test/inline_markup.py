@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Inline Markup Masking for NTR Documentation
+Replaces inline code, URLs, HTML and mkdocs extension syntax with compact XML placeholders
+so only prose is sent (and billed) for translation
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+# Alternatives are tried left to right; inline code first so nothing inside it is masked
+INLINE_RE = re.compile(
+    r'(?P<code>(?P<ticks>`+).+?(?P=ticks))'
+    r'|(?P<image>!\[[^\]]*\]\([^)]*\))'
+    r'|(?P<link>\[(?P<link_text>[^\]]+)\](?P<link_target>\([^)]*\)|\[[^\]]*\]))'
+    r'|(?P<html></?[A-Za-z][^<>]*>|<https?://[^<>]+>|&[#\w]+;)'
+    r'|(?P<keys>\+\+[^\s+](?:[^+]|\+(?!\+))*?\+\+)'
+    r'|(?P<mark>==(?P<mark_text>[^\s=](?:[^=]|=(?!=))*?)==)'
+    r'|(?P<emoji>:[a-z0-9_+-]+:)'
+    r'|(?P<url>https?://[^\s<>()\[\]]+[^\s<>()\[\].,;:!?])'
+)
+PLACEHOLDER_RE = re.compile(r'<x i="(\d+)"\s*/>|<g i="(\d+)">|</g>')
+
+# An original span: (text, None) for a masked span, (opening, closing) for markup around translatable text
+Original = Tuple[str, Optional[str]]
+
+
+def escape(text: str) -> str:
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def unescape(text: str) -> str:
+    return (text.replace('&lt;', '<').replace('&gt;', '>').replace('&quot;', '"')
+            .replace('&apos;', "'").replace('&amp;', '&'))
+
+
+def mask(text: str) -> Tuple[str, List[Original]]:
+    """Replace inline markup with XML placeholders.
+
+    Link and ``==mark==`` text stays translatable inside ``<g>`` tags; everything else
+    becomes an empty ``<x/>`` tag. Numbering starts at 0 for every segment, so the same
+    sentence with different URLs masks to the same text and shares one cache entry.
+    Returns the masked, XML-escaped text and the originals to pass to unmask().
+    """
+    originals: List[Original] = []
+    return _mask(text, originals), originals
+
+
+def _mask(text: str, originals: List[Original]) -> str:
+    parts = []
+    position = 0
+    for match in INLINE_RE.finditer(text):
+        parts.append(escape(text[position:match.start()]))
+        position = match.end()
+        index = len(originals)
+        if match.group('link'):
+            originals.append(('[', ']' + match.group('link_target')))
+            parts.append(f'<g i="{index}">{_mask(match.group("link_text"), originals)}</g>')
+        elif match.group('mark'):
+            originals.append(('==', '=='))
+            parts.append(f'<g i="{index}">{_mask(match.group("mark_text"), originals)}</g>')
+        else:
+            originals.append((match.group(0), None))
+            parts.append(f'<x i="{index}"/>')
+    parts.append(escape(text[position:]))
+    return ''.join(parts)
+
+
+def unmask(text: str, originals: List[Original]) -> Optional[str]:
+    """Restore the original markup in translated text.
+
+    Returns None if the translation lost, duplicated or unbalanced any placeholder.
+    """
+    used = set()
+    # Stack of (index, parts) for open <g> tags; the outermost entry collects the result
+    stack: List[Tuple[Optional[int], List[str]]] = [(None, [])]
+    position = 0
+    for match in PLACEHOLDER_RE.finditer(text):
+        stack[-1][1].append(unescape(text[position:match.start()]))
+        position = match.end()
+        masked, opened = match.group(1), match.group(2)
+        if masked is not None or opened is not None:
+            index = int(masked if masked is not None else opened)
+            if index >= len(originals) or index in used:
+                return None
+            used.add(index)
+            original, closing = originals[index]
+            if masked is not None:
+                if closing is not None:
+                    return None
+                stack[-1][1].append(original)
+            else:
+                if closing is None:
+                    return None
+                stack.append((index, []))
+        else:
+            if len(stack) < 2:
+                return None
+            index, parts = stack.pop()
+            opening, closing = originals[index]
+            stack[-1][1].append(opening + ''.join(parts) + closing)
+    stack[-1][1].append(unescape(text[position:]))
+    if len(stack) != 1 or len(used) != len(originals):
+        return None
+    return ''.join(stack[0][1])
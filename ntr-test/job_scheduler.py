@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Job Scheduler for NTR Documentation translation runs
+Orders translation jobs by priority and stops admitting work at a deadline or character budget
+"""
+
+import math
+import time
+import logging
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Section categories from help-config.json; pages end users read come first
+DEFAULT_CATEGORY_PRIORITY = {'user': 3.0, 'general': 2.0, 'admin': 1.0}
+
+
+@dataclass
+class TranslationJob:
+    """One source page to translate into one target page."""
+    source_file: str
+    target_file: str
+    source_lang: str
+    target_lang: str
+    section: Optional[str] = None
+    category: Optional[str] = None
+    # Characters expected to be sent to the provider (segments not in the translation memory)
+    change_size: int = 0
+    # When the job was first planned; deferred jobs keep their original time
+    first_seen: float = 0.0
+    # Commit the source page is compared against, kept so a deferred job still sees its change
+    base: Optional[str] = None
+    # Translation graph stage; a job runs after the jobs writing its source page
+    stage: int = 0
+    # App (help-config.json apps entry) whose pages the job translates
+    app: Optional[str] = None
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+class JobScheduler:
+    """Priority order plus deadline- and budget-aware admission for one run.
+
+    priority = category priority
+               + age_weight * log1p(hours since first planned)
+               + change_size_weight * log1p(characters to send / 1000)
+    """
+
+    def __init__(self, settings: Optional[Dict] = None, deadline_seconds: Optional[float] = None,
+                 character_budget: Optional[int] = None):
+        settings = settings or {}
+        self.category_priority = {**DEFAULT_CATEGORY_PRIORITY, **settings.get('category_priority', {})}
+        self.default_priority = settings.get('default_priority', 0.0)
+        self.age_weight = settings.get('age_weight', 1.0)
+        self.change_size_weight = settings.get('change_size_weight', 0.5)
+        if deadline_seconds is None and settings.get('deadline_minutes'):
+            deadline_seconds = settings['deadline_minutes'] * 60
+        self.deadline_seconds = deadline_seconds
+        self.character_budget = character_budget if character_budget is not None else settings.get('character_budget')
+        self.started = time.monotonic()
+        self.characters_used = 0
+
+    def priority(self, job: TranslationJob, now: Optional[float] = None) -> float:
+        now = now or time.time()
+        age_hours = max(0.0, now - job.first_seen) / 3600 if job.first_seen else 0.0
+        return (self.category_priority.get(job.category, self.default_priority)
+                + self.age_weight * math.log1p(age_hours)
+                + self.change_size_weight * math.log1p(job.change_size / 1000))
+
+    def order(self, jobs: List[TranslationJob]) -> List[TranslationJob]:
+        """Earlier graph stages first, then highest priority; ties keep their planned order."""
+        now = time.time()
+        return sorted(jobs, key=lambda job: (job.stage, -self.priority(job, now)))
+
+    def admit(self, job: TranslationJob) -> Optional[str]:
+        """None if the job may run now, otherwise why it is deferred.
+
+        Past the deadline nothing more is admitted. A job that does not fit the remaining
+        budget is deferred, but smaller jobs behind it may still run.
+        """
+        if self.deadline_seconds is not None and time.monotonic() - self.started >= self.deadline_seconds:
+            return 'deadline reached'
+        if self.character_budget is not None and self.characters_used + job.change_size > self.character_budget:
+            return 'character budget exhausted'
+        return None
+
+    def charge(self, characters: int) -> None:
+        """Count characters actually sent against the budget."""
+        self.characters_used += characters
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Language Identification for NTR Documentation
+Offline character n-gram language identifier, trained on the documentation's own pages,
+used to route pages and to keep text already in the target language away from the provider
+"""
+
+import re
+import json
+import math
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from file_utils import atomic_write_text
+from inline_markup import mask
+from markdown_segments import split_segments
+
+logger = logging.getLogger(__name__)
+
+NGRAM_SIZES = (1, 2, 3, 4)
+# Texts with fewer letters than this (short headings, labels) are not classified
+DEFAULT_MIN_LETTERS = 20
+# Evidence the best language needs over the runner-up: log-likelihood margin per n-gram
+# times the square root of the number of n-grams, so longer texts need a smaller margin
+DEFAULT_MIN_CONFIDENCE = 4.0
+# Sample text per language the profiles are trained on, in characters; n-gram
+# frequencies settle long before that, and training time grows with it
+DEFAULT_SAMPLE_CHARS = 20000
+# Where trained profiles are kept between runs
+DEFAULT_PROFILE_PATH = '.language-profiles.json'
+
+PLACEHOLDER_RE = re.compile(r'<x i="\d+"\s*/>|</?g[^>]*>|&[#\w]+;')
+NON_LETTER_RE = re.compile(r'[^\w]+|[\d_]+')
+
+
+def words(text: str) -> List[str]:
+    """Lower-case words of a segment with inline code, URLs and markup removed."""
+    prose = PLACEHOLDER_RE.sub(' ', mask(text)[0])
+    return [word for word in NON_LETTER_RE.sub(' ', prose.lower()).split() if word]
+
+
+def word_ngrams(word: str) -> List[str]:
+    padded = f" {word} "
+    return [padded[i:i + n] for n in NGRAM_SIZES for i in range(len(padded) - n + 1)]
+
+
+def ngrams(text: str) -> List[str]:
+    return [gram for word in words(text) for gram in word_ngrams(word)]
+
+
+def count_ngrams(texts: Iterable[str]) -> Dict[str, int]:
+    """N-gram counts of sample texts, the profile of one language."""
+    # Prose repeats its words, so each distinct word is split into n-grams once
+    word_counts = Counter(word for text in texts for word in words(text))
+    counts: Counter = Counter()
+    for word, count in word_counts.items():
+        for gram in word_ngrams(word):
+            counts[gram] += count
+    return dict(counts)
+
+
+def sample_texts(pages: Iterable[str], limit: int = DEFAULT_SAMPLE_CHARS) -> List[str]:
+    """Translatable segments of markdown pages, page by page, up to about limit characters.
+
+    Pages are only split as far as the sample needs them.
+    """
+    sample: List[str] = []
+    size = 0
+    for page in pages:
+        for segment in split_segments(page):
+            if segment.translatable:
+                sample.append(segment.text)
+                size += len(segment.text)
+                if size >= limit:
+                    return sample
+    return sample
+
+
+def load_profiles(path: str, key: str) -> Optional[Dict[str, Dict[str, int]]]:
+    """N-gram counts per language stored under key, None if missing or stored for other input."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read language profiles {path}: {e}. Training them again.")
+        return None
+    return stored.get('counts') if stored.get('key') == key else None
+
+
+def save_profiles(path: str, key: str, counts: Dict[str, Dict[str, int]]) -> None:
+    try:
+        atomic_write_text(path, json.dumps({'key': key, 'counts': counts}, ensure_ascii=False, separators=(',', ':')))
+    except OSError as e:
+        logger.warning(f"Could not save language profiles {path}: {e}")
+
+
+@dataclass
+class Detection:
+    """Most likely language of a text, or language None when it cannot be told."""
+    language: Optional[str]
+    confidence: float = 0.0
+    letters: int = 0
+
+
+class LanguageIdentifier:
+    """Naive Bayes over character 1-4-grams of words, with add-one smoothing.
+
+    Short texts and texts without a clear winner are reported as unknown, so callers
+    only act on confident detections.
+    """
+
+    def __init__(self, min_letters: int = DEFAULT_MIN_LETTERS, min_confidence: float = DEFAULT_MIN_CONFIDENCE):
+        self.min_letters = min_letters
+        self.min_confidence = min_confidence
+        self.log_probabilities: Dict[str, Dict[str, float]] = {}
+        self.unseen: Dict[str, float] = {}
+        # Segments repeat within a run (planning, translating, checking), so detections are kept,
+        # and so do words across segments: their summed log-likelihood per language is kept too
+        self.detections: Dict[str, Detection] = {}
+        self.word_scores: Dict[str, Tuple[List[float], int]] = {}
+
+    def train(self, samples: Dict[str, Iterable[str]]) -> 'LanguageIdentifier':
+        """Build a profile per language from its sample texts."""
+        return self.fit({language: count_ngrams(texts) for language, texts in samples.items()})
+
+    def fit(self, counts: Dict[str, Dict[str, int]]) -> 'LanguageIdentifier':
+        """Build the profiles from n-gram counts per language (see count_ngrams)."""
+        self.log_probabilities, self.unseen, self.detections, self.word_scores = {}, {}, {}, {}
+        vocabulary = len({gram for profile in counts.values() for gram in profile})
+        for language, profile in counts.items():
+            total = sum(profile.values()) + vocabulary
+            self.log_probabilities[language] = {gram: math.log((count + 1) / total) for gram, count in profile.items()}
+            self.unseen[language] = math.log(1 / total)
+        return self
+
+    @property
+    def languages(self) -> List[str]:
+        return list(self.log_probabilities)
+
+    def scores(self, text: str) -> Tuple[List[Tuple[str, float]], int, int]:
+        """Average log-likelihood per n-gram of each language (best first), n-gram and letter counts."""
+        text_words = words(text)
+        letters = sum(len(word) for word in text_words)
+        totals = [0.0] * len(self.log_probabilities)
+        count = 0
+        for word in text_words:
+            sums, grams = self.score_word(word)
+            totals = [total + score for total, score in zip(totals, sums)]
+            count += grams
+        if not count:
+            return [], 0, letters
+        results = [(language, total / count) for language, total in zip(self.log_probabilities, totals)]
+        results.sort(key=lambda item: -item[1])
+        return results, count, letters
+
+    def score_word(self, word: str) -> Tuple[List[float], int]:
+        """Summed log-likelihood of a word's n-grams per language (in profile order), and their count."""
+        if word not in self.word_scores:
+            grams = word_ngrams(word)
+            self.word_scores[word] = ([sum(profile.get(gram, self.unseen[language]) for gram in grams)
+                                       for language, profile in self.log_probabilities.items()], len(grams))
+        return self.word_scores[word]
+
+    def detect(self, text: str) -> Detection:
+        if text not in self.detections:
+            self.detections[text] = self._detect(text)
+        return self.detections[text]
+
+    def _detect(self, text: str) -> Detection:
+        scores, count, letters = self.scores(text)
+        if len(scores) < 2 or letters < self.min_letters:
+            return Detection(None, 0.0, letters)
+        confidence = (scores[0][1] - scores[1][1]) * math.sqrt(count)
+        if confidence < self.min_confidence:
+            return Detection(None, confidence, letters)
+        return Detection(scores[0][0], confidence, letters)
+
+    def detect_many(self, texts: Iterable[str]) -> List[Detection]:
+        return [self.detect(text) for text in texts]
+
+    def detect_document(self, texts: Iterable[str]) -> Detection:
+        """Language of a whole page: the language most of its classified letters are in.
+
+        The detection's confidence is the share of the page's letters in that language.
+        """
+        letters_by_language: Dict[str, int] = {}
+        total = 0
+        for detection in self.detect_many(texts):
+            total += detection.letters
+            if detection.language:
+                letters_by_language[detection.language] = letters_by_language.get(detection.language, 0) + detection.letters
+        if not letters_by_language:
+            return Detection(None, 0.0, total)
+        language, letters = max(letters_by_language.items(), key=lambda item: item[1])
+        return Detection(language, letters / total if total else 0.0, total)
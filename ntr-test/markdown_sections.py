@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Markdown Sections for NTR Documentation
+Splits pages into heading sections with the anchors the toc extension gives them,
+for search indexing and deep links into pages
+"""
+
+import re
+import html
+import logging
+import importlib
+import unicodedata
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Set, Tuple
+
+from markdown_segments import FENCE_RE, HEADING_RE, HTML_LINE_RE, LIST_ITEM_RE, BLOCKQUOTE_RE, TABLE_SEPARATOR_RE
+
+IMAGE_RE = re.compile(r'!\[([^\]]*)\]\([^)]*\)')
+LINK_RE = re.compile(r'\[([^\]]*)\]\([^)]*\)|\[([^\]]*)\]\[[^\]]*\]')
+TAG_RE = re.compile(r'<[^>]+>')
+EMPHASIS_RE = re.compile(r'(\*{1,3}|_{1,3}|~~|==|\^\^|`+)(?=\S)(.+?)(?<=\S)\1')
+UNIQUE_SUFFIX_RE = re.compile(r'^(.*)_([0-9]+)$')
+
+logger = logging.getLogger(__name__)
+
+# slugify(heading text, separator) → anchor, as configured for the toc extension
+SlugFunction = Callable[[str, str], str]
+
+
+def plain_text(markup: str) -> str:
+    """Text of inline markdown as a reader sees it: no emphasis markers, links or tags."""
+    text = IMAGE_RE.sub(r'\1', markup)
+    text = LINK_RE.sub(lambda match: match.group(1) if match.group(1) is not None else match.group(2), text)
+    text = TAG_RE.sub('', text)
+    previous = None
+    while previous != text:
+        previous, text = text, EMPHASIS_RE.sub(r'\2', text)
+    return html.unescape(text).strip()
+
+
+def slugify(value: str, separator: str = '-', unicode: bool = False) -> str:
+    """Heading anchor as made by the toc extension's default slugify (markdown.extensions.toc.slugify)."""
+    if not unicode:
+        value = unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode('ascii')
+    value = re.sub(r'[^\w\s-]', '', value).strip().lower()
+    return re.sub(r'[{}\s]+'.format(re.escape(separator)), separator, value)
+
+
+def import_object(path: str):
+    module, _, name = path.rpartition('.')
+    return getattr(importlib.import_module(module), name)
+
+
+def toc_slugify(mkdocs_config: str = "mkdocs.yml") -> Tuple[SlugFunction, str]:
+    """The slugify function and separator of the toc extension as configured in mkdocs.yml.
+
+    Only the toc options are resolved: a ``!!python/name`` or ``!!python/object/apply``
+    slugify is imported (and called with its arguments), everything else is left alone.
+    Falls back to the toc extension's default when the setting cannot be used.
+    """
+    try:
+        import yaml
+    except ImportError:
+        logger.warning("PyYAML is not installed; using the default toc slugify")
+        return slugify, '-'
+
+    class ConfigLoader(yaml.SafeLoader):
+        pass
+
+    def tagged(loader, suffix, node):
+        if isinstance(node, yaml.MappingNode):
+            value = loader.construct_mapping(node, deep=True)
+        elif isinstance(node, yaml.SequenceNode):
+            value = loader.construct_sequence(node, deep=True)
+        else:
+            value = loader.construct_scalar(node)
+        return (suffix, value)
+
+    ConfigLoader.add_multi_constructor('tag:yaml.org,2002:python/', tagged)
+    # mkdocs' own tags (!ENV, !relative) do not matter here
+    ConfigLoader.add_multi_constructor('!', tagged)
+    try:
+        with open(mkdocs_config, 'r', encoding='utf-8') as f:
+            config = yaml.load(f, Loader=ConfigLoader) or {}
+    except (OSError, yaml.YAMLError) as e:
+        logger.warning(f"Could not read {mkdocs_config}: {e}; using the default toc slugify")
+        return slugify, '-'
+
+    options = {}
+    for extension in config.get('markdown_extensions', []):
+        if isinstance(extension, dict) and 'toc' in extension:
+            options = extension['toc'] or {}
+    separator = options.get('separator', '-')
+    configured = options.get('slugify')
+    if configured is None:
+        return slugify, separator
+    try:
+        kind, value = configured
+        if kind.startswith('name:'):
+            return import_object(kind[len('name:'):]), separator
+        if kind.startswith('object/apply:'):
+            arguments = value if isinstance(value, dict) else {'args': value}
+            factory = import_object(kind[len('object/apply:'):])
+            return factory(*arguments.get('args', []), **arguments.get('kwds', {})), separator
+    except (ImportError, AttributeError, TypeError, ValueError) as e:
+        logger.warning(f"Could not load the toc slugify of {mkdocs_config}: {e}; using the default")
+        return slugify, separator
+    logger.warning(f"Unsupported toc slugify in {mkdocs_config}; using the default")
+    return slugify, separator
+
+
+def unique_anchor(anchor: str, used: Set[str]) -> str:
+    """Anchor made unique within a page the way the toc extension does it (foo, foo_1, foo_2, ...)."""
+    while anchor in used or not anchor:
+        match = UNIQUE_SUFFIX_RE.match(anchor)
+        anchor = f"{match.group(1)}_{int(match.group(2)) + 1}" if match else f"{anchor}_1"
+    used.add(anchor)
+    return anchor
+
+
+@dataclass
+class Section:
+    """A heading and the lines up to the next heading; the part before the first heading has level 0."""
+    level: int
+    title: str
+    # toc anchor of the heading, '' for the part before the first heading
+    anchor: str
+    # Byte offsets of the section in the page's UTF-8 encoding, heading line included
+    start: int
+    end: int
+    # Body lines as plain text (fenced code, tables separators and HTML blocks left out)
+    text: str
+
+
+def split_sections(content: str, slug: SlugFunction = slugify, separator: str = '-') -> List[Section]:
+    """Split a page into sections at its headings; front matter is left out.
+
+    Anchors are made like the toc extension makes them with slug (see toc_slugify),
+    so they match the ids mkdocs gives the headings.
+    """
+    lines = content.split('\n')
+    offset = 0
+    index = 0
+    # Front matter is not rendered, so it belongs to no section
+    if lines and lines[0].strip() == '---':
+        closing = next((i for i in range(1, len(lines)) if lines[i].strip() == '---'), None)
+        if closing is not None:
+            index = closing + 1
+            offset = sum(len(line.encode('utf-8')) + 1 for line in lines[:index])
+
+    sections: List[Section] = []
+    used: Set[str] = set()
+    current: Optional[Section] = Section(0, '', '', offset, offset, '')
+    body: List[str] = []
+    fence = None
+
+    def close(end: int) -> None:
+        current.end = end
+        current.text = '\n'.join(body).strip()
+        if current.level or current.text:
+            sections.append(current)
+
+    for line in lines[index:]:
+        fence_match = FENCE_RE.match(line)
+        heading = HEADING_RE.match(line) if fence is None else None
+        if fence is not None:
+            if fence_match and fence_match.group(2)[0] == fence[0] and len(fence_match.group(2)) >= len(fence):
+                fence = None
+        elif fence_match:
+            fence = fence_match.group(2)
+        elif heading:
+            close(offset)
+            title = plain_text(heading.group(2))
+            level = len(heading.group(1).strip())
+            current = Section(level, title, unique_anchor(slug(title, separator), used), offset, offset, '')
+            body = []
+        elif not (HTML_LINE_RE.match(line) or TABLE_SEPARATOR_RE.match(line)):
+            text = BLOCKQUOTE_RE.sub(r'\2', line)
+            text = LIST_ITEM_RE.sub(r'\2', text)
+            body.append(plain_text(text.replace('|', ' ')))
+        offset += len(line.encode('utf-8')) + 1
+    # The last line has no newline after it
+    close(len(content.encode('utf-8')))
+    return sections
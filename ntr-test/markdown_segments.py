@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Markdown Segmentation for NTR Documentation
+Splits markdown into block-level segments so only prose is sent for translation
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+FENCE_RE = re.compile(r'^(\s*)(`{3,}|~{3,})')
+HEADING_RE = re.compile(r'^(\s{0,3}#{1,6}\s+)(.*?)(\s+#+\s*|\s*)$')
+HR_RE = re.compile(r'^\s{0,3}([-*_])(\s*\1){2,}\s*$')
+LIST_ITEM_RE = re.compile(r'^(\s*(?:[-*+]|\d+[.)])\s+(?:\[[ xX]\]\s+)?)(.*)$')
+BLOCKQUOTE_RE = re.compile(r'^(\s*(?:>\s?)+)(.*)$')
+ADMONITION_RE = re.compile(r'^(\s*(?:!!!|\?\?\?\+?)\s*[\w-]+(?:\s+[\w-]+)*\s*)(?:"(.*)")?(\s*)$')
+TABLE_SEPARATOR_RE = re.compile(r'^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$')
+TABLE_ROW_RE = re.compile(r'^\s*\|')
+HTML_LINE_RE = re.compile(r'^\s*<[^>]+>\s*$')
+LETTER_RE = re.compile(r'[^\W\d_]')
+
+
+@dataclass
+class Segment:
+    """One block of a markdown document.
+
+    ``prefix`` and ``suffix`` hold markup that is kept verbatim (heading hashes,
+    list markers, indentation); only ``text`` is sent for translation.
+    """
+    kind: str
+    text: str
+    prefix: str = ''
+    suffix: str = ''
+    translatable: bool = True
+
+    def render(self, text: str = None) -> str:
+        """Render the segment, optionally with replacement text."""
+        return self.prefix + (self.text if text is None else text) + self.suffix
+
+
+def _has_words(text: str) -> bool:
+    return bool(LETTER_RE.search(text))
+
+
+def _starts_block(line: str) -> bool:
+    """Whether a line starts a new block rather than continuing a paragraph or list item."""
+    return bool(
+        FENCE_RE.match(line) or HEADING_RE.match(line) or HR_RE.match(line)
+        or LIST_ITEM_RE.match(line) or BLOCKQUOTE_RE.match(line)
+        or ADMONITION_RE.match(line) or TABLE_ROW_RE.match(line)
+        or HTML_LINE_RE.match(line)
+    )
+
+
+def split_segments(content: str) -> List[Segment]:
+    """Split markdown content into segments.
+
+    Joining the rendered segments with newlines reproduces ``content`` exactly.
+    """
+    lines = content.split('\n')
+    segments: List[Segment] = []
+    i = 0
+
+    while i < len(lines):
+        line = lines[i]
+
+        fence = FENCE_RE.match(line)
+        if fence:
+            marker = fence.group(2)
+            block = [line]
+            i += 1
+            while i < len(lines):
+                block.append(lines[i])
+                closing = lines[i].strip()
+                i += 1
+                if closing.startswith(marker[0] * len(marker)) and not closing.strip(marker[0]):
+                    break
+            segments.append(Segment('code', '\n'.join(block), translatable=False))
+            continue
+
+        if line.strip().startswith('<!--'):
+            block = [line]
+            while '-->' not in lines[i] and i + 1 < len(lines):
+                i += 1
+                block.append(lines[i])
+            i += 1
+            segments.append(Segment('html', '\n'.join(block), translatable=False))
+            continue
+
+        i += 1
+
+        if not line.strip():
+            segments.append(Segment('blank', line, translatable=False))
+            continue
+
+        if HR_RE.match(line) or TABLE_SEPARATOR_RE.match(line):
+            segments.append(Segment('rule', line, translatable=False))
+            continue
+
+        if HTML_LINE_RE.match(line):
+            segments.append(Segment('html', line, translatable=False))
+            continue
+
+        match = HEADING_RE.match(line)
+        if match:
+            prefix, text, suffix = match.groups()
+            segments.append(Segment('heading', text, prefix, suffix, _has_words(text)))
+            continue
+
+        match = ADMONITION_RE.match(line)
+        if match:
+            prefix, title, trailing = match.groups()
+            if title is None:
+                segments.append(Segment('admonition', line, translatable=False))
+            else:
+                segments.append(Segment('admonition', title, prefix + '"', '"' + trailing, _has_words(title)))
+            continue
+
+        if TABLE_ROW_RE.match(line):
+            segments.append(Segment('table', line, translatable=_has_words(line)))
+            continue
+
+        match = BLOCKQUOTE_RE.match(line)
+        if match:
+            prefix, text = match.groups()
+            segments.append(Segment('quote', text, prefix, translatable=_has_words(text)))
+            continue
+
+        match = LIST_ITEM_RE.match(line)
+        if match:
+            kind, (prefix, text) = 'list', match.groups()
+        else:
+            stripped = line.lstrip()
+            kind, prefix, text = 'paragraph', line[:len(line) - len(stripped)], stripped
+
+        # Lazy continuation lines belong to the same paragraph or list item
+        while i < len(lines) and lines[i].strip() and not _starts_block(lines[i]):
+            text += '\n' + lines[i]
+            i += 1
+        segments.append(Segment(kind, text, prefix, translatable=_has_words(text)))
+
+    return segments
+
+
+def split_front_matter(content: str) -> Tuple[str, Dict[str, str]]:
+    """Split a markdown file into its content and its front matter metadata."""
+    lines = content.split('\n')
+    metadata = {}
+    content_lines = []
+    in_frontmatter = False
+
+    for line in lines:
+        if line.strip() == '---':
+            in_frontmatter = not in_frontmatter
+            continue
+
+        if in_frontmatter:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                metadata[key.strip()] = value.strip()
+        else:
+            content_lines.append(line)
+
+    return '\n'.join(content_lines), metadata
+
+
+def render_segments(segments: List[Segment], replacements: Dict[int, str] = None) -> str:
+    """Render segments back to markdown, replacing the text of the given segment indexes."""
+    replacements = replacements or {}
+    return '\n'.join(segment.render(replacements.get(index)) for index, segment in enumerate(segments))
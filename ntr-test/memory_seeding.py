@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Translation Memory Seeding for NTR Documentation
+Aligns existing parallel pages segment by segment so reviewed translations warm the memory offline
+"""
+
+import re
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from markdown_segments import Segment
+
+# Alignment costs: leaving a segment unaligned, and pairing segments of different structure
+SKIP_COST = 3.0
+STRUCTURE_MISMATCH_COST = 4.0
+ANCHOR_MISMATCH_COST = 1.5
+# Spread of log(target length / source length) around the document-wide ratio,
+# widened for short segments where a word or two changes the ratio a lot
+LENGTH_SIGMA = 0.35
+SHORT_SEGMENT_CHARS = 20
+
+DEFAULT_MIN_CONFIDENCE = 0.6
+
+NUMBER_RE = re.compile(r'\d+(?:[.,:]\d+)*')
+INLINE_ANCHOR_RE = re.compile(r'`[^`]+`|\]\([^)]*\)|https?://\S+')
+LIST_MARKER_RE = re.compile(r'^\s*(?:([-*+])|\d+[.)])')
+
+
+@dataclass
+class Alignment:
+    """A source segment paired with its counterpart in the translated page."""
+    source: Optional[Segment]
+    target: Optional[Segment]
+    confidence: float
+    reason: str = ''
+
+
+def structure(segment: Segment) -> Tuple:
+    """Structural signature: segment kind plus heading level, list type and indentation."""
+    if segment.kind == 'heading':
+        return ('heading', segment.prefix.strip())
+    if segment.kind == 'list':
+        marker = LIST_MARKER_RE.match(segment.prefix)
+        ordered = bool(marker and not marker.group(1))
+        return ('list', ordered, len(segment.prefix) - len(segment.prefix.lstrip()))
+    return (segment.kind,)
+
+
+def anchors(text: str) -> List[str]:
+    """Parts that translation leaves unchanged: numbers, inline code and link targets."""
+    return sorted(NUMBER_RE.findall(text) + INLINE_ANCHOR_RE.findall(text))
+
+
+def length_score(source: str, target: str, mean_ratio: float) -> float:
+    """How far the length ratio of a pair is from the document's, in standard deviations."""
+    ratio = math.log((len(target) + 1) / (len(source) + 1))
+    sigma = LENGTH_SIGMA * (1 + SHORT_SEGMENT_CHARS / (min(len(source), len(target)) + 1))
+    return abs(ratio - mean_ratio) / sigma
+
+
+def pair_cost(source: Segment, target: Segment, mean_ratio: float) -> Tuple[float, List[str]]:
+    """Cost of pairing two segments and the reasons it is not a perfect match."""
+    cost, reasons = 0.0, []
+    if structure(source) != structure(target):
+        cost += STRUCTURE_MISMATCH_COST
+        reasons.append('structure differs')
+    if anchors(source.text) != anchors(target.text):
+        cost += ANCHOR_MISMATCH_COST
+        reasons.append('numbers, code or links differ')
+    z = length_score(source.text, target.text, mean_ratio)
+    cost += z * z / 2
+    if z > 2:
+        reasons.append(f'length ratio off by {z:.1f} sigma')
+    return cost, reasons
+
+
+def align_segments(source: List[Segment], target: List[Segment]) -> List[Alignment]:
+    """Align the translatable segments of two versions of a page.
+
+    A dynamic-programming alignment (in the spirit of Gale-Church) over the segment
+    sequences allows segments to be added or dropped on either side; pairs are scored by
+    matching structure (heading levels, list positions), matching anchors (numbers, code,
+    links) and a plausible length ratio. Confidence is exp(-cost) of the pair.
+    """
+    source = [segment for segment in source if segment.translatable]
+    target = [segment for segment in target if segment.translatable]
+    n, m = len(source), len(target)
+    total_source = sum(len(segment.text) for segment in source)
+    total_target = sum(len(segment.text) for segment in target)
+    mean_ratio = math.log((total_target + 1) / (total_source + 1))
+
+    # costs[i][j]: cheapest alignment of source[:i] with target[:j]; moves: 0 pair, 1 skip source, 2 skip target
+    costs = [[math.inf] * (m + 1) for _ in range(n + 1)]
+    moves = [[0] * (m + 1) for _ in range(n + 1)]
+    costs[0][0] = 0.0
+    for i in range(n + 1):
+        for j in range(m + 1):
+            if i and j:
+                cost = costs[i - 1][j - 1] + pair_cost(source[i - 1], target[j - 1], mean_ratio)[0]
+                if cost < costs[i][j]:
+                    costs[i][j], moves[i][j] = cost, 0
+            if i and costs[i - 1][j] + SKIP_COST < costs[i][j]:
+                costs[i][j], moves[i][j] = costs[i - 1][j] + SKIP_COST, 1
+            if j and costs[i][j - 1] + SKIP_COST < costs[i][j]:
+                costs[i][j], moves[i][j] = costs[i][j - 1] + SKIP_COST, 2
+
+    alignments: List[Alignment] = []
+    i, j = n, m
+    while i or j:
+        move = moves[i][j]
+        if move == 0:
+            cost, reasons = pair_cost(source[i - 1], target[j - 1], mean_ratio)
+            alignments.append(Alignment(source[i - 1], target[j - 1], math.exp(-cost), ', '.join(reasons)))
+            i, j = i - 1, j - 1
+        elif move == 1:
+            alignments.append(Alignment(source[i - 1], None, 0.0, 'no counterpart in target'))
+            i -= 1
+        else:
+            alignments.append(Alignment(None, target[j - 1], 0.0, 'no counterpart in source'))
+            j -= 1
+    alignments.reverse()
+    return alignments
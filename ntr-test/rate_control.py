@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Rate and Concurrency Control for NTR Documentation translation
+Token-bucket rate limits plus AIMD-adjusted in-flight requests, shared by all provider calls
+"""
+
+import time
+import random
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from translation_errors import ProviderError
+from translation_providers import ProviderCapabilities
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second; unlimited when rate is None."""
+
+    def __init__(self, rate: Optional[float], capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate or 0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1) -> None:
+        """Wait until amount tokens are available and take them."""
+        if not self.rate:
+            return
+        # A single request larger than the bucket may still pass once the bucket is full
+        amount = min(amount, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Limits in-flight requests, adjusting the limit with AIMD.
+
+    The limit grows by about one per round trip while requests succeed at normal
+    latency, and is cut multiplicatively on throttling, server errors or a latency
+    spike. Only one cut is made per window: requests started before the last cut
+    cannot trigger another.
+    """
+
+    def __init__(self, initial: int = 2, minimum: int = 1, maximum: int = 16,
+                 decrease_factor: float = 0.5, latency_tolerance: float = 2.0):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self.generation = 0
+        self.latency_ewma: Optional[float] = None
+        self._waiters: List[asyncio.Future] = []
+
+    async def acquire(self) -> int:
+        """Wait for a free slot; returns the generation the request started in."""
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                self._waiters.remove(waiter)
+        self.in_flight += 1
+        return self.generation
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _decrease(self, generation: int, factor: float) -> None:
+        if generation != self.generation:
+            return
+        self.limit = max(self.minimum, self.limit * factor)
+        self.generation += 1
+        logger.debug(f"Concurrency limit decreased to {self.limit:.2f}")
+
+    def on_success(self, generation: int, latency: float) -> None:
+        """Record a successful request and its latency."""
+        baseline = self.latency_ewma
+        self.latency_ewma = latency if baseline is None else 0.8 * baseline + 0.2 * latency
+        if baseline is not None and latency > baseline * self.latency_tolerance:
+            # Queueing at the provider: back off gently before it starts rejecting
+            self._decrease(generation, 0.9)
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._wake()
+
+    def on_overload(self, generation: int) -> None:
+        """Record a throttled (429) or failed (5xx) request."""
+        self._decrease(generation, self.decrease_factor)
+
+
+class RateController:
+    """Shared gate for every provider call: rate limits, adaptive concurrency and retries."""
+
+    def __init__(self, requests_per_second: Optional[float] = None,
+                 characters_per_second: Optional[float] = None,
+                 initial_concurrency: int = 2, max_concurrency: int = 8,
+                 max_retries: int = 5, backoff_seconds: float = 1.0):
+        self.request_bucket = TokenBucket(requests_per_second)
+        self.character_bucket = TokenBucket(characters_per_second)
+        self.limiter = AdaptiveConcurrencyLimiter(initial_concurrency, 1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.paused_until = 0.0
+        self.throttled = 0
+        self.retries = 0
+
+    @classmethod
+    def from_config(cls, capabilities: ProviderCapabilities, settings: Dict) -> 'RateController':
+        """Create a controller from the provider's declared limits and the rate_control settings."""
+        return cls(
+            requests_per_second=settings.get('requests_per_second', capabilities.requests_per_second),
+            characters_per_second=settings.get('characters_per_second', capabilities.characters_per_second),
+            initial_concurrency=settings.get('initial_concurrency', 2),
+            max_concurrency=settings.get('max_concurrency', 8),
+            max_retries=settings.get('max_retries', 5),
+            backoff_seconds=settings.get('backoff_seconds', 1.0),
+        )
+
+    async def call(self, operation: Callable[[], Awaitable[T]], characters: int = 0) -> T:
+        """Run a provider operation under the shared limits, retrying retryable failures."""
+        attempt = 0
+        while True:
+            pause = self.paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            await self.request_bucket.acquire(1)
+            await self.character_bucket.acquire(characters)
+
+            generation = await self.limiter.acquire()
+            started = time.monotonic()
+            try:
+                result = await operation()
+            except ProviderError as e:
+                self.limiter.release()
+                if e.status_code == 429 or (e.status_code or 0) >= 500:
+                    self.throttled += 1
+                    self.limiter.on_overload(generation)
+                if not e.retryable or attempt >= self.max_retries:
+                    raise
+                delay = e.retry_after or self.backoff_seconds * (2 ** attempt) * random.uniform(0.5, 1.0)
+                if e.status_code == 429:
+                    # Throttling applies to everyone, so pause all callers rather than just this one
+                    self.paused_until = max(self.paused_until, time.monotonic() + delay)
+                else:
+                    await asyncio.sleep(delay)
+                attempt += 1
+                self.retries += 1
+                logger.warning(f"Provider call failed ({e}); retry {attempt}/{self.max_retries}")
+                continue
+            except BaseException:
+                self.limiter.release()
+                raise
+
+            self.limiter.release()
+            self.limiter.on_success(generation, time.monotonic() - started)
+            return result
+
+    def snapshot(self) -> Dict:
+        """Current limits and counters, for the run metrics."""
+        return {
+            'concurrency_limit': round(self.limiter.limit, 2),
+            'in_flight': self.limiter.in_flight,
+            'requests_per_second': self.request_bucket.rate,
+            'characters_per_second': self.character_bucket.rate,
+            'latency_ewma_ms': round(self.limiter.latency_ewma * 1000, 1) if self.limiter.latency_ewma else None,
+            'throttled': self.throttled,
+            'retries': self.retries,
+        }
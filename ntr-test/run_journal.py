@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Run Journal for NTR Documentation
+Append-only record of planned and completed translation jobs so interrupted runs can resume
+"""
+
+import os
+import json
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL_PATH = ".translation-journal.jsonl"
+
+
+@dataclass
+class JournalState:
+    """What an earlier run planned and finished, rebuilt by replaying its journal."""
+    run: Dict = field(default_factory=dict)
+    planned: List[Tuple[str, str, str, str]] = field(default_factory=list)
+    # (source, target) → {'source_hash': ..., 'base': ...} of the source the job was completed for
+    completed: Dict[Tuple[str, str], Dict] = field(default_factory=dict)
+    segments: List[Tuple[str, str, str, str]] = field(default_factory=list)
+    finished: bool = False
+
+
+class RunJournal:
+    """JSON-lines journal, fsynced after every record so a crash loses at most the record being written.
+
+    Records: ``run`` (mode and parameters), ``plan`` and ``done`` per (source, target) job,
+    ``segments`` per translated batch and ``finish`` once every job succeeded. A ``done``
+    record holds the hash of the source it was completed for and the base commit it was
+    compared with, so a resumed run can tell whether the page changed since.
+    """
+
+    def __init__(self, path: str = DEFAULT_JOURNAL_PATH):
+        self.path = path
+        self.file = None
+
+    def start(self, mode: str, **params) -> None:
+        """Begin a new run, discarding the journal of any previous one."""
+        self.close()
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self.append({'event': 'run', 'mode': mode, 'started_at': time.time(), **params})
+
+    def reopen(self) -> None:
+        """Continue appending to the existing journal of an interrupted run.
+
+        A record torn by the crash is cut off first, so new records start on a line of their own.
+        """
+        self.close()
+        if os.path.exists(self.path):
+            with open(self.path, 'r+b') as f:
+                content = f.read()
+                end = content.rfind(b'\n') + 1
+                if end < len(content):
+                    logger.warning(f"Dropping incomplete last record of {self.path}")
+                    f.truncate(end)
+        self.file = open(self.path, 'a', encoding='utf-8')
+        self.append({'event': 'resume', 'started_at': time.time()})
+
+    def load(self) -> Optional[JournalState]:
+        """Replay the journal; None if there is none. Torn or corrupt lines are skipped."""
+        if not os.path.exists(self.path):
+            return None
+        state = JournalState()
+        planned: Set[Tuple[str, str]] = set()
+        skipped = 0
+        # A record cut off by a crash may end inside a multi-byte character
+        with open(self.path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    skipped += 1
+                    continue
+                event = record.get('event')
+                if event == 'run':
+                    state.run = record
+                elif event == 'plan':
+                    key = (record['source'], record['target'])
+                    if key not in planned:
+                        planned.add(key)
+                        state.planned.append((record['source'], record['target'],
+                                              record['source_lang'], record['target_lang']))
+                elif event == 'done':
+                    state.completed[(record['source'], record['target'])] = {
+                        'source_hash': record.get('source_hash'), 'base': record.get('base')}
+                elif event == 'segments':
+                    state.segments.extend((record['source_lang'], record['target_lang'], source, target)
+                                          for source, target in record['pairs'])
+                elif event == 'finish':
+                    state.finished = True
+        if skipped:
+            logger.warning(f"Ignored {skipped} incomplete records in {self.path}")
+        return state
+
+    def plan(self, source: str, target: str, source_lang: str, target_lang: str) -> None:
+        self.append({'event': 'plan', 'source': source, 'target': target,
+                     'source_lang': source_lang, 'target_lang': target_lang})
+
+    def complete(self, source: str, target: str, source_hash: str, base: Optional[str] = None) -> None:
+        self.append({'event': 'done', 'source': source, 'target': target,
+                     'source_hash': source_hash, 'base': base})
+
+    def record_segments(self, source_lang: str, target_lang: str, pairs: Iterable[Tuple[str, str]]) -> None:
+        """Record translated (source_text, target_text) segments of a completed batch."""
+        self.append({'event': 'segments', 'source_lang': source_lang, 'target_lang': target_lang,
+                     'pairs': [list(pair) for pair in pairs]})
+
+    def finish(self) -> None:
+        self.append({'event': 'finish', 'finished_at': time.time()})
+        self.close()
+
+    def append(self, record: Dict) -> None:
+        if self.file is None:
+            return
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
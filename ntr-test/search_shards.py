@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Search Index Shards for NTR Documentation
+Builds one pre-stemmed, pre-serialized search index per locale, so the help site
+downloads and searches only the pages of the locale being read
+"""
+
+import re
+import json
+import math
+import unicodedata
+from pathlib import Path
+from typing import Dict, List
+
+from markdown_sections import SlugFunction, slugify, split_sections
+
+SHARD_VERSION = 1
+SHARD_PATH = 'search/shard.json'
+# Words of a heading count this many times a word of the text below it
+TITLE_WEIGHT = 10
+SNIPPET_LENGTH = 100
+WORD_RE = re.compile(r'[^\W_]+')
+
+# Suffix stripping rules per language. Each step removes the longest matching suffix
+# (only suffixes inside R1 when the step is limited to it), replacing it with the
+# given text if the letter before it is one of 'after' (any letter when empty).
+# The client applies the same rules to queries, so they are shipped inside the shard.
+LANGUAGES = {
+    # Snowball Swedish stemmer
+    'sv': {
+        'vowels': 'aeiouyäåö',
+        'r1_min': 3,
+        'steps': [
+            {'region': True, 'rules': [[suffix, '', ''] for suffix in (
+                'a arna erna heterna orna ad e ade ande arne are aste en anden aren heten ern ar er heter or '
+                'as arnas ernas ornas es ases andes ens arens hetens erns at andet het ast').split()]
+                + [['s', '', 'bcdfghjklmnoprtvy']]},
+            {'region': True, 'rules': [[suffix, suffix[0], ''] for suffix in 'dd gd nn dt gt kt tt'.split()]},
+            {'region': True, 'rules': [['lig', '', ''], ['ig', '', ''], ['els', '', ''],
+                                       ['löst', 'lös', ''], ['fullt', 'full', '']]},
+        ],
+        'stopwords': (
+            'och det att i en jag hon som han på den med var sig för så till är men ett om hade de av icke '
+            'mig du henne då sin nu har inte hans honom skulle hennes där min man ej vid kunde något från '
+            'ut när efter upp vi dem vara vad över än dig kan sina här ha mot alla under någon eller allt '
+            'mycket sedan ju denna själv detta åt utan varit hur ingen mitt ni bli blev oss din dessa några '
+            'deras blir mina samma vilken er sådan vår blivit dess inom mellan sådant varför varje vilka '
+            'ditt vem vilket sitta sådana vart dina vars vårt våra ert era vilkas').split(),
+    },
+    # Light English stemmer: plurals, -ed/-ing and common derivational suffixes
+    'en': {
+        'vowels': 'aeiouy',
+        'r1_min': 0,
+        'steps': [
+            {'region': False, 'rules': [['sses', 'ss', ''], ['ies', 'y', ''], ['ss', 'ss', ''], ['us', 'us', ''],
+                                        ['s', '', 'abcdefghjklmnopqrtvwxyz']]},
+            {'region': True, 'rules': [['eedly', 'ee', ''], ['eed', 'ee', ''], ['ingly', '', ''], ['edly', '', ''],
+                                       ['ing', '', ''], ['ed', '', ''], ['ly', '', '']]},
+            {'region': True, 'rules': [['ational', 'ate', ''], ['tional', 'tion', ''], ['ization', 'ize', ''],
+                                       ['isation', 'ise', ''], ['ation', 'ate', ''], ['ousness', 'ous', ''],
+                                       ['iveness', 'ive', ''], ['fulness', 'ful', ''], ['ness', '', ''],
+                                       ['ment', '', ''], ['able', '', ''], ['ible', '', '']]},
+            {'region': True, 'rules': [['e', '', '']]},
+        ],
+        'stopwords': (
+            'a an and are as at be but by can do does for from has have how i if in into is it its me my no '
+            'not of on or our so such that the their then there these they this to was we what when where '
+            'which who why will with you your').split(),
+    },
+}
+
+
+class Stemmer:
+    """Rule-driven suffix stripper for one language; languages without rules are left unstemmed."""
+
+    def __init__(self, language: str):
+        self.language = language
+        self.profile = LANGUAGES.get(language, {'vowels': '', 'r1_min': 0, 'steps': [], 'stopwords': []})
+        self.stopwords = set(self.profile['stopwords'])
+
+    def region_start(self, word: str) -> int:
+        """Start of R1: after the first non-vowel that follows a vowel, at least r1_min letters in."""
+        vowels = self.profile['vowels']
+        for i in range(1, len(word)):
+            if word[i] not in vowels and word[i - 1] in vowels:
+                return max(i + 1, self.profile['r1_min'])
+        return len(word)
+
+    def stem(self, word: str) -> str:
+        r1 = self.region_start(word)
+        for step in self.profile['steps']:
+            matches = [rule for rule in step['rules']
+                       if word.endswith(rule[0]) and (not step['region'] or len(word) - len(rule[0]) >= r1)]
+            if not matches:
+                continue
+            suffix, replacement, after = max(matches, key=lambda rule: len(rule[0]))
+            stem = word[:len(word) - len(suffix)]
+            if after and not (stem and stem[-1] in after):
+                continue
+            word = stem + replacement
+        return word
+
+    def terms(self, text: str) -> List[str]:
+        """Stems of the words of a text that are not stopwords."""
+        words = WORD_RE.findall(unicodedata.normalize('NFC', text).lower())
+        return [self.stem(word) for word in words if len(word) > 1 and word not in self.stopwords]
+
+    def settings(self) -> Dict:
+        """Stemmer rules and stopwords as shipped in a shard."""
+        return {'vowels': self.profile['vowels'], 'r1_min': self.profile['r1_min'],
+                'steps': self.profile['steps'], 'stopwords': sorted(self.stopwords)}
+
+
+def page_location(relative: str) -> str:
+    """URL of a page relative to its site root (use_directory_urls), e.g. en/overview.md → en/overview/."""
+    path = Path(relative)
+    if path.stem == 'index':
+        return '' if str(path.parent) == '.' else f"{path.parent.as_posix()}/"
+    return f"{path.with_suffix('').as_posix()}/"
+
+
+def build_shard(pages: Dict[str, str], language: str, slug: SlugFunction = slugify, separator: str = '-') -> Dict:
+    """Search index of one locale site from its pages (path relative to the site → markdown).
+
+    Every heading section is a document: [page number, anchor, heading, text snippet].
+    terms maps each stem to a flat list of document number, weight pairs; weights are
+    term counts with heading words boosted.
+    """
+    stemmer = Stemmer(language)
+    page_list: List[List[str]] = []
+    docs: List[List] = []
+    terms: Dict[str, List[int]] = {}
+    for relative, content in sorted(pages.items()):
+        sections = split_sections(content, slug, separator)
+        page_title = next((section.title for section in sections if section.title), '')
+        page_number = len(page_list)
+        page_list.append([page_location(relative), page_title])
+        for section in sections:
+            counts: Dict[str, int] = {}
+            for term in stemmer.terms(section.title):
+                counts[term] = counts.get(term, 0) + TITLE_WEIGHT
+            for term in stemmer.terms(section.text):
+                counts[term] = counts.get(term, 0) + 1
+            if not counts:
+                continue
+            snippet = ' '.join(section.text.split())
+            if len(snippet) > SNIPPET_LENGTH:
+                snippet = snippet[:SNIPPET_LENGTH].rsplit(' ', 1)[0] + ' …'
+            number = len(docs)
+            # The page's first heading is the page itself
+            anchor = section.anchor if section.level > 1 else ''
+            docs.append([page_number, anchor, section.title if anchor else '', snippet])
+            for term, count in sorted(counts.items()):
+                terms.setdefault(term, []).extend([number, count])
+    return {
+        'version': SHARD_VERSION,
+        'lang': language,
+        'stemmer': stemmer.settings(),
+        'pages': page_list,
+        'docs': docs,
+        # Inverse document frequencies are derived by the client from the posting list lengths
+        'terms': dict(sorted(terms.items())),
+    }
+
+
+def serialize_shard(shard: Dict) -> str:
+    """Compact JSON of a shard, identical for identical input."""
+    return json.dumps(shard, ensure_ascii=False, separators=(',', ':'))
+
+
+def search(shard: Dict, query: str, limit: int = 10) -> List[str]:
+    """Locations of the documents of a shard matching a query, best first.
+
+    Ranks like the site's client (most query words matched, then weight times inverse
+    document frequency), without the client's completion of the last word.
+    """
+    stemmer = Stemmer(shard['lang'])
+    terms = stemmer.terms(query)
+    total = max(1, len(shard['docs']))
+    scores: Dict[int, List[float]] = {}
+    for term in terms:
+        postings = shard['terms'].get(term, [])
+        idf = math.log(1 + total / max(1, len(postings) // 2))
+        for i in range(0, len(postings), 2):
+            score = scores.setdefault(postings[i], [0, 0.0])
+            score[0] += 1
+            score[1] += postings[i + 1] * idf
+    ranked = sorted(scores.items(), key=lambda item: (-item[1][0], -item[1][1], item[0]))
+    locations = []
+    for number, _ in ranked[:limit]:
+        page, anchor = shard['docs'][number][:2]
+        locations.append(shard['pages'][page][0] + (f"#{anchor}" if anchor else ''))
+    return locations
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Partitioned MkDocs Build for NTR Documentation
+Builds one mkdocs site per locale (plus the shared root pages), rebuilding only partitions
+whose content changed, and merges the outputs into the deploy tree
+"""
+
+import os
+import re
+import sys
+import json
+import posixpath
+import shutil
+import hashlib
+import logging
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from file_utils import atomic_write_text
+from context_map import CONTEXT_MAP_FILE, ContextMapBuilder
+from markdown_sections import toc_slugify
+from markdown_segments import FENCE_RE
+from search_shards import SHARD_PATH, SHARD_VERSION, build_shard, page_location, serialize_shard
+
+logger = logging.getLogger(__name__)
+
+# Shared assets every partition needs, relative to the docs directory
+ASSET_DIRS = ['stylesheets', 'javascripts']
+ROOT_PARTITION = '_root'
+# Inline links [text](page.md#anchor "title") and reference definitions [id]: page.md
+LINK_RE = re.compile(r'(\]\(\s*<?|^\s{0,3}\[[^\]]+\]:\s*<?)([^\s()<>#:]+\.md)(#[^\s()<>]*)?(?=[\s)>]|$)')
+ARTICLE_RE = re.compile(r'<article\b.*?</article>', re.DOTALL)
+HREF_RE = re.compile(r'href="([^"]*)"')
+
+
+@dataclass
+class Partition:
+    """One independently built part of the site."""
+    name: str
+    # Output location inside the deploy tree ('' for the site root)
+    prefix: str
+    # Source files, keyed by their path relative to the partition's docs directory
+    files: Dict[str, Path] = field(default_factory=dict)
+    config: Dict = field(default_factory=dict)
+    content_hash: str = ''
+    # Language of the pages, for the stemmer and stopwords of the search shard
+    language: str = 'en'
+
+
+class SiteBuilder:
+    def __init__(self, config_path: str = "help-config.json", mkdocs_config: str = "mkdocs.yml",
+                 docs_dir: str = "docs", site_dir: str = "site", build_dir: str = ".site-build"):
+        self.config_path = config_path
+        self.mkdocs_config = Path(mkdocs_config)
+        self.docs_dir = Path(docs_dir)
+        self.site_dir = Path(site_dir)
+        self.build_dir = Path(build_dir)
+        self.manifest_path = self.build_dir / "build-manifest.json"
+        with open(config_path, 'r', encoding='utf-8') as f:
+            self.config = json.load(f)
+        self.base_settings = self.read_base_settings()
+        # Heading anchors are made like the toc extension configured in mkdocs.yml makes them
+        self.slug, self.slug_separator = toc_slugify(str(self.mkdocs_config))
+        # Page path in the docs directory → (partition, URL in the deploy tree), set by plan_partitions
+        self.page_urls: Dict[str, Tuple[str, str]] = {}
+
+    def read_base_settings(self) -> Dict[str, str]:
+        """Top-level scalar settings of mkdocs.yml needed to derive per-locale URLs."""
+        settings = {}
+        with open(self.mkdocs_config, 'r', encoding='utf-8') as f:
+            for line in f:
+                if ':' in line and not line[0].isspace() and not line.startswith('#'):
+                    key, value = line.split(':', 1)
+                    settings[key.strip()] = value.strip().strip('"\'')
+        return settings
+
+    def locales(self) -> Dict[str, Dict]:
+        """Docs folder → locale config for every locale of every app in help-config.json."""
+        folders = {}
+        for app in self.config.get('apps', {}).values():
+            for locale, locale_config in app.get('locales', {}).items():
+                for file_path in locale_config.get('file_paths', {}).values():
+                    folder = Path(file_path).parent.name
+                    folders.setdefault(folder, {'locale': locale, **locale_config})
+                    break
+        return folders
+
+    def locale_nav(self, folder: str, file_paths: Dict[str, str]) -> List[Dict[str, str]]:
+        """Navigation of a locale site in help-config.json section order, with localized titles."""
+        nav = []
+        for section in self.config.get('sections', []):
+            file_path = file_paths.get(section['id'])
+            if not file_path:
+                continue
+            titles = section.get('title', {})
+            title = titles.get(folder) or titles.get('en') or section['id']
+            nav.append({title: Path(file_path).name})
+        return nav
+
+    def plan_partitions(self) -> List[Partition]:
+        """Work out the files and mkdocs config of every partition."""
+        site_url = self.base_settings.get('site_url', '').rstrip('/')
+        edit_uri = self.base_settings.get('edit_uri', '').rstrip('/')
+        # Every partition config sits one level below the build directory
+        inherit = os.path.relpath(self.mkdocs_config.resolve(), (self.build_dir / ROOT_PARTITION).resolve())
+        assets = {
+            str(path.relative_to(self.docs_dir)): path
+            for asset_dir in ASSET_DIRS if (self.docs_dir / asset_dir).is_dir()
+            for path in sorted((self.docs_dir / asset_dir).rglob('*')) if path.is_file()
+        }
+
+        partitions = []
+        locales = self.locales()
+        # Root navigation links to the first page of every locale site
+        locale_links = []
+        for folder, locale_config in sorted(locales.items()):
+            partition = Partition(folder, folder, dict(assets), language=folder)
+            file_paths = {}
+            for section, file_path in locale_config.get('file_paths', {}).items():
+                path = Path(file_path)
+                if path.exists():
+                    partition.files[path.name] = path
+                    file_paths[section] = file_path
+                else:
+                    logger.warning(f"{file_path} not found, leaving it out of the {folder} site")
+            partition.config = {
+                'INHERIT': inherit,
+                'site_name': self.base_settings.get('site_name', ''),
+                'site_url': f"{site_url}/{folder}/" if site_url else '',
+                'edit_uri': f"{edit_uri}/{self.docs_dir.name}/{folder}/" if edit_uri else '',
+                'docs_dir': 'docs',
+                'site_dir': 'site',
+                'theme': {'name': 'material', 'language': folder},
+                # Search runs on the pre-built shard of the partition, not the theme's lunr index
+                'plugins': [],
+                'nav': self.locale_nav(folder, file_paths),
+            }
+            partitions.append(partition)
+            if partition.config['nav']:
+                first_page = Path(next(iter(partition.config['nav'][0].values()))).stem
+                locale_links.append({locale_config.get('name', folder): f"{folder}/{first_page}/"})
+
+        # Everything outside the locale folders (home page, guidelines, tools) forms the root site
+        root = Partition(ROOT_PARTITION, '', dict(assets))
+        for path in sorted(self.docs_dir.rglob('*')):
+            relative = path.relative_to(self.docs_dir)
+            if path.is_file() and relative.parts[0] not in locales:
+                root.files[str(relative)] = path
+        root.config = {
+            'INHERIT': inherit,
+            'edit_uri': f"{edit_uri}/{self.docs_dir.name}/" if edit_uri else '',
+            'docs_dir': 'docs',
+            'site_dir': 'site',
+            'plugins': [],
+            'nav': [{'Home': 'index.md'}] + locale_links + [entry for entry in self.root_nav() if all(target in root.files for target in entry.values())],
+        }
+        partitions.append(root)
+
+        self.page_urls = {
+            self.docs_path(path): (partition.name, posixpath.join(partition.prefix, self.page_url(relative)))
+            for partition in partitions for relative, path in partition.files.items() if relative.endswith('.md')
+        }
+        for partition in partitions:
+            partition.content_hash = self.hash_partition(partition)
+        return partitions
+
+    def docs_path(self, path: Path) -> str:
+        return Path(os.path.relpath(path, self.docs_dir)).as_posix()
+
+    def page_url(self, relative: str) -> str:
+        """URL of a page relative to the root of the site it is built in, as mkdocs makes it."""
+        if self.base_settings.get('use_directory_urls', 'true').lower() == 'false':
+            return Path(relative).with_suffix('.html').as_posix()
+        return page_location(relative)
+
+    def staged_content(self, partition: Partition, relative: str, path: Path) -> bytes:
+        """A file as it is built: pages get their links into other partitions turned into URLs.
+
+        mkdocs only resolves links to pages of the site it is building, so without this
+        the home page's link to en/overview.md would be left pointing at the markdown file.
+        """
+        if not relative.endswith('.md'):
+            return path.read_bytes()
+        source = self.docs_path(path)
+        own_url = self.page_urls[source][1]
+        base = own_url.rstrip('/') if own_url.endswith('/') else posixpath.dirname(own_url)
+
+        def rewrite(match: re.Match) -> str:
+            target = posixpath.normpath(posixpath.join(posixpath.dirname(source), match.group(2)))
+            found = self.page_urls.get(target)
+            if not found or found[0] == partition.name:
+                return match.group(0)
+            href = posixpath.relpath(found[1].rstrip('/') or '.', base or '.')
+            if found[1].endswith('/') or not found[1]:
+                href = './' if href == '.' else f"{href}/"
+            return f"{match.group(1)}{href}{match.group(3) or ''}"
+
+        lines = path.read_text(encoding='utf-8').split('\n')
+        fence = None
+        for index, line in enumerate(lines):
+            fence_match = FENCE_RE.match(line)
+            if fence is not None:
+                if fence_match and fence_match.group(2)[0] == fence[0] and len(fence_match.group(2)) >= len(fence):
+                    fence = None
+            elif fence_match:
+                fence = fence_match.group(2)
+            else:
+                lines[index] = LINK_RE.sub(rewrite, line)
+        return '\n'.join(lines).encode('utf-8')
+
+    def root_nav(self) -> List[Dict[str, str]]:
+        """Root pages other than the home page, titled from their first heading."""
+        nav = []
+        for path in sorted(self.docs_dir.glob('*.md')):
+            if path.name == 'index.md':
+                continue
+            title = path.stem.replace('_', ' ').replace('-', ' ').title()
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.startswith('# '):
+                        title = line[2:].strip()
+                        break
+            nav.append({title: path.name})
+        return nav
+
+    def hash_partition(self, partition: Partition) -> str:
+        """Hash of everything that affects a partition's output: sources, generated and base config."""
+        digest = hashlib.sha256()
+        digest.update(json.dumps(partition.config, sort_keys=True).encode('utf-8'))
+        digest.update(self.mkdocs_config.read_bytes())
+        digest.update(f"{partition.language}:search-shard-{SHARD_VERSION}".encode('utf-8'))
+        for relative, path in sorted(partition.files.items()):
+            digest.update(relative.encode('utf-8') + b'\0')
+            digest.update(self.staged_content(partition, relative, path) + b'\0')
+        return digest.hexdigest()
+
+    def load_manifest(self) -> Dict:
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not read build manifest {self.manifest_path}: {e}. Rebuilding everything.")
+            return {}
+
+    def changed_partitions(self, partitions: List[Partition], manifest: Dict) -> List[Partition]:
+        """Partitions whose hash differs from the last deployed build, or whose output is missing."""
+        changed = []
+        for partition in partitions:
+            previous = manifest.get(partition.name, {})
+            deployed = (self.site_dir / partition.prefix).is_dir() if partition.prefix else self.site_dir.is_dir()
+            if previous.get('hash') != partition.content_hash or not deployed:
+                changed.append(partition)
+        return changed
+
+    def build_partition(self, partition: Partition) -> bool:
+        """Stage a partition's sources and run mkdocs on them."""
+        root = self.build_dir / partition.name
+        docs = root / 'docs'
+        if docs.exists():
+            shutil.rmtree(docs)
+        for relative, path in partition.files.items():
+            target = docs / relative
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(self.staged_content(partition, relative, path))
+        config_file = root / 'mkdocs.yml'
+        # JSON is valid YAML, so the generated config needs no YAML writer
+        atomic_write_text(str(config_file), json.dumps(partition.config, indent=2, ensure_ascii=False))
+
+        logger.info(f"Building {partition.name} ({len(partition.files)} files)")
+        result = subprocess.run(
+            [sys.executable, '-m', 'mkdocs', 'build', '--clean', '--quiet', '-f', str(config_file)],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            logger.error(f"mkdocs build of {partition.name} failed:\n{result.stderr}")
+            return False
+        self.write_search_shard(partition, root / 'site')
+        return True
+
+    def write_search_shard(self, partition: Partition, output: Path) -> None:
+        """Write the search index of a partition's pages, stemmed for its language, into its output."""
+        pages = {relative: path.read_text(encoding='utf-8')
+                 for relative, path in partition.files.items() if relative.endswith('.md')}
+        shard = build_shard(pages, partition.language, self.slug, self.slug_separator)
+        shard_path = output / SHARD_PATH
+        atomic_write_text(str(shard_path), serialize_shard(shard))
+        # Temporary files are private; the shard is served like the rest of the site
+        os.chmod(shard_path, 0o644)
+        logger.info(f"Search shard of {partition.name}: {len(shard['docs'])} sections, {len(shard['terms'])} terms")
+
+    def merge_partition(self, partition: Partition, manifest: Dict) -> None:
+        """Move a freshly built partition into the deploy tree."""
+        output = self.build_dir / partition.name / 'site'
+        if partition.prefix:
+            target = self.site_dir / partition.prefix
+            staged = self.site_dir / f".{partition.prefix}.new"
+            if staged.exists():
+                shutil.rmtree(staged)
+            shutil.copytree(output, staged)
+            if target.exists():
+                shutil.rmtree(target)
+            os.replace(staged, target)
+            manifest[partition.name] = {'hash': partition.content_hash}
+            return
+
+        # The root partition shares the top level with the locale folders: replace only its own files
+        files = sorted(str(path.relative_to(output)) for path in output.rglob('*') if path.is_file())
+        for stale in set(manifest.get(partition.name, {}).get('files', [])) - set(files):
+            stale_path = self.site_dir / stale
+            if stale_path.exists():
+                stale_path.unlink()
+        for relative in files:
+            target = self.site_dir / relative
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(output / relative, target)
+        manifest[partition.name] = {'hash': partition.content_hash, 'files': files}
+
+    def build(self, jobs: int = 1, force: bool = False, dry_run: bool = False) -> bool:
+        """Rebuild changed partitions (all with force), up to jobs at a time, and merge them."""
+        partitions = self.plan_partitions()
+        manifest = {} if force else self.load_manifest()
+        changed = self.changed_partitions(partitions, manifest)
+
+        unchanged = len(partitions) - len(changed)
+        logger.info(f"{len(changed)} of {len(partitions)} partitions changed: "
+                    f"{[partition.name for partition in changed]} ({unchanged} up to date)")
+        if dry_run:
+            return True
+        # The context map covers every page, so it is brought up to date even when no partition changed
+        ContextMapBuilder(self.config_path, str(self.mkdocs_config),
+                          str(self.build_dir / 'context-sections.json')).write(str(self.site_dir / CONTEXT_MAP_FILE))
+        if not changed:
+            return True
+
+        self.build_dir.mkdir(parents=True, exist_ok=True)
+        self.site_dir.mkdir(parents=True, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            results = list(executor.map(self.build_partition, changed))
+
+        # Remove deployed locales that no longer exist in help-config.json
+        names = {partition.name for partition in partitions}
+        for name in [name for name in manifest if name not in names]:
+            if name != ROOT_PARTITION and (self.site_dir / name).is_dir():
+                shutil.rmtree(self.site_dir / name)
+            del manifest[name]
+
+        for partition, built in zip(changed, results):
+            if built:
+                self.merge_partition(partition, manifest)
+        atomic_write_text(str(self.manifest_path), json.dumps(manifest, indent=2, sort_keys=True))
+
+        success = all(results)
+        if success:
+            logger.info(f"Site updated in {self.site_dir}")
+        return success
+
+    def verify_links(self) -> bool:
+        """Check that the deployed pages link where a plain ``mkdocs build`` of mkdocs.yml links.
+
+        Only the links in page content are compared; navigation differs by design.
+        """
+        with tempfile.TemporaryDirectory() as reference:
+            result = subprocess.run(
+                [sys.executable, '-m', 'mkdocs', 'build', '--quiet', '-f', str(self.mkdocs_config), '-d', reference],
+                capture_output=True, text=True
+            )
+            if result.returncode != 0:
+                logger.error(f"Reference mkdocs build failed:\n{result.stderr}")
+                return False
+            mismatches = 0
+            pages = sorted(Path(reference).rglob('*.html'))
+            for page in pages:
+                relative = page.relative_to(reference)
+                deployed = self.site_dir / relative
+                if not deployed.exists():
+                    logger.error(f"{relative} is missing from {self.site_dir}")
+                    mismatches += 1
+                    continue
+                expected, actual = (sorted(HREF_RE.findall(' '.join(ARTICLE_RE.findall(path.read_text(encoding='utf-8')))))
+                                    for path in (page, deployed))
+                if expected != actual:
+                    logger.error(f"Links of {relative} differ from the single-site build: "
+                                 f"missing {sorted(set(expected) - set(actual))}, "
+                                 f"unexpected {sorted(set(actual) - set(expected))}")
+                    mismatches += 1
+        logger.info(f"Link check: {len(pages) - mismatches} of {len(pages)} pages link like the single-site build")
+        return not mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partitioned, incremental MkDocs build for NTR Documentation")
+    parser.add_argument('--config', default='help-config.json', help='Help configuration file path')
+    parser.add_argument('--mkdocs-config', default='mkdocs.yml', help='Base mkdocs configuration inherited by every partition')
+    parser.add_argument('--docs-dir', default='docs', help='Documentation sources')
+    parser.add_argument('--site-dir', default='site', help='Deploy tree to update')
+    parser.add_argument('--build-dir', default='.site-build', help='Working directory for partition builds')
+    parser.add_argument('--jobs', type=int, default=1, help='Partitions to build in parallel')
+    parser.add_argument('--force', action='store_true', help='Rebuild every partition')
+    parser.add_argument('--dry-run', action='store_true', help='Only report which partitions would be rebuilt')
+    parser.add_argument('--verify-links', action='store_true',
+                        help='After building, check that pages link where a single mkdocs build links')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    builder = SiteBuilder(args.config, args.mkdocs_config, args.docs_dir, args.site_dir, args.build_dir)
+    if not builder.build(args.jobs, args.force, args.dry_run):
+        sys.exit(1)
+    if args.verify_links and not builder.verify_links():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
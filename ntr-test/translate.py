@@ -1,103 +1,609 @@
 #!/usr/bin/env python3
 """
 Automated Translation Script for NTR Documentation
-Handles translation between English and Swedish using DeepL API
+Handles translation between English and Swedish using DeepL API (or another configured provider)
 """
 
 import os
 import sys
 import json
+import hashlib
 import argparse
 import subprocess
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from contextlib import contextmanager
 import requests
 from datetime import datetime
 import logging
 import tempfile
 import shutil
+import time
+import atexit
+import asyncio
+
+from markdown_segments import split_segments, render_segments, split_front_matter
+from inline_markup import mask, unmask
+from memory_seeding import align_segments, DEFAULT_MIN_CONFIDENCE
+from translation_cache import write_artifact, read_artifact, latest_artifact
+from job_scheduler import JobScheduler, TranslationJob
+from translation_errors import TranslationError, ConfigurationError, GitError
+from translation_manifest import TranslationManifest
+from translation_provenance import ProvenanceTracker, Conflict, SKIP, CONFLICT, read_text, text_hash
+from translation_graph import TranslationGraph
+from language_id import (LanguageIdentifier, Detection, count_ngrams, sample_texts, load_profiles, save_profiles,
+                         DEFAULT_MIN_LETTERS, DEFAULT_MIN_CONFIDENCE as LANGUAGE_MIN_CONFIDENCE,
+                         DEFAULT_SAMPLE_CHARS, DEFAULT_PROFILE_PATH)
+from file_utils import atomic_write_text
+from git_reader import GitReader
+from git_commit_builder import CommitBuilder
+from run_journal import RunJournal, JournalState, DEFAULT_JOURNAL_PATH
+from translation_memory import TranslationMemory, DEFAULT_MEMORY_PATH
+from translation_pipeline import TranslationPipeline
+from rate_control import RateController
+from translation_providers import create_provider
+from translation_broker import connect_broker
+from translation_logging import setup_logging, job_context
+from translation_spool import TranslationSpool, coalesce
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('translation.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+# Git reports an all-zero SHA as the "before" of a push that creates a branch
+ZERO_SHA = '0' * 40
+# Where cache artifacts are exported to and imported from by default
+DEFAULT_CACHE_DIR = '.translation-cache'
+# Hash of the empty tree, used as the base when head is a root commit
+EMPTY_TREE_SHA = '4b825dc642cb6eb9a060e54bf8d69288fbee4904'
+# Where pages edited in two locales at once are reported
+DEFAULT_CONFLICT_REPORT = 'translation-conflicts.json'
+# Outcomes of translating a page: written, nothing to translate, no provider to translate with, error
+TRANSLATED = 'translated'
+UP_TO_DATE = 'up-to-date'
+UNAVAILABLE = 'unavailable'
+FAILED = 'failed'
+# How often a spool worker daemon looks for jobs queued by the git hook
+DEFAULT_POLL_SECONDS = 5
+
+def load_translation_config(path: str = "translation-config.json") -> Dict:
+    """Load the translation settings, falling back to defaults if the file is missing."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('translation', {})
+    except FileNotFoundError:
+        logger.info(f"Translation config {path} not found, using defaults")
+        return {}
+    except json.JSONDecodeError as e:
+        raise ConfigurationError(f"Invalid JSON in {path}: {e}")
+
+def get_local_changed_files() -> List[str]:
+    """Staged and unstaged changed files of the working tree. Raises CalledProcessError."""
+    # First try to get staged changes
+    result = subprocess.run(
+        ['git', 'diff', '--cached', '--name-only', '--diff-filter=ACM'],
+        capture_output=True, text=True, check=True
+    )
+    staged_files = result.stdout.strip().split('\n') if result.stdout.strip() else []
+    
+    # Also get unstaged changes
+    result = subprocess.run(
+        ['git', 'diff', '--name-only', '--diff-filter=ACM'],
+        capture_output=True, text=True, check=True
+    )
+    unstaged_files = result.stdout.strip().split('\n') if result.stdout.strip() else []
+    
+    # Combine and deduplicate
+    return list(set(staged_files + unstaged_files))
+
+def worker_command(config_path: str, translation_config_path: str) -> List[str]:
+    """Command line of a one-shot spool worker using the same configuration."""
+    return [sys.executable, os.path.abspath(__file__), '--mode', 'spool-worker',
+            '--config', config_path, '--translation-config', translation_config_path]
+
+def enqueue_hook_job(spool_config: Dict, command: Optional[List[str]] = None) -> bool:
+    """Queue the working tree's changed markdown files and HEAD for a spool worker.
+    
+    This is all the git hook does, so the git command is not held up by translation.
+    Unless spool.start_worker is false, a detached worker (command) is started when
+    none is running.
+    """
+    try:
+        markdown_files = [f for f in get_local_changed_files() if f.endswith('.md')]
+        head = subprocess.run(['git', 'rev-parse', '--verify', '--quiet', 'HEAD'],
+                              capture_output=True, text=True).stdout.strip() or None
+    except (subprocess.CalledProcessError, OSError) as e:
+        logger.error(f"Could not get changed files from git: {e}")
+        return False
+    if not markdown_files:
+        logger.info("No changed markdown files to queue")
+        return True
+    
+    spool = TranslationSpool.from_config(spool_config)
+    try:
+        name = spool.enqueue(markdown_files, head)
+    except OSError as e:
+        logger.error(f"Could not queue translation job in {spool.directory}: {e}")
+        return False
+    logger.info(f"Queued {len(markdown_files)} changed files for translation ({name})")
+    
+    if command and spool_config.get('start_worker', True) and not spool.worker_running():
+        # Detached, so the worker outlives the hook and is not tied to the terminal
+        options = ({'creationflags': subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+                   if os.name == 'nt' else {'start_new_session': True})
+        try:
+            subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.DEVNULL, **options)
+        except OSError as e:
+            logger.warning(f"Could not start translation worker, run --mode spool-worker: {e}")
+    return True
+
 class TranslationManager:
-    def __init__(self, config_path: str = "help-config.json"):
+    def __init__(self, config_path: str = "help-config.json",
+                 translation_config_path: str = "translation-config.json"):
         self.config_path = config_path
+        self.translation_config_path = translation_config_path
         self.config = self.load_config()
-        self.deepl_api_key = os.getenv('DEEPL_API_KEY')
-        self.deepl_api_url = "https://api-free.deepl.com/v2/translate"
+        self.translation_config = load_translation_config(translation_config_path)
+        self.manifest = TranslationManifest()
+        # Apps of help-config.json to process (None: all) and the app being processed
+        self.apps: Optional[List[str]] = self.translation_config.get('apps')
+        self.current_app: Optional[str] = None
+        # App each planned (source, target) job belongs to
+        self.job_apps: Dict[Tuple[str, str], str] = {}
+        # Origin of every machine-translated page and segment, kept in the manifest
+        self.provenance = ProvenanceTracker(self.manifest.data)
+        # (base, head) commit range of the current change-detection run, if any
+        self.commit_range: Optional[Tuple[str, str]] = None
+        # Pages changed in that range, for spotting edits made in two locales at once
+        self.changed_files: Optional[Set[str]] = None
+        # Conflicts found by this manager, reported instead of overwriting either page
+        self.conflicts_found: List[Conflict] = []
+        # Translation graph stage of each planned (source, target) job
+        self.job_stages: Dict[Tuple[str, str], int] = {}
+        # Language identifier trained on the configured pages, built on first use
+        self.language_identifier: Optional[LanguageIdentifier] = None
+        # Pages whose text is not (only) in the language of their locale
+        self.language_flags: List[Dict] = []
+        # Human-locked segments translated again because their source changed
+        self.review_flags: List[Dict] = []
         
-        if not self.deepl_api_key:
-            logger.warning("DEEPL_API_KEY environment variable not set. Translation will be skipped.")
+        # One git cat-file process serves every object lookup of this manager
+        self.git = GitReader()
+        # Target files written by this manager, in order
+        self.written_files: List[str] = []
+        
+        # A running translation broker shares one provider session, rate limiter and memory
+        # between every translation process on the machine
+        self.provider = (connect_broker(self.translation_config.get('broker', {}), translation_config_path)
+                         or create_provider(self.translation_config))
+        
+        pipeline_config = self.translation_config.get('pipeline', {})
+        self.memory = TranslationMemory(pipeline_config.get('memory_file', DEFAULT_MEMORY_PATH))
+        self.rate_controller = RateController.from_config(
+            self.provider.capabilities, self.translation_config.get('rate_control', {})
+        )
+        self.pipeline = TranslationPipeline(
+            self.provider, self.memory, self.rate_controller,
+            pipeline_config.get('fuzzy_threshold')
+        )
+        self.journal = RunJournal(pipeline_config.get('journal_file', DEFAULT_JOURNAL_PATH))
+        self.mask_inline_markup = pipeline_config.get('mask_inline_markup', True)
+        # Cut-offs for the job scheduler; None falls back to translation-config.json
+        self.deadline_seconds: Optional[float] = None
+        self.character_budget: Optional[int] = None
+        
+        if not self.provider.is_available():
+            logger.warning(f"Translation provider '{self.provider.name}' is not configured "
+                           "(is DEEPL_API_KEY set?). Translation will be skipped.")
     
     def load_config(self) -> Dict:
-        """Load the help configuration file."""
+        """Load the help configuration file. Raises ConfigurationError if it is missing or invalid."""
         try:
             with open(self.config_path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except FileNotFoundError:
-            logger.error(f"Configuration file {self.config_path} not found.")
-            sys.exit(1)
-        except json.JSONDecodeError:
-            logger.error(f"Invalid JSON in {self.config_path}")
-            sys.exit(1)
-    
-    def get_language_configs(self) -> Dict:
-        """Get language configurations from the config file."""
-        app_config = self.config.get('apps', {}).get('ntr-app', {})
+            raise ConfigurationError(f"Configuration file {self.config_path} not found.")
+        except json.JSONDecodeError as e:
+            raise ConfigurationError(f"Invalid JSON in {self.config_path}: {e}")
+    
+    def close(self) -> None:
+        """Release the provider session, git reader, journal and translation memory."""
+        self.journal.close()
+        self.git.close()
+        asyncio.run(self.provider.close())
+        self.memory.close()
+    
+    def log_run_metrics(self) -> None:
+        """Log pipeline counters and the rate controller's current limits."""
+        logger.info(f"Run metrics: {json.dumps(self.pipeline.metrics())}")
+    
+    def app_ids(self) -> List[str]:
+        """Apps to process: the selection (--apps or 'apps' in translation-config.json), else all."""
+        configured = list(self.config.get('apps', {}))
+        if not self.apps:
+            return configured
+        unknown = [app for app in self.apps if app not in configured]
+        if unknown:
+            raise ConfigurationError(f"Unknown app(s) {', '.join(unknown)}; help-config.json has {', '.join(configured)}")
+        return list(self.apps)
+    
+    @contextmanager
+    def app_context(self, app: Optional[str]) -> Iterator[None]:
+        """Within the block, language configs, sections and the translation graph are app's."""
+        if app is None or app == self.current_app:
+            yield
+            return
+        previous = self.current_app
+        self.current_app = app
+        try:
+            with job_context(app=app):
+                yield
+        finally:
+            self.current_app = previous
+    
+    def get_language_configs(self, app: Optional[str] = None) -> Dict:
+        """Get language configurations of an app (default: the app being processed, else the first app)."""
+        app = app or self.current_app or next(iter(self.app_ids()), None)
+        app_config = self.config.get('apps', {}).get(app, {})
         return app_config.get('locales', {})
     
-    def translate_text(self, text: str, target_lang: str, source_lang: str = "EN") -> str:
-        """Translate text using DeepL API."""
-        # Validate language codes
-        valid_source_langs = ["EN", "DE", "FR", "IT", "JA", "ES", "PT", "RU", "ZH", "NL", "PL", "BG", "CS", "DA", "EL", "ET", "FI", "HU", "ID", "LT", "LV", "RO", "SK", "SL", "SV", "TR", "UK"]
-        valid_target_langs = ["BG", "CS", "DA", "DE", "EL", "EN", "ES", "ET", "FI", "FR", "HU", "ID", "IT", "JA", "LT", "LV", "NL", "PL", "PT", "RO", "RU", "SK", "SL", "SV", "TR", "UK", "ZH"]
+    def get_sections(self) -> List[Dict]:
+        """Sections of the app being processed: its own 'sections' list, else the shared one."""
+        app_config = self.config.get('apps', {}).get(self.current_app or next(iter(self.app_ids()), None), {})
+        return app_config.get('sections', self.config.get('sections', []))
+    
+    def translation_graph(self) -> TranslationGraph:
+        """Which locale translates into which, from languages.graph in translation-config.json."""
+        return TranslationGraph.from_config(list(self.get_language_configs()),
+                                            self.translation_config.get('languages', {}))
+    
+    def page_locations(self) -> Dict[str, Tuple[str, str]]:
+        """Configured page path → (locale, section)."""
+        return {file_path: (locale, section)
+                for locale, lang_config in self.get_language_configs().items()
+                for section, file_path in lang_config.get('file_paths', {}).items()}
+    
+    def locale_folders(self) -> Dict[str, str]:
+        """Locale → folder holding its pages."""
+        folders = {}
+        for locale, lang_config in self.get_language_configs().items():
+            parents = [os.path.dirname(file_path) for file_path in lang_config.get('file_paths', {}).values()]
+            if parents:
+                folders[locale] = max(set(parents), key=parents.count)
+        return folders
+    
+    def section_pages(self, section: str) -> Dict[str, str]:
+        """Locale → page of a section; 'page:<name>' sections are pages not in help-config.json."""
+        if section.startswith('page:'):
+            name = section[len('page:'):]
+            return {locale: f"{folder}/{name}" for locale, folder in self.locale_folders().items()}
+        return {locale: lang_config['file_paths'][section]
+                for locale, lang_config in self.get_language_configs().items()
+                if section in lang_config.get('file_paths', {})}
+    
+    def locate_page(self, file_path: str) -> Optional[Tuple[str, str]]:
+        """(locale, section) of a changed page, or None if it cannot be routed.
         
-        if source_lang not in valid_source_langs:
-            logger.error(f"Invalid source language code: {source_lang}")
-            return text
+        Pages listed in help-config.json are looked up there. Other pages in a locale's
+        folder belong to that locale: to the section with the same file name, or to a
+        'page:<name>' section that is translated to the same file name in the other
+        locales. Elsewhere the language identifier decides the locale, and the file name
+        the section. A page outside help-config.json whose text is in another language
+        than its locale is flagged and not routed; configured pages are trusted here and
+        verified by check_languages.
+        """
+        language_configs = self.get_language_configs()
+        location = self.page_locations().get(file_path)
+        if location:
+            return location
+        name = os.path.basename(file_path)
+        folder_locale = next((locale for locale, folder in self.locale_folders().items()
+                              if folder == os.path.dirname(file_path)), None)
+        if folder_locale:
+            section = next((section for section, page in language_configs[folder_locale].get('file_paths', {}).items()
+                            if os.path.basename(page) == name), f"page:{name}")
+            if not self.page_language_matches(file_path, language_configs[folder_locale]['code'].upper()):
+                return None
+            return folder_locale, section
+        if self.belongs_to_other_app(file_path):
+            return None
+        detection = self.page_language(file_path)
+        locale = next((locale for locale, lang_config in language_configs.items()
+                       if lang_config['code'].upper() == detection.language), None)
+        section = next((section for lang_config in language_configs.values()
+                        for section, page in lang_config.get('file_paths', {}).items()
+                        if os.path.basename(page) == name), None)
+        if not locale or not section:
+            return None
+        logger.info(f"{file_path} is not in help-config.json; identified as {detection.language}, section {section}")
+        return locale, section
+    
+    def page_language_matches(self, file_path: str, code: str) -> bool:
+        """Whether a page is not mostly in another language than code; flags it if it is."""
+        detection = self.page_language(file_path)
+        if detection.language and detection.language != code and detection.confidence >= 0.5:
+            self.flag_language(file_path, code, detection.language, detection.confidence, 'page')
+            return False
+        return True
+    
+    def belongs_to_other_app(self, file_path: str) -> bool:
+        """Whether a page is configured for, or lies in a locale folder of, another selected app."""
+        folder = os.path.dirname(file_path)
+        for app in self.app_ids():
+            if app == self.current_app:
+                continue
+            with self.app_context(app):
+                if file_path in self.page_locations() or folder in self.locale_folders().values():
+                    return True
+        return False
+    
+    def get_language_identifier(self) -> Optional[LanguageIdentifier]:
+        """Identifier trained on the configured pages (unedited machine output left out when possible).
         
-        if target_lang not in valid_target_langs:
-            logger.error(f"Invalid target language code: {target_lang}")
-            return text
+        Profiles are trained on a bounded sample of each language and kept in the profile
+        file under a hash of the pages they came from, so they are only trained again when
+        a configured page changes.
+        None when language identification is disabled or fewer than two languages have text.
+        """
+        settings = self.translation_config.get('language_id', {})
+        if not settings.get('enabled', True):
+            return None
+        if self.language_identifier is None:
+            sample_chars = settings.get('sample_chars', DEFAULT_SAMPLE_CHARS)
+            profile_file = settings.get('profile_file', DEFAULT_PROFILE_PATH)
+            # One identifier serves every app: pages of all apps train the profile of their language
+            pages_by_code: Dict[str, Set[str]] = {}
+            for app in self.app_ids():
+                for lang_config in self.get_language_configs(app).values():
+                    pages_by_code.setdefault(lang_config['code'].upper(), set()).update(
+                        lang_config.get('file_paths', {}).values())
+            pages: Dict[str, List[Tuple[str, str, bool]]] = {}
+            digest = hashlib.sha256(f"{sample_chars}".encode('utf-8'))
+            for code, file_paths in sorted(pages_by_code.items()):
+                for file_path in sorted(file_paths):
+                    if not os.path.exists(file_path):
+                        continue
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        text = f.read()
+                    machine = self.provenance.is_machine_output(file_path, text)
+                    pages.setdefault(code, []).append((file_path, text, machine))
+                    digest.update(f"{code}\0{file_path}\0{machine}\0{text}\0".encode('utf-8'))
+            key = digest.hexdigest()
+            
+            counts = load_profiles(profile_file, key)
+            if counts is None:
+                counts = {}
+                for code, code_pages in pages.items():
+                    human = [page for page in code_pages if not page[2]]
+                    # Pages in an order spread over the sections, so the sample is not just the first few
+                    ordered = sorted(human or code_pages, key=lambda page: hashlib.sha1(page[0].encode('utf-8')).digest())
+                    sample = sample_texts((text for _, text, _ in ordered), sample_chars)
+                    if sample:
+                        counts[code] = count_ngrams(sample)
+                save_profiles(profile_file, key, counts)
+            self.language_identifier = LanguageIdentifier(settings.get('min_letters', DEFAULT_MIN_LETTERS),
+                                                          settings.get('min_confidence', LANGUAGE_MIN_CONFIDENCE))
+            if len(counts) >= 2:
+                self.language_identifier.fit(counts)
+        return self.language_identifier if len(self.language_identifier.languages) >= 2 else None
+    
+    def page_language(self, file_path: str) -> Detection:
+        """Language most of a page's text is in (language None if unknown)."""
+        identifier = self.get_language_identifier()
+        if identifier is None or not os.path.exists(file_path):
+            return Detection(None)
+        content, _ = self.extract_markdown_content(file_path)
+        return identifier.detect_document(segment.text for segment in split_segments(content) if segment.translatable)
+    
+    def flag_language(self, file_path: str, expected: str, detected: str, share: float, scope: str) -> None:
+        """Record text in the wrong language: a whole page ('page') or some of its segments ('segments')."""
+        if any(flag['file'] == file_path and flag['scope'] == scope for flag in self.language_flags):
+            return
+        self.language_flags.append({'file': file_path, 'expected': expected, 'detected': detected,
+                                    'share': round(share, 2), 'scope': scope})
+        if scope == 'page':
+            logger.warning(f"{file_path} should be {expected} but {share:.0%} of it is {detected}; "
+                           "not translating it until it is fixed")
+        else:
+            logger.warning(f"{file_path} is {expected} but {share:.0%} of it is {detected}")
+    
+    def check_segment_languages(self, file_path: str, content: str, expected: str) -> None:
+        """Flag the page if some of its segments are confidently in another configured language."""
+        identifier = self.get_language_identifier()
+        if identifier is None:
+            return
+        detections = identifier.detect_many(segment.text for segment in split_segments(content) if segment.translatable)
+        total = sum(detection.letters for detection in detections)
+        for language in sorted(set(identifier.languages) - {expected}):
+            letters = sum(detection.letters for detection in detections if detection.language == language)
+            if letters:
+                self.flag_language(file_path, expected, language, letters / total, 'segments')
+    
+    def check_languages(self, report_path: Optional[str] = None) -> bool:
+        """Identify the language of every configured page and flag text in the wrong language.
+        
+        The flags are written to report_path as JSON if given. Returns False if a whole
+        page is in another language than its locale.
+        """
+        if self.get_language_identifier() is None:
+            logger.error("Language identification needs text in at least two configured languages")
+            return False
+        for app in self.app_ids():
+            with self.app_context(app):
+                for lang_config in self.get_language_configs().values():
+                    code = lang_config['code'].upper()
+                    for file_path in lang_config.get('file_paths', {}).values():
+                        if os.path.exists(file_path) and self.page_language_matches(file_path, code):
+                            content, _ = self.extract_markdown_content(file_path)
+                            self.check_segment_languages(file_path, content, code)
+        pages = [flag for flag in self.language_flags if flag['scope'] == 'page']
+        logger.info(f"Language check: {len(pages)} mislabeled pages, "
+                    f"{len(self.language_flags) - len(pages)} pages with text in another language")
+        if report_path:
+            atomic_write_text(report_path, json.dumps(self.language_flags, indent=2, ensure_ascii=False))
+            logger.info(f"Language report written to {report_path}")
+        return not pages
+    
+    def routes_directly(self, source_file: str, target_file: str) -> bool:
+        """Whether the translation graph translates source_file's locale straight into target_file's."""
+        locations = self.page_locations()
+        if source_file not in locations or target_file not in locations:
+            return False
+        return self.translation_graph().routes(locations[source_file][0], locations[target_file][0])
+    
+    def plan_jobs(self, sources_by_section: Dict[str, Dict[str, str]]) -> List[Tuple[str, str, str, str]]:
+        """Jobs carrying the changed pages (section → {locale: page}) along the translation graph.
         
-        logger.info(f"Translating text from {source_lang} to {target_lang}")
+        Each target page is written at most once per run, so the number of jobs grows
+        linearly with the number of locales. A page that several changed pages would be
+        translated into is left alone and reported as a conflict.
+        """
+        language_configs = self.get_language_configs()
+        graph = self.translation_graph()
+        jobs = []
+        for section, sources in sources_by_section.items():
+            pages = {**self.section_pages(section), **sources}
+            directions, contested = graph.plan(list(sources))
+            for target, froms in contested.items():
+                if not pages.get(target):
+                    continue
+                changed = ', '.join(pages[locale] for locale in froms)
+                for locale in froms:
+                    self.report_conflict(pages[locale], pages[target], language_configs[locale]['code'].upper(),
+                                         language_configs[target]['code'].upper(),
+                                         f"{changed} all changed and translate into {pages[target]}")
+            for direction in directions:
+                source_file, target_file = pages.get(direction.source), pages.get(direction.target)
+                if not source_file or not target_file:
+                    continue
+                # A page shared by several apps is translated once, for the first app planning it
+                if self.job_apps.setdefault((source_file, target_file), self.current_app) != self.current_app:
+                    continue
+                self.job_stages[(source_file, target_file)] = direction.stage
+                jobs.append((source_file, target_file, language_configs[direction.source]['code'].upper(),
+                             language_configs[direction.target]['code'].upper()))
+        jobs.sort(key=lambda job: self.job_stages[(job[0], job[1])])
+        return jobs
+    
+    def translate_text(self, text: str, target_lang: str, source_lang: str = "EN") -> str:
+        """Translate text using the configured provider, returning it unchanged on failure."""
+        logger.debug(f"Translating text from {source_lang} to {target_lang}")
         
         try:
-            response = requests.post(
-                self.deepl_api_url,
-                headers={
-                    'Authorization': f'DeepL-Auth-Key {self.deepl_api_key}',
-                    'Content-Type': 'application/x-www-form-urlencoded'
-                },
-                data={
-                    'text': text,
-                    'source_lang': source_lang,
-                    'target_lang': target_lang,
-                    'preserve_formatting': '1'
-                },
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result['translations'][0]['text']
-            else:
-                logger.error(f"DeepL API error: {response.status_code} - {response.text}")
-                return text
-                
-        except Exception as e:
+            return self.translate_segments([text], source_lang, target_lang)[0]
+        except TranslationError as e:
             logger.error(f"Translation error: {e}")
             return text
     
+    def translate_content(self, content: str, source_lang: str, target_lang: str,
+                          fixed: Optional[Dict[str, str]] = None) -> str:
+        """Translate markdown content segment by segment, keeping code and markup verbatim.
+        
+        Segments in fixed (source text → translation) are not sent to the provider.
+        Raises TranslationError if the provider fails.
+        """
+        return self.translate_documents({'': content}, source_lang, target_lang, fixed)['']
+    
+    def translate_documents(self, documents: Dict[str, str], source_lang: str,
+                            target_lang: str, fixed: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """Translate several markdown documents with one batched pipeline call.
+        
+        Segments of all documents are deduplicated and batched together, and each
+        completed batch is stored in the translation memory, so an interrupted run
+        resumes without paying for finished segments again. Segments in fixed
+        (source text → translation) are not sent to the provider.
+        Raises TranslationError if the provider fails.
+        """
+        fixed = fixed or {}
+        segmented = {key: split_segments(content) for key, content in documents.items()}
+        replacements: Dict[str, Dict[int, str]] = {key: {} for key in documents}
+        owners, texts = [], []
+        for key, segments in segmented.items():
+            for index, segment in enumerate(segments):
+                if segment.translatable and segment.text in fixed:
+                    replacements[key][index] = fixed[segment.text]
+                    self.pipeline.stats.human_locked += 1
+                elif segment.translatable:
+                    owners.append((key, index))
+                    texts.append(segment.text)
+        
+        translations = self.translate_segments(texts, source_lang, target_lang)
+        
+        for (key, index), translation in zip(owners, translations):
+            replacements[key][index] = translation
+        return {key: render_segments(segments, replacements[key]) for key, segments in segmented.items()}
+    
+    def translate_segments(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        """Translate segment texts, keeping segments that are already in the target language.
+        
+        Text pasted in the target language (e.g. English inside a Swedish page) is
+        identified offline and kept as it is instead of being sent to the provider.
+        """
+        identifier = self.get_language_identifier()
+        if identifier is None or target_lang.upper() not in identifier.languages:
+            return self._translate_segments(texts, source_lang, target_lang)
+        
+        kept = {i for i, detection in enumerate(identifier.detect_many(texts))
+                if detection.language == target_lang.upper() != source_lang.upper()}
+        if kept:
+            logger.info(f"Keeping {len(kept)} segments already in {target_lang.upper()} as they are")
+            self.pipeline.stats.already_in_target += len(kept)
+        translations = iter(self._translate_segments([text for i, text in enumerate(texts) if i not in kept],
+                                                     source_lang, target_lang))
+        return [text if i in kept else next(translations) for i, text in enumerate(texts)]
+    
+    def _translate_segments(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        """Translate segment texts, masking inline markup when the provider handles XML tags.
+        
+        Inline code, URLs, HTML and mkdocs extension syntax are replaced by placeholders
+        and restored afterwards, so they are neither billed nor mangled. Segments whose
+        placeholders do not survive translation are translated again unmasked.
+        """
+        if not texts:
+            return []
+        if not (self.mask_inline_markup and 'xml' in self.provider.capabilities.tag_handling):
+            translations = self.pipeline.translate_sync(texts, source_lang, target_lang)
+            self.store_reverse_pairs(source_lang, target_lang, zip(texts, translations))
+            return translations
+        
+        masked = [mask(text) for text in texts]
+        translations = self.pipeline.translate_sync([text for text, _ in masked], source_lang, target_lang, 'xml')
+        restored = [unmask(translation, originals) for translation, (_, originals) in zip(translations, masked)]
+        self.store_reverse_pairs(source_lang, target_lang,
+                                 [(masked_text, translation) for (masked_text, _), translation, text
+                                  in zip(masked, translations, restored) if text is not None])
+        
+        failed = [i for i, text in enumerate(restored) if text is None]
+        if failed:
+            logger.warning(f"{len(failed)} segments lost inline markup placeholders, translating them unmasked")
+            retranslated = self.pipeline.translate_sync([texts[i] for i in failed], source_lang, target_lang)
+            for i, text in zip(failed, retranslated):
+                restored[i] = text
+        return restored
+    
+    def store_reverse_pairs(self, source_lang: str, target_lang: str, pairs) -> None:
+        """Store (source, translation) pairs in the opposite direction too.
+        
+        A segment of machine output that reaches the provider again (e.g. after the
+        page was partly edited) then translates back to exactly the text it came from,
+        without an API call. Masked pairs only match when placeholder order is unchanged.
+        """
+        reverse = [(translation, source) for source, translation in pairs if translation != source]
+        if reverse:
+            self.memory.store_many(target_lang, source_lang, reverse)
+    
+    def compose_markdown(self, metadata: Dict, content: str) -> str:
+        """Reconstruct a markdown file from its frontmatter metadata and content."""
+        output_lines = []
+        if metadata:
+            output_lines.append('---')
+            for key, value in metadata.items():
+                output_lines.append(f"{key}: {value}")
+            output_lines.append('---')
+            output_lines.append('')
+        
+        output_lines.append(content)
+        return '\n'.join(output_lines)
+    
     def extract_markdown_content(self, file_path: str) -> Tuple[str, Dict]:
         """Extract content and metadata from markdown file."""
         try:
@@ -105,27 +611,7 @@ class TranslationManager:
                 content = f.read()
             
             # Split frontmatter and content
-            lines = content.split('\n')
-            metadata = {}
-            content_lines = []
-            in_frontmatter = False
-            
-            for line in lines:
-                if line.strip() == '---':
-                    if not in_frontmatter:
-                        in_frontmatter = True
-                    else:
-                        in_frontmatter = False
-                    continue
-                
-                if in_frontmatter:
-                    if ':' in line:
-                        key, value = line.split(':', 1)
-                        metadata[key.strip()] = value.strip()
-                else:
-                    content_lines.append(line)
-            
-            return '\n'.join(content_lines), metadata
+            return split_front_matter(content)
             
         except Exception as e:
             logger.error(f"Error reading file {file_path}: {e}")
@@ -133,10 +619,11 @@ class TranslationManager:
     
     def get_changed_content(self, file_path: str) -> List[str]:
         """Get only the changed lines from a file."""
+        base, head = self.commit_range or ('HEAD~1', 'HEAD')
         try:
-            # Get the diff for this specific file
+            # Get the diff for this specific file, merged across the whole range
             result = subprocess.run(
-                ['git', 'diff', 'HEAD~1', 'HEAD', '--', file_path],
+                ['git', 'diff', base, head, '--', file_path],
                 capture_output=True, text=True, check=True
             )
             
@@ -154,7 +641,7 @@ class TranslationManager:
                     # Remove the + prefix and add to changed lines
                     changed_lines.append(line[1:])
             
-            logger.info(f"Found {len(changed_lines)} changed lines in {file_path}")
+            logger.debug(f"Found {len(changed_lines)} changed lines in {file_path}")
             return changed_lines
             
         except subprocess.CalledProcessError as e:
@@ -162,19 +649,30 @@ class TranslationManager:
             return []
     
     def translate_markdown_file(self, source_file: str, target_file: str, 
-                              source_lang: str, target_lang: str) -> bool:
-        """Translate a markdown file while preserving structure."""
+                              source_lang: str, target_lang: str, base: Optional[str] = None) -> str:
+        """Translate a markdown file while preserving structure.
+        
+        The source is compared with its version at base (default: the run's range base) to
+        skip pages without meaningful changes. Returns TRANSLATED, UP_TO_DATE when there is
+        nothing to translate, UNAVAILABLE when the provider is not available, or FAILED.
+        """
+        with job_context(source=source_file, target=target_file,
+                         source_lang=source_lang, target_lang=target_lang):
+            return self._translate_markdown_file(source_file, target_file, source_lang, target_lang, base)
+    
+    def _translate_markdown_file(self, source_file: str, target_file: str,
+                                 source_lang: str, target_lang: str, base: Optional[str] = None) -> str:
         logger.info(f"Translating {source_file} to {target_file}")
         
         # Check if source file exists
         if not os.path.exists(source_file):
             logger.error(f"Source file {source_file} does not exist. Skipping translation.")
-            return False
+            return FAILED
         
-        # Check if DeepL API key is available
-        if not self.deepl_api_key:
-            logger.warning("DeepL API key not available. Skipping translation to avoid overwriting content.")
-            return False
+        # Check if the translation provider is available
+        if not self.provider.is_available():
+            logger.warning("Translation provider not available. Skipping translation to avoid overwriting content.")
+            return UNAVAILABLE
         
         # Extract content and metadata from the source file
         source_content, source_metadata = self.extract_markdown_content(source_file)
@@ -182,26 +680,21 @@ class TranslationManager:
         # Check if content was successfully extracted
         if not source_content:
             logger.error(f"Could not extract content from {source_file}. Skipping translation.")
-            return False
+            return FAILED
         
         # Check if there are meaningful changes in the source file
-        try:
-            # Get the previous version of the source file
-            result = subprocess.run(
-                ['git', 'show', 'HEAD~1:' + source_file],
-                capture_output=True, text=True, check=True
-            )
-            previous_content = result.stdout
-            
-            # Compare current content with previous content
-            if source_content.strip() == previous_content.strip():
-                logger.info(f"No meaningful changes detected in {source_file}. Skipping translation.")
-                return False
-            else:
-                logger.info(f"Changes detected in {source_file}. Proceeding with translation.")
-        except subprocess.CalledProcessError:
+        # Get the previous version of the source file (at the range base when known)
+        previous_rev = base or (self.commit_range[0] if self.commit_range else 'HEAD~1')
+        previous_content = self.git.show(previous_rev, source_file)
+        if previous_content is None:
             # If we can't get the previous version, assume there are changes
             logger.info(f"Could not compare with previous version of {source_file}. Proceeding with translation.")
+        elif source_content.strip() == previous_content.strip():
+            # Compare current content with previous content
+            logger.info(f"No meaningful changes detected in {source_file}. Skipping translation.")
+            return UP_TO_DATE
+        else:
+            logger.debug(f"Changes detected in {source_file}. Proceeding with translation.")
         
         # Check if target file exists and compare content
         target_exists = os.path.exists(target_file)
@@ -211,87 +704,103 @@ class TranslationManager:
             # If the target file already has the same content (after translation), skip
             if target_content.strip() == source_content.strip():
                 logger.info(f"Target file {target_file} already has the same content. Skipping translation.")
-                return False
+                return UP_TO_DATE
+        
+        # Flag text in another configured language than the source (e.g. pasted English)
+        self.check_segment_languages(source_file, source_content, source_lang.upper())
         
         # Skip translation if content is too short (likely not meaningful)
         if len(source_content.strip()) < 10:
             logger.warning(f"Content too short to translate (length: {len(source_content.strip())}). Skipping translation.")
-            return False
+            return UP_TO_DATE
+        
+        # Segments reviewers corrected are kept instead of being translated again
+        fixed, locks = self.locked_segments(source_file, target_file, source_content)
         
-        # Translate the entire content (this is the current approach)
-        logger.info(f"Translating entire content from {source_lang} to {target_lang}")
-        translated_content = self.translate_text(source_content, target_lang, source_lang)
+        # Translate the prose segments; code blocks and markup are kept verbatim
+        logger.debug(f"Translating content from {source_lang} to {target_lang}")
+        try:
+            translated_content = self.translate_content(source_content, source_lang, target_lang, fixed)
+        except TranslationError as e:
+            logger.error(f"Translation error: {e}")
+            return FAILED
         
         # Check if translation actually happened (content should be different)
         if translated_content == source_content:
             logger.warning("Translation returned original content. Skipping to avoid overwriting.")
-            return False
+            return FAILED
         
         # Reconstruct file with metadata
-        output_lines = []
-        if source_metadata:
-            output_lines.append('---')
-            for key, value in source_metadata.items():
-                output_lines.append(f"{key}: {value}")
-            output_lines.append('---')
-            output_lines.append('')
-        
-        output_lines.append(translated_content)
+        output = self.compose_markdown(source_metadata, translated_content)
         
         # Ensure target directory exists
         target_dir = os.path.dirname(target_file)
         os.makedirs(target_dir, exist_ok=True)
         
-        # Write translated file
+        # Write translated file atomically so an interrupted run never leaves it half-written
         try:
-            with open(target_file, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(output_lines))
+            atomic_write_text(target_file, output)
+            self.written_files.append(target_file)
             logger.info(f"Successfully updated {target_file}")
-            return True
         except Exception as e:
             logger.error(f"Error writing updated file {target_file}: {e}")
-            return False
+            return FAILED
+        
+        # Record the page as machine output of source_file so it is never translated back
+        self.provenance.record(source_file, target_file, source_lang, target_lang, output, locks)
+        try:
+            self.manifest.save()
+        except OSError as e:
+            logger.warning(f"Could not save translation manifest: {e}")
+        return TRANSLATED
+    
+    def locked_segments(self, source_file: str, target_file: str,
+                        source_content: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """Translations to use instead of the provider's, and the human-locked ones among them.
+        
+        Segments reviewers corrected in target_file are locked: they are kept while their
+        source segment is unchanged, and translated again and flagged for review once it
+        changed. Corrected segments of source_file, when it is itself a translation of
+        target_file, translate back to the text they came from.
+        Returns (fixed, locks), both mapping source segment text to translation.
+        """
+        sources = [segment.text for segment in split_segments(source_content) if segment.translatable]
+        locks: Dict[str, str] = {}
+        if self.provenance.records.get(target_file, {}).get('origin') == source_file:
+            edits, _ = self.provenance.post_edits(target_file, read_text(target_file))
+            for previous, locked, replacements in self.provenance.stale_locks(target_file, edits, sources):
+                if not replacements:
+                    continue
+                logger.warning(f"Source of a corrected segment of {target_file} changed; translating it "
+                               f"again for review: {locked!r}")
+                self.review_flags.append({'source_file': source_file, 'target_file': target_file,
+                                          'previous_source': previous, 'locked': locked,
+                                          'source': '\n\n'.join(replacements)})
+            current = set(sources)
+            locks = {source: text for source, text in edits.items() if source in current}
+            if locks:
+                logger.info(f"Keeping {len(locks)} human-locked segments of {target_file}")
+        
+        fixed = dict(locks)
+        if self.provenance.records.get(source_file, {}).get('origin') == target_file:
+            edits, _ = self.provenance.post_edits(source_file, read_text(source_file))
+            fixed.update({text: source for source, text in edits.items()})
+        return fixed, locks
     
     def get_changed_files(self) -> List[str]:
         """Get list of changed files from git."""
         try:
             # Check if we're in GitHub Actions environment
             if os.getenv('GITHUB_ACTIONS'):
-                # In GitHub Actions, compare with the previous commit
-                result = subprocess.run(
-                    ['git', 'diff', '--name-status', 'HEAD~1', 'HEAD'],
-                    capture_output=True, text=True, check=True
-                )
-                changed_files_raw = result.stdout.strip().split('\n') if result.stdout.strip() else []
-                
-                # Parse status and filename, only include added/modified files
-                changed_files = []
-                for line in changed_files_raw:
-                    if line.strip():
-                        parts = line.split('\t')
-                        if len(parts) >= 2:
-                            status, filename = parts[0], parts[1]
-                            # Only include files that were added or modified (not deleted)
-                            if status in ['A', 'M']:
-                                changed_files.append(filename)
+                # In GitHub Actions, compare across the whole pushed commit range
+                commit_range = self.resolve_commit_range()
+                if not commit_range:
+                    return []
+                self.commit_range = commit_range
+                changed_files = self.get_changed_files_in_range(*commit_range)
             else:
                 # For local development, get staged and unstaged changes
-                # First try to get staged changes
-                result = subprocess.run(
-                    ['git', 'diff', '--cached', '--name-only', '--diff-filter=ACM'],
-                    capture_output=True, text=True, check=True
-                )
-                staged_files = result.stdout.strip().split('\n') if result.stdout.strip() else []
-                
-                # Also get unstaged changes
-                result = subprocess.run(
-                    ['git', 'diff', '--name-only', '--diff-filter=ACM'],
-                    capture_output=True, text=True, check=True
-                )
-                unstaged_files = result.stdout.strip().split('\n') if result.stdout.strip() else []
-                
-                # Combine and deduplicate
-                changed_files = list(set(staged_files + unstaged_files))
+                changed_files = get_local_changed_files()
             
             # Filter for markdown files only
             markdown_files = [f for f in changed_files if f.endswith('.md')]
@@ -303,108 +812,213 @@ class TranslationManager:
             logger.warning(f"Could not get changed files from git: {e}")
             return []
     
+    def load_push_event(self) -> Dict:
+        """Load the GitHub push event payload, if this run was triggered by a push."""
+        event_path = os.getenv('GITHUB_EVENT_PATH')
+        if os.getenv('GITHUB_EVENT_NAME') != 'push' or not event_path:
+            return {}
+        try:
+            with open(event_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not read push event payload {event_path}: {e}")
+            return {}
+    
+    def rev_parse(self, ref: str) -> Optional[str]:
+        """Resolve a ref to a commit SHA, or None if it is not available locally."""
+        return self.git.rev_parse(ref)
+    
+    def resolve_commit_range(self, base: Optional[str] = None,
+                             head: Optional[str] = None) -> Optional[Tuple[str, str]]:
+        """Resolve the base..head commit range to detect changes in.
+        
+        Head defaults to the push event's ``after`` SHA, then HEAD. Base is taken from
+        the explicit argument, the push event's ``before`` SHA, the last processed
+        commit stored in the manifest and finally the parent of head.
+        """
+        event = self.load_push_event()
+        
+        head = head or os.getenv('TRANSLATE_HEAD_SHA') or event.get('after') or 'HEAD'
+        head_sha = self.rev_parse(head)
+        if not head_sha:
+            logger.error(f"Head commit {head} is not available")
+            return None
+        
+        explicit_base = base or os.getenv('TRANSLATE_BASE_SHA')
+        if explicit_base and explicit_base != ZERO_SHA:
+            base_sha = self.rev_parse(explicit_base)
+            if not base_sha:
+                logger.error(f"Base commit {explicit_base} is not available (is the checkout shallow?)")
+                return None
+            return base_sha, head_sha
+        
+        # The push event's before SHA may be missing after a force push; fall back in order
+        for candidate, origin in ((event.get('before'), 'push event'),
+                                  (self.manifest.last_processed_commit, 'last processed commit')):
+            if not candidate or candidate == ZERO_SHA:
+                continue
+            base_sha = self.rev_parse(candidate)
+            if base_sha:
+                logger.info(f"Using base commit {base_sha} from {origin}")
+                return base_sha, head_sha
+            logger.warning(f"Base commit {candidate} from {origin} is not available, trying next candidate")
+        
+        parent_sha = self.rev_parse(f'{head_sha}~1')
+        return (parent_sha or EMPTY_TREE_SHA), head_sha
+    
+    def get_changed_files_in_range(self, base: str, head: str) -> List[str]:
+        """Get markdown files added or modified anywhere in base..head.
+        
+        ``git diff base head`` merges all commits in the range into a single diff per
+        file, so a page edited in several commits of one push is listed once. Paths are
+        relative to the current directory, matching the paths in help-config.json.
+        """
+        try:
+            result = subprocess.run(
+                ['git', 'diff', '--name-status', '--no-renames', '--relative', base, head],
+                capture_output=True, text=True, check=True
+            )
+        except subprocess.CalledProcessError as e:
+            logger.warning(f"Could not get changes for {base}..{head}: {e}")
+            return []
+        
+        markdown_files = []
+        for line in result.stdout.splitlines():
+            parts = line.split('\t')
+            if len(parts) < 2 or not parts[1].endswith('.md'):
+                continue
+            status, filename = parts[0], parts[1]
+            # Only include files that were added or modified (not deleted)
+            if status in ['A', 'M']:
+                if filename not in markdown_files:
+                    markdown_files.append(filename)
+            else:
+                logger.info(f"Skipping {filename} (status: {status})")
+        
+        logger.info(f"Changed markdown files in {base[:12]}..{head[:12]}: {markdown_files}")
+        return markdown_files
+    
     def find_corresponding_files(self, changed_file: str) -> List[Tuple[str, str, str, str]]:
         """Find corresponding files in other languages for translation."""
         language_configs = self.get_language_configs()
         translations = []
         
-        # Determine which language the changed file belongs to
-        source_lang = None
-        source_section = None
-        
-        # First try exact match
-        for lang_code, lang_config in language_configs.items():
-            for section, file_path in lang_config.get('file_paths', {}).items():
-                if file_path == changed_file:
-                    source_lang = lang_code
-                    source_section = section
-                    break
-            if source_lang:
-                break
-        
-        # If no exact match, try to infer from file path structure
-        if not source_lang:
-            # Extract language from path (e.g., ntr-test/docs/sv/vouchers.md -> sv)
-            path_parts = changed_file.split('/')
-            if len(path_parts) >= 3 and path_parts[-2] in ['sv', 'en']:
-                detected_lang = path_parts[-2]
-                # Map detected language to config language codes
-                if detected_lang == 'sv':
-                    source_lang = 'sv-se'
-                elif detected_lang == 'en':
-                    source_lang = 'en-se'
-                
-                # Try to find the section by matching the filename
-                filename = path_parts[-1]
-                for lang_code, lang_config in language_configs.items():
-                    if lang_code == source_lang:
-                        for section, file_path in lang_config.get('file_paths', {}).items():
-                            if file_path.endswith(filename):
-                                source_section = section
-                                break
-                        break
-        
-        if not source_lang or not source_section:
+        # Determine which language and section the changed file belongs to
+        location = self.locate_page(changed_file)
+        if not location:
             logger.warning(f"Could not determine language for {changed_file}")
             return []
+        source_lang, source_section = location
         
-        logger.info(f"Detected source language: {source_lang}, section: {source_section}")
+        logger.debug(f"Detected source language: {source_lang}, section: {source_section}")
         
-        # Find corresponding files in ALL other languages (bidirectional translation)
-        for lang_code, lang_config in language_configs.items():
-            if lang_code != source_lang:
-                target_file = lang_config.get('file_paths', {}).get(source_section)
-                if target_file:
-                    source_lang_code = language_configs[source_lang]['code'].upper()
-                    target_lang_code = lang_config['code'].upper()
-                    translations.append((
-                        changed_file, target_file, source_lang_code, target_lang_code
-                    ))
+        # Find corresponding files in the languages the translation graph routes this one to
+        graph = self.translation_graph()
+        for lang_code, target_file in self.section_pages(source_section).items():
+            if graph.routes(source_lang, lang_code):
+                source_lang_code = language_configs[source_lang]['code'].upper()
+                target_lang_code = language_configs[lang_code]['code'].upper()
+                translations.append((
+                    changed_file, target_file, source_lang_code, target_lang_code
+                ))
         
         return translations
     
-    def translate_changed_files(self) -> bool:
-        """Translate all changed files to other languages and create pull request."""
-        changed_files = self.get_changed_files()
+    def translate_changed_files(self, bases: Optional[Dict[str, Optional[str]]] = None) -> bool:
+        """Translate all changed files to other languages and create pull request.
+        
+        bases maps changed files to the commit each is compared against (as queued by
+        the git hook); by default the working tree's changes are translated.
+        """
+        changed_files = list(bases) if bases is not None else self.get_changed_files()
         if not changed_files:
             logger.info("No changed files detected")
             return True
         
         logger.info(f"Found {len(changed_files)} changed files")
-        
-        # Create a new branch for translations
-        branch_name = f"auto-translate-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
-        if not self.create_translation_branch(branch_name):
-            logger.error("Failed to create translation branch")
-            return False
+        # Same paths as the language configs use when running from the ntr-test directory
+        in_ntr_test = os.getcwd().endswith('ntr-test')
+        changed_files = [f.replace('ntr-test/', '', 1) if in_ntr_test else f for f in changed_files]
+        self.changed_files = set(changed_files)
+        file_bases = {f.replace('ntr-test/', '', 1) if in_ntr_test else f: base
+                      for f, base in (bases or {}).items()}
         
         success = True
         translated_files = []
         
-        for changed_file in changed_files:
-            if not changed_file.endswith('.md'):
-                continue
-                
-            translations = self.find_corresponding_files(changed_file)
-            for source_file, target_file, source_lang, target_lang in translations:
-                if self.translate_markdown_file(source_file, target_file, source_lang, target_lang):
-                    translated_files.append(target_file)
-                else:
-                    success = False
+        for app in self.app_ids():
+            with self.app_context(app):
+                for changed_file in changed_files:
+                    if not changed_file.endswith('.md'):
+                        continue
+                    
+                    translations = self.find_corresponding_files(changed_file)
+                    for source_file, target_file, source_lang, target_lang in translations:
+                        # A page shared by several apps is translated once
+                        if target_file in translated_files:
+                            continue
+                        if not self.provenance_allows(source_file, target_file, source_lang, target_lang):
+                            continue
+                        if self.translate_markdown_file(source_file, target_file, source_lang, target_lang,
+                                                        file_bases.get(source_file)) == TRANSLATED:
+                            translated_files.append(target_file)
+                        else:
+                            success = False
+        self.write_conflict_report()
         
         if translated_files and success:
-            # Commit translated files
-            if self.commit_translations(translated_files, branch_name):
-                # Create pull request
-                if self.create_pull_request(branch_name, translated_files):
-                    logger.info(f"Pull request created for branch: {branch_name}")
-                else:
-                    logger.error("Failed to create pull request")
-                    success = False
-            else:
-                logger.error("Failed to commit translations")
-                success = False
+            success = self.publish_translations(translated_files)
+        
+        return success
+    
+    def queue_changed_files(self) -> bool:
+        """Queue the working tree's changed files for a spool worker (the git hook)."""
+        return enqueue_hook_job(self.translation_config.get('spool', {}),
+                                worker_command(self.config_path, self.translation_config_path))
+    
+    def drain_spool(self, daemon: bool = False, poll_seconds: Optional[float] = None) -> bool:
+        """Translate the files queued by the git hook, then commit and open a pull request.
         
+        Jobs queued for the same file are coalesced into one translation. By default the
+        worker returns once the queue is empty; as a daemon it polls the spool every
+        poll_seconds (spool.poll_seconds). Only one worker drains a spool at a time.
+        """
+        spool_config = self.translation_config.get('spool', {})
+        spool = TranslationSpool.from_config(spool_config)
+        poll_seconds = poll_seconds or spool_config.get('poll_seconds', DEFAULT_POLL_SECONDS)
+        if not spool.acquire():
+            logger.info("Another translation worker is draining the spool")
+            return True
+        held = True
+        success = True
+        try:
+            while True:
+                spool.heartbeat()
+                jobs = spool.claim()
+                if jobs:
+                    bases = coalesce(jobs)
+                    logger.info(f"Translating {len(bases)} changed files from {len(jobs)} queued jobs")
+                    # Each batch gets its own pull request, listing only its own findings
+                    self.conflicts_found, self.language_flags, self.review_flags = [], [], []
+                    if self.translate_changed_files(bases):
+                        spool.complete(jobs)
+                        continue
+                    spool.retry(jobs)
+                    success = False
+                if daemon:
+                    time.sleep(poll_seconds)
+                    continue
+                if not success:
+                    break
+                # A hook that saw this worker still running did not start another one
+                spool.release()
+                held = False
+                if not spool.queued() or not spool.acquire():
+                    break
+                held = True
+        finally:
+            if held:
+                spool.release()
         return success
     
     def translate_specific_file(self, source_file: str, target_lang: str, 
@@ -418,100 +1032,530 @@ class TranslationManager:
         source_path = Path(source_file)
         target_file = str(source_path.parent / f"{source_path.stem}_{target_lang.lower()}{source_path.suffix}")
         
-        return self.translate_markdown_file(source_file, target_file, source_lang, target_lang)
+        return self.translate_markdown_file(source_file, target_file, source_lang, target_lang) == TRANSLATED
     
     def translate_between_languages(self, source_lang: str, target_lang: str) -> bool:
-        """Translate all files from one language to another."""
-        language_configs = self.get_language_configs()
-        
-        source_config = language_configs.get(source_lang)
-        target_config = language_configs.get(target_lang)
-        
-        if not source_config or not target_config:
+        """Translate all files from one language to another, in every selected app with both."""
+        apps = [app for app in self.app_ids()
+                if source_lang in self.get_language_configs(app) and target_lang in self.get_language_configs(app)]
+        if not apps:
             logger.error(f"Language configuration not found for {source_lang} or {target_lang}")
             return False
         
         success = True
         translated_files = []
         
-        for section, source_file in source_config.get('file_paths', {}).items():
-            if not os.path.exists(source_file):
-                logger.warning(f"Source file {source_file} not found, skipping")
-                continue
+        for app in apps:
+            language_configs = self.get_language_configs(app)
+            source_config = language_configs[source_lang]
+            target_config = language_configs[target_lang]
             
-            target_file = target_config.get('file_paths', {}).get(section)
-            if target_file:
-                source_code = source_config['code'].upper()
-                target_code = target_config['code'].upper()
-                
-                if self.translate_markdown_file(source_file, target_file, source_code, target_code):
-                    translated_files.append(target_file)
-                else:
-                    success = False
+            with self.app_context(app):
+                for section, source_file in source_config.get('file_paths', {}).items():
+                    if not os.path.exists(source_file):
+                        logger.warning(f"Source file {source_file} not found, skipping")
+                        continue
+                    
+                    target_file = target_config.get('file_paths', {}).get(section)
+                    # A page shared by several apps is translated once
+                    if target_file and target_file not in translated_files:
+                        source_code = source_config['code'].upper()
+                        target_code = target_config['code'].upper()
+                        
+                        if self.translate_markdown_file(source_file, target_file, source_code, target_code) == TRANSLATED:
+                            translated_files.append(target_file)
+                        else:
+                            success = False
         
         if translated_files:
             logger.info(f"Successfully translated {len(translated_files)} files from {source_lang} to {target_lang}")
         
         return success
     
-    def sync_all_files(self) -> bool:
-        """Sync all files between all languages (bidirectional)."""
-        language_configs = self.get_language_configs()
+    def sync_all_files(self, resume: bool = False) -> bool:
+        """Sync all files between all languages of every selected app along the translation graph.
+        
+        Every page that is not unedited machine output is a source; its changes are
+        carried to the other locales of its section. Jobs of all apps run as one
+        scheduled run.
+        """
+        state = self.begin_run('sync-all', resume)
+        jobs = []
+        
+        for app in self.app_ids():
+            with self.app_context(app):
+                sources_by_section: Dict[str, Dict[str, str]] = {}
+                for locale, lang_config in self.get_language_configs().items():
+                    for section, source_file in lang_config.get('file_paths', {}).items():
+                        if not os.path.exists(source_file):
+                            logger.warning(f"Source file {source_file} not found, skipping")
+                            continue
+                        with open(source_file, 'r', encoding='utf-8') as f:
+                            if self.provenance.is_machine_output(source_file, f.read()):
+                                continue
+                        if self.locate_page(source_file):
+                            sources_by_section.setdefault(section, {})[locale] = source_file
+                
+                app_jobs = self.plan_jobs(sources_by_section)
+                logger.info(f"Planned {len(app_jobs)} jobs for {len(sources_by_section)} sections of {app} "
+                            f"({self.translation_graph().mode} translation graph)")
+                jobs.extend(app_jobs)
+        
+        success, _ = self.run_jobs(jobs, state)
+        self.end_run(success)
+        return success
+    
+    def begin_run(self, mode: str, resume: bool = False, **params) -> JournalState:
+        """Start journaling a run, or with resume continue an interrupted run of the same mode.
+        
+        Segments journaled by the interrupted run are put back into the translation
+        memory, so only work that never completed is sent to the provider.
+        """
+        state = self.journal.load() if resume else None
+        if state and not state.finished and state.run.get('mode') == mode:
+            segments_by_pair: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+            for source_lang, target_lang, source, target in state.segments:
+                segments_by_pair.setdefault((source_lang, target_lang), []).append((source, target))
+            for (source_lang, target_lang), pairs in segments_by_pair.items():
+                self.memory.store_many(source_lang, target_lang, pairs)
+            logger.info(f"Resuming {mode} run: {len(state.completed)} of {len(state.planned)} jobs done, "
+                        f"{len(state.segments)} segments journaled")
+            self.journal.reopen()
+        else:
+            if resume:
+                logger.info(f"No interrupted {mode} run to resume, starting a new run")
+            state = JournalState(run={'mode': mode, **params})
+            self.journal.start(mode, **params)
+        self.pipeline.journal = self.journal
+        return state
+    
+    def run_jobs(self, jobs: List[Tuple[str, str, str, str]], state: JournalState) -> Tuple[bool, List[str]]:
+        """Translate (source, target, source_lang, target_lang) jobs not completed by an earlier attempt.
+        
+        Jobs run in scheduler priority order. Jobs cut off by the deadline or character
+        budget are recorded in the manifest as pending and picked up by the next run.
+        Returns overall success and the target files written, including those written
+        before an interruption.
+        """
+        planned = {(job[0], job[1]) for job in state.planned}
+        for job in jobs:
+            if (job[0], job[1]) not in planned:
+                self.journal.plan(*job)
+        
         success = True
+        pending = {(job['source_file'], job['target_file']): job for job in self.manifest.data.get('pending_jobs', [])}
+        range_base = self.commit_range[0] if self.commit_range else None
+        # A job is only skipped while its source is still the one it was completed for
+        completed = {(source, target) for source, target, _, _ in jobs
+                     if self.completed_unchanged(state, source, target,
+                                                 pending.get((source, target), {}).get('base') or range_base)}
+        translated_files = [target for source, target, _, _ in jobs if (source, target) in completed]
+        if translated_files:
+            logger.info(f"Skipping {len(translated_files)} jobs completed before the interruption")
+        changed = sum(1 for source, target, _, _ in jobs if (source, target) in state.completed) - len(completed)
+        if changed:
+            logger.info(f"Running {changed} jobs completed before the interruption again, their source changed since")
         
-        # Get all language codes
-        lang_codes = list(language_configs.keys())
+        scheduler = JobScheduler(self.translation_config.get('scheduler', {}),
+                                 self.deadline_seconds, self.character_budget)
+        described = []
+        for job in jobs:
+            if (job[0], job[1]) not in completed:
+                with self.app_context(self.job_apps.get((job[0], job[1]))):
+                    described.append(self.describe_job(*job, pending.get((job[0], job[1]))))
+        scheduled = scheduler.order(described)
         
-        # For each language, sync to all other languages
-        for source_lang_code in lang_codes:
-            source_config = language_configs.get(source_lang_code)
-            if not source_config:
-                logger.warning(f"Source language configuration not found for {source_lang_code}")
-                continue
-            
-            logger.info(f"Syncing files from {source_lang_code} to other languages...")
-            
-            for section, source_file in source_config.get('file_paths', {}).items():
-                if not os.path.exists(source_file):
-                    logger.warning(f"Source file {source_file} not found, skipping")
+        deferred = []
+        for job in scheduled:
+            pending.pop((job.source_file, job.target_file), None)
+            with self.app_context(job.app):
+                # Checked when the job is due, as earlier stages may have just written its source
+                if not self.provenance_allows(job.source_file, job.target_file, job.source_lang, job.target_lang):
                     continue
-                
-                # Find translations to all other languages
-                for target_lang_code in lang_codes:
-                    if target_lang_code != source_lang_code:
-                        target_config = language_configs.get(target_lang_code)
-                        if target_config:
-                            target_file = target_config.get('file_paths', {}).get(section)
-                            if target_file:
-                                source_code = source_config['code'].upper()
-                                target_code = target_config['code'].upper()
-                                if not self.translate_markdown_file(source_file, target_file, source_code, target_code):
-                                    success = False
+                reason = scheduler.admit(job)
+                # A page passed on through the graph waits for the job that updates it
+                if not reason and any(other.target_file == job.source_file for other, _ in deferred):
+                    reason = f"waiting for {job.source_file}"
+                if reason:
+                    logger.debug(f"Deferring {job.source_file} → {job.target_file}: {reason}")
+                    deferred.append((job, reason))
+                    continue
+                characters_before = self.pipeline.stats.characters_sent
+                source_hash = text_hash(read_text(job.source_file) or '')
+                outcome = self.translate_markdown_file(job.source_file, job.target_file, job.source_lang,
+                                                       job.target_lang, job.base)
+                # A page with nothing to translate is done too; only errors fail the run
+                if outcome in (TRANSLATED, UP_TO_DATE):
+                    self.journal.complete(job.source_file, job.target_file, source_hash, job.base)
+                if outcome == TRANSLATED:
+                    translated_files.append(job.target_file)
+                elif outcome == FAILED:
+                    success = False
+                scheduler.charge(self.pipeline.stats.characters_sent - characters_before)
+        
+        if deferred:
+            reasons = sorted({reason for _, reason in deferred})
+            logger.warning(f"Deferred {len(deferred)} of {len(scheduled)} jobs to the next run ({', '.join(reasons)})")
+        self.manifest.data['pending_jobs'] = list(pending.values()) + [job.as_dict() for job, _ in deferred]
+        self.write_conflict_report()
+        return success, translated_files
+    
+    @staticmethod
+    def completed_unchanged(state: JournalState, source_file: str, target_file: str, base: Optional[str]) -> bool:
+        """Whether an earlier attempt completed the job for the source page and base commit there are now."""
+        done = state.completed.get((source_file, target_file))
+        if not done or not done['source_hash'] or done['base'] != base:
+            return False
+        text = read_text(source_file)
+        return text is not None and text_hash(text) == done['source_hash']
+    
+    def provenance_allows(self, source_file: str, target_file: str, source_lang: str, target_lang: str) -> bool:
+        """Whether the job may run: it must not translate machine output back or overwrite concurrent edits.
+        
+        Conflicts are recorded in the manifest and the conflict report rather than resolved.
+        """
+        decision, reason = self.provenance.check(source_file, target_file, source_lang, target_lang,
+                                                 self.changed_files, self.routes_directly)
+        if decision == SKIP:
+            logger.info(f"Not translating {source_file} → {target_file}: {reason}")
+            return False
+        if decision == CONFLICT:
+            self.report_conflict(source_file, target_file, source_lang, target_lang, reason)
+            return False
+        return True
+    
+    def report_conflict(self, source_file: str, target_file: str, source_lang: str, target_lang: str,
+                        reason: str) -> None:
+        """Record a conflict in the manifest and for the pull request, once per page pair."""
+        conflict = self.provenance.add_conflict(source_file, target_file, source_lang, target_lang, reason)
+        if not any({c.source_file, c.target_file} == {source_file, target_file} for c in self.conflicts_found):
+            self.conflicts_found.append(conflict)
+            logger.warning(f"Translation conflict, leaving both pages unchanged: {reason}")
+    
+    def write_conflict_report(self) -> None:
+        """Write the open conflicts to the conflict report, removing it when there are none."""
+        path = self.translation_config.get('provenance', {}).get('conflict_report', DEFAULT_CONFLICT_REPORT)
+        try:
+            if self.provenance.conflicts:
+                atomic_write_text(path, json.dumps(self.provenance.conflicts, indent=2, ensure_ascii=False))
+                logger.warning(f"{len(self.provenance.conflicts)} open translation conflicts written to {path}; "
+                               "edit the page whose version should win to resolve one")
+            elif os.path.exists(path):
+                os.remove(path)
+            self.manifest.save()
+        except OSError as e:
+            logger.warning(f"Could not write conflict report {path}: {e}")
+    
+    def describe_job(self, source_file: str, target_file: str, source_lang: str, target_lang: str,
+                     pending: Optional[Dict] = None) -> TranslationJob:
+        """Build a scheduler job with the page's section, category and expected size.
+        
+        A job deferred by an earlier run (pending) keeps its first-seen time and base commit.
+        """
+        pending = pending or {}
+        section = None
+        for lang_config in self.get_language_configs().values():
+            for section_id, file_path in lang_config.get('file_paths', {}).items():
+                if file_path == target_file:
+                    section = section_id
+                    break
+        category = next((item.get('category') for item in self.get_sections()
+                         if item.get('id') == section), None)
+        return TranslationJob(source_file, target_file, source_lang, target_lang, section, category,
+                              self.estimate_characters(source_file, source_lang, target_lang),
+                              pending.get('first_seen') or time.time(),
+                              pending.get('base') or (self.commit_range[0] if self.commit_range else None),
+                              self.job_stages.get((source_file, target_file), 0),
+                              self.current_app)
+    
+    def estimate_characters(self, source_file: str, source_lang: str, target_lang: str) -> int:
+        """Characters a translation of source_file would send: its segments not in the translation memory."""
+        if not os.path.exists(source_file):
+            return 0
+        content, _ = self.extract_markdown_content(source_file)
+        texts = {segment.text for segment in split_segments(content) if segment.translatable}
+        if self.mask_inline_markup and 'xml' in self.provider.capabilities.tag_handling:
+            texts = {mask(text)[0] for text in texts}
+        cached = self.memory.lookup_many(source_lang, target_lang, texts, touch=False)
+        return sum(len(text) for text in texts if text not in cached)
+    
+    def pending_jobs(self, app: Optional[str] = None) -> List[Tuple[str, str, str, str]]:
+        """Jobs deferred by earlier runs whose source page still exists, optionally only app's."""
+        return [(job['source_file'], job['target_file'], job['source_lang'], job['target_lang'])
+                for job in self.manifest.data.get('pending_jobs', [])
+                if os.path.exists(job['source_file']) and (app is None or job.get('app') in (None, app))]
+    
+    def end_run(self, success: bool) -> None:
+        """Close the run journal; only a fully successful run is marked finished."""
+        self.pipeline.journal = None
+        if success:
+            self.journal.finish()
+        else:
+            self.journal.close()
+            logger.info(f"Run journal kept in {self.journal.path}; re-run with --resume to continue")
+    
+    def bootstrap_locale(self, locale: str, code: Optional[str] = None, name: Optional[str] = None,
+                         source_locale: Optional[str] = None) -> bool:
+        """Add a new locale: translate every page, section title and keyword list, then register it.
+        
+        All pages go through one batched pipeline run. Completed batches are kept in the
+        translation memory and written pages are recorded in a checkpoint file, so an
+        interrupted bootstrap resumes where it stopped without re-billing finished work.
+        help-config.json is only updated once every page exists. Every selected app
+        that does not have the locale yet gets it.
+        """
+        apps = [app for app in self.app_ids() if locale not in self.get_language_configs(app)]
+        if not apps:
+            logger.error(f"Locale {locale} is already configured")
+            return False
         
+        success = True
+        for app in apps:
+            with self.app_context(app):
+                success = self.bootstrap_app_locale(locale, code, name, source_locale) and success
         return success
+    
+    def bootstrap_app_locale(self, locale: str, code: Optional[str], name: Optional[str],
+                             source_locale: Optional[str]) -> bool:
+        """Add a new locale to the app being processed (see bootstrap_locale)."""
+        language_configs = self.get_language_configs()
+        source_locale = source_locale or self.translation_config.get('languages', {}).get('default_source', 'en-se')
+        source_config = language_configs.get(source_locale)
+        if not source_config:
+            logger.error(f"Source locale {source_locale} is not configured for {self.current_app}")
+            return False
+        
+        code = (code or locale.split('-')[0]).upper()
+        short_code = code.lower()
+        source_code = source_config['code'].upper()
+        source_short_code = source_code.lower()
+        file_paths = {
+            section: str(Path(source_file).parent.parent / short_code / Path(source_file).name).replace(os.sep, '/')
+            for section, source_file in source_config.get('file_paths', {}).items()
+        }
+        
+        if not self.provider.is_available():
+            logger.error("Translation provider not available. Cannot bootstrap a locale.")
+            return False
+        
+        checkpoint_path = f".locale-bootstrap-{self.current_app}-{locale}.json"
+        checkpoint = TranslationManifest(checkpoint_path)
+        written = set(checkpoint.data.get('written_pages', []))
+        if written:
+            logger.info(f"Resuming bootstrap of {locale}: {len(written)} pages already written")
+        
+        # Pages still to write, plus section titles and keywords, in one batched run
+        documents = {}
+        metadata = {}
+        for section, source_file in source_config.get('file_paths', {}).items():
+            if file_paths[section] in written:
+                continue
+            if not os.path.exists(source_file):
+                logger.warning(f"Source file {source_file} not found, skipping")
+                continue
+            content, metadata[section] = self.extract_markdown_content(source_file)
+            documents[f"page:{section}"] = content
+        sections = self.get_sections()
+        for section in sections:
+            title = section.get('title', {}).get(source_short_code)
+            if title:
+                documents[f"title:{section['id']}"] = title
+            for i, keyword in enumerate(section.get('keywords', [])):
+                documents[f"keyword:{section['id']}:{i}"] = keyword
+        
+        logger.info(f"Bootstrapping {locale} of {self.current_app} from {source_locale}: "
+                    f"{len(metadata)} pages to translate")
+        try:
+            translated = self.translate_documents(documents, source_code, code)
+        except TranslationError as e:
+            logger.error(f"Bootstrap of {locale} interrupted: {e}. Re-run to resume.")
+            return False
+        
+        for section in metadata:
+            target_file = file_paths[section]
+            output = self.compose_markdown(metadata[section], translated[f"page:{section}"])
+            atomic_write_text(target_file, output)
+            self.written_files.append(target_file)
+            self.provenance.record(source_config['file_paths'][section], target_file, source_code, code, output)
+            written.add(target_file)
+            checkpoint.data['written_pages'] = sorted(written)
+            checkpoint.save()
+            logger.info(f"Created {target_file}")
+        self.manifest.save()
+        
+        for section in sections:
+            title_key = f"title:{section['id']}"
+            if title_key in translated:
+                section.setdefault('title', {})[short_code] = translated[title_key]
+            keywords = [translated[f"keyword:{section['id']}:{i}"] for i in range(len(section.get('keywords', [])))]
+            if keywords:
+                section.setdefault('localized_keywords', {})[short_code] = keywords
+        language_configs[locale] = {
+            'code': code,
+            'name': name or locale,
+            'file_paths': file_paths
+        }
+        atomic_write_text(self.config_path, json.dumps(self.config, indent=2, ensure_ascii=False) + '\n')
+        os.remove(checkpoint_path)
         
+        logger.info(f"Locale {locale} added to {self.current_app} with {len(file_paths)} pages")
+        return True
+    
+    def seed_memory(self, source_locale: Optional[str] = None, target_locale: Optional[str] = None,
+                    min_confidence: float = DEFAULT_MIN_CONFIDENCE, report_path: Optional[str] = None) -> bool:
+        """Load reviewed translations from existing parallel pages into the translation memory.
+        
+        Pages of each locale pair (only source_locale to target_locale when both are
+        given, otherwise every direction) are aligned segment by segment; pairs reaching
+        min_confidence are stored, the rest are reported. No provider calls are made.
+        Pages of every selected app are aligned; pages shared by apps only once.
+        """
+        # (source code, target code) → page pairs to align
+        page_pairs: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+        for app in self.app_ids():
+            language_configs = self.get_language_configs(app)
+            if source_locale and target_locale:
+                directions = [(source_locale, target_locale)]
+            else:
+                directions = [(s, t) for s in language_configs for t in language_configs if s != t]
+            for locale in {locale for direction in directions for locale in direction}:
+                if locale not in language_configs:
+                    logger.error(f"Locale {locale} is not configured for {app}")
+                    return False
+            for source, target in directions:
+                source_config, target_config = language_configs[source], language_configs[target]
+                pages = page_pairs.setdefault((source_config['code'].upper(), target_config['code'].upper()), [])
+                for section, source_file in source_config.get('file_paths', {}).items():
+                    target_file = target_config.get('file_paths', {}).get(section)
+                    if target_file and (source_file, target_file) not in pages:
+                        pages.append((source_file, target_file))
+        
+        masking = self.mask_inline_markup and 'xml' in self.provider.capabilities.tag_handling
+        low_confidence = []
+        seeded = 0
+        for (source_code, target_code), pages in page_pairs.items():
+            pairs = []
+            for source_file, target_file in pages:
+                if not os.path.exists(source_file) or not os.path.exists(target_file):
+                    continue
+                source_segments = split_segments(self.extract_markdown_content(source_file)[0])
+                target_segments = split_segments(self.extract_markdown_content(target_file)[0])
+                for alignment in align_segments(source_segments, target_segments):
+                    confidence, reason = alignment.confidence, alignment.reason
+                    if alignment.source and alignment.target:
+                        source_text, target_text = alignment.source.text, alignment.target.text
+                        if source_text == target_text:
+                            confidence, reason = 0.0, 'target is untranslated'
+                        elif masking:
+                            # Store the masked form the pipeline looks up; both sides must carry the same markup
+                            (source_text, source_originals), (target_text, target_originals) = \
+                                mask(source_text), mask(target_text)
+                            if source_originals != target_originals:
+                                confidence, reason = 0.0, 'inline markup differs'
+                        if confidence >= min_confidence:
+                            pairs.append((source_text, target_text))
+                            continue
+                    low_confidence.append({
+                        'source_file': source_file,
+                        'target_file': target_file,
+                        'confidence': round(confidence, 3),
+                        'reason': reason,
+                        'source': alignment.source.text if alignment.source else None,
+                        'target': alignment.target.text if alignment.target else None,
+                    })
+            self.memory.store_many(source_code, target_code, pairs)
+            seeded += len(pairs)
+            logger.info(f"Seeded {len(pairs)} segments for {source_code} → {target_code}")
+        
+        for item in low_confidence:
+            logger.debug(f"Low-confidence alignment ({item['confidence']}, {item['reason']}) in "
+                         f"{item['source_file']}: {item['source']!r} → {item['target']!r}")
+        logger.info(f"Seeded {seeded} segments; {len(low_confidence)} alignments below confidence {min_confidence}")
+        if report_path:
+            atomic_write_text(report_path, json.dumps(low_confidence, indent=2, ensure_ascii=False))
+            logger.info(f"Low-confidence alignments written to {report_path}")
+        return True
+    
+    def export_cache(self, path: Optional[str] = None, max_size_mb: Optional[float] = None) -> Optional[str]:
+        """Export the translation memory and manifest as one compressed artifact; returns its path.
+        
+        path defaults to the configured cache directory, where the file is named after its
+        content hash. Entries beyond the size cap are pruned least recently used first,
+        from the artifact and from the local memory.
+        """
+        cache_config = self.translation_config.get('cache', {})
+        path = path or cache_config.get('directory', DEFAULT_CACHE_DIR)
+        if not path.endswith('.gz'):
+            os.makedirs(path, exist_ok=True)
+        max_size_mb = max_size_mb if max_size_mb is not None else cache_config.get('max_size_mb')
+        max_bytes = int(max_size_mb * 1024 * 1024) if max_size_mb else None
+        
+        if max_bytes:
+            pruned = self.memory.prune(max_bytes)
+            if pruned:
+                logger.info(f"Pruned {pruned} least recently used segments to stay within {max_size_mb} MB")
+        rows = self.memory.export_rows(max_bytes)
+        written = write_artifact(path, rows, self.manifest.data)
+        logger.info(f"Exported {len(rows)} segments and the manifest to {written}")
+        return written
+    
+    def import_cache(self, path: Optional[str] = None, conflict: Optional[str] = None) -> bool:
+        """Merge a cache artifact into the local translation memory and manifest.
+        
+        path may be an artifact or a directory (the newest artifact in it is used); a
+        missing artifact is not an error, the run just starts cold. Conflicting
+        translations are resolved by ``conflict`` ('newest', 'local' or 'incoming').
+        """
+        cache_config = self.translation_config.get('cache', {})
+        path = path or cache_config.get('directory', DEFAULT_CACHE_DIR)
+        conflict = conflict or cache_config.get('conflict', 'newest')
+        if os.path.isdir(path):
+            path = latest_artifact(path)
+        if not path or not os.path.exists(path):
+            logger.info("No translation cache artifact found, starting with the local cache only")
+            return True
+        
+        header, rows = read_artifact(path)
+        counts = self.memory.import_rows(rows, conflict)
+        logger.info(f"Imported {path}: {counts['added']} added, {counts['updated']} updated, "
+                    f"{counts['kept']} conflicts kept local")
+        
+        incoming = header.get('manifest', {})
+        for key, value in incoming.items():
+            self.manifest.data.setdefault(key, value)
+        # Provenance merges per page, keeping local records; conflicts merge per page pair
+        for target_file, record in incoming.get('provenance', {}).items():
+            self.provenance.records.setdefault(target_file, record)
+        for conflict in incoming.get('conflicts', []):
+            if not self.provenance.open_conflict(*conflict['hashes']):
+                self.provenance.conflicts.append(conflict)
+        incoming_commit = incoming.get('last_processed_commit')
+        local_commit = self.manifest.last_processed_commit
+        if incoming_commit and local_commit != incoming_commit and self.is_ancestor(local_commit, incoming_commit):
+            self.manifest.last_processed_commit = incoming_commit
+        self.manifest.save()
+        return True
+    
+    def is_ancestor(self, ancestor: str, descendant: str) -> bool:
+        """Whether ancestor is reachable from descendant in the local history."""
+        result = subprocess.run(['git', 'merge-base', '--is-ancestor', ancestor, descendant],
+                                capture_output=True)
+        return result.returncode == 0
+    
     def run_github_actions_workflow(self) -> bool:
         """Run the translation workflow specifically for GitHub Actions."""
         logger.info("Running GitHub Actions translation workflow")
         
-        # Get changed files from the last commit
-        try:
-            result = subprocess.run(
-                ['git', 'diff', '--name-only', 'HEAD~1', 'HEAD'],
-                capture_output=True, text=True, check=True
-            )
-            changed_files = result.stdout.strip().split('\n') if result.stdout.strip() else []
-            markdown_files = [f for f in changed_files if f.endswith('.md')]
-            
-            logger.info(f"Changed markdown files in last commit: {markdown_files}")
-            
-            if not markdown_files:
-                logger.info("No markdown files changed in the last commit")
-                return True
-                
-        except subprocess.CalledProcessError:
-            logger.warning("Could not get changed files from last commit")
+        # Get changed files across the pushed commit range
+        commit_range = self.resolve_commit_range()
+        if not commit_range:
             return False
+        self.commit_range = commit_range
+        markdown_files = self.get_changed_files_in_range(*commit_range)
+        
+        if not markdown_files:
+            logger.info("No markdown files changed in the pushed commits")
+            return True
         
         # Run bidirectional translation for all languages
         success = self.sync_all_files()
@@ -523,240 +1567,167 @@ class TranslationManager:
             
         return success
         
-    def translate_only_changed_files(self) -> bool:
-        """Translate only the files that were changed in the last commit."""
+    def translate_only_changed_files(self, base: Optional[str] = None,
+                                     head: Optional[str] = None, resume: bool = False) -> bool:
+        """Translate only the files that were changed in the base..head commit range.
+        
+        With resume, an interrupted run continues on its journaled commit range.
+        """
         logger.info("Running smart translation for changed files only")
         
-        # Get changed files from the last commit - try multiple approaches
-        markdown_files = []
+        if resume and not base and not head:
+            previous = self.journal.load()
+            if previous and not previous.finished and previous.run.get('mode') == 'smart-translate':
+                base, head = previous.run.get('base'), previous.run.get('head')
         
-        # Method 1: Try to get changes from the last commit
-        try:
-            result = subprocess.run(
-                ['git', 'diff', '--name-status', 'HEAD~1', 'HEAD'],
-                capture_output=True, text=True, check=True
-            )
-            changed_files_raw = result.stdout.strip().split('\n') if result.stdout.strip() else []
-            
-            # Parse status and filename
-            markdown_files = []
-            for line in changed_files_raw:
-                if line.strip() and line.endswith('.md'):
-                    parts = line.split('\t')
-                    if len(parts) >= 2:
-                        status, filename = parts[0], parts[1]
-                        # Only include files that were added or modified (not deleted)
-                        if status in ['A', 'M']:
-                            markdown_files.append(filename)
-                        else:
-                            logger.info(f"Skipping {filename} (status: {status})")
-            
-            logger.info(f"Method 1 - Changed markdown files from last commit: {markdown_files}")
-        except subprocess.CalledProcessError:
-            logger.warning("Method 1 failed - could not get changes from last commit")
+        commit_range = self.resolve_commit_range(base, head)
+        if not commit_range:
+            logger.error("Could not determine the commit range to translate")
+            return False
+        self.commit_range = commit_range
+        state = self.begin_run('smart-translate', resume, base=commit_range[0], head=commit_range[1])
         
-        # Method 2: If no files found, try to get all staged/unstaged changes
-        if not markdown_files:
-            try:
-                # Get staged changes
-                result = subprocess.run(
-                    ['git', 'diff', '--cached', '--name-only'],
-                    capture_output=True, text=True, check=True
-                )
-                staged_files = result.stdout.strip().split('\n') if result.stdout.strip() else []
-                
-                # Get unstaged changes
-                result = subprocess.run(
-                    ['git', 'diff', '--name-only'],
-                    capture_output=True, text=True, check=True
-                )
-                unstaged_files = result.stdout.strip().split('\n') if result.stdout.strip() else []
-                
-                # Combine and filter
-                all_files = list(set(staged_files + unstaged_files))
-                markdown_files = [f for f in all_files if f.endswith('.md')]
-                logger.info(f"Method 2 - Found markdown files with changes: {markdown_files}")
-            except subprocess.CalledProcessError:
-                logger.warning("Method 2 failed - could not get staged/unstaged changes")
-        
-        # Method 3: If still no files, try to get files from the push event
-        if not markdown_files:
-            try:
-                # Look for files in the docs directory that might have been changed
-                result = subprocess.run(
-                    ['find', 'ntr-test/docs', '-name', '*.md', '-type', 'f'],
-                    capture_output=True, text=True, check=True
-                )
-                all_md_files = result.stdout.strip().split('\n') if result.stdout.strip() else []
-                # For now, just pick the first few files as a fallback
-                markdown_files = all_md_files[:3]  # Limit to 3 files
-                logger.info(f"Method 3 - Using fallback files: {markdown_files}")
-            except subprocess.CalledProcessError:
-                logger.warning("Method 3 failed - could not find markdown files")
+        markdown_files = self.get_changed_files_in_range(*commit_range)
+        self.changed_files = set()
         
-        if not markdown_files:
+        if not markdown_files and not self.pending_jobs():
             logger.info("No markdown files found to translate")
+            self.end_run(True)
+            self.record_processed_commit(commit_range[1])
             return True
         
-        # Get language configurations
-        language_configs = self.get_language_configs()
-        success = True
-        translated_files = []
-        
-        # For each changed file, find its counterpart and translate
+        # Paths as seen from the working directory
+        source_files = []
         for changed_file in markdown_files:
-            # Determine which language this file belongs to
-            source_lang = None
-            source_section = None
-            
-            # First try exact match
-            for lang_code, lang_config in language_configs.items():
-                for section, file_path in lang_config.get('file_paths', {}).items():
-                    if file_path == changed_file:
-                        source_lang = lang_code
-                        source_section = section
-                        break
-                if source_lang:
-                    break
-            
-            # If no exact match, try to infer from file path structure
-            if not source_lang:
-                # Extract language from path (e.g., ntr-test/docs/sv/vouchers.md -> sv)
-                path_parts = changed_file.split('/')
-                if len(path_parts) >= 3 and path_parts[-2] in ['sv', 'en']:
-                    detected_lang = path_parts[-2]
-                    # Map detected language to config language codes
-                    if detected_lang == 'sv':
-                        source_lang = 'sv-se'
-                    elif detected_lang == 'en':
-                        source_lang = 'en-se'
-                    
-                    # Try to find the section by matching the filename
-                    filename = path_parts[-1]
-                    for lang_code, lang_config in language_configs.items():
-                        if lang_code == source_lang:
-                            for section, file_path in lang_config.get('file_paths', {}).items():
-                                if file_path.endswith(filename):
-                                    source_section = section
-                                    break
-                            break
-            
-            if not source_lang or not source_section:
-                logger.warning(f"Could not determine language for {changed_file}")
-                continue
-            
-            logger.info(f"Processing changed file: {changed_file} (language: {source_lang}, section: {source_section})")
-            
             # Check if the changed file actually exists
             # If we're in the ntr-test directory and the path starts with ntr-test/, adjust it
             file_to_check = changed_file
             if os.getcwd().endswith('ntr-test') and changed_file.startswith('ntr-test/'):
                 file_to_check = changed_file.replace('ntr-test/', '', 1)
-                logger.info(f"Adjusted path from {changed_file} to {file_to_check}")
+                logger.debug(f"Adjusted path from {changed_file} to {file_to_check}")
             
             if not os.path.exists(file_to_check):
                 logger.warning(f"Changed file {file_to_check} does not exist in filesystem. Skipping translation.")
                 continue
-            
-            # Use the adjusted path for translation
-            source_file = file_to_check
-            
-            # Find the corresponding file in the OTHER language
-            for target_lang_code, target_config in language_configs.items():
-                if target_lang_code != source_lang:  # Only translate to OTHER language
-                    target_file = target_config.get('file_paths', {}).get(source_section)
-                    if target_file:
-                        source_code = language_configs[source_lang]['code'].upper()
-                        target_code = target_config['code'].upper()
-                        
-                        # Skip translation if source and target languages are the same
-                        if source_code == target_code:
-                            logger.warning(f"Skipping translation: source and target languages are the same ({source_code})")
-                            continue
-                        
-                        logger.info(f"Translating {source_file} ({source_code}) → {target_file} ({target_code})")
-                        logger.info(f"Source language: {source_lang}, Target language: {target_lang_code}")
-                        
-                        if self.translate_markdown_file(source_file, target_file, source_code, target_code):
-                            translated_files.append(target_file)
-                        else:
-                            success = False
+            source_files.append(file_to_check)
+        
+        jobs = []
+        located = set()
+        for app in self.app_ids():
+            with self.app_context(app):
+                # Changed page of each section per locale; the translation graph plans the jobs
+                sources_by_section: Dict[str, Dict[str, str]] = {}
+                
+                for source_file in source_files:
+                    # Determine which language and section this file belongs to in this app
+                    location = self.locate_page(source_file)
+                    if not location:
+                        continue
+                    source_lang, source_section = location
+                    
+                    logger.info(f"Processing changed file: {source_file} "
+                                f"(app: {app}, language: {source_lang}, section: {source_section})")
+                    located.add(source_file)
+                    self.changed_files.add(source_file)
+                    sources_by_section.setdefault(source_section, {})[source_lang] = source_file
+                
+                # Pages a previous run deferred at its deadline or budget are carried on again
+                for job in self.pending_jobs(app):
+                    location = self.locate_page(job[0])
+                    if location:
+                        sources_by_section.setdefault(location[1], {}).setdefault(location[0], job[0])
+                
+                app_jobs = self.plan_jobs(sources_by_section)
+                for source_file, target_file, source_code, target_code in app_jobs:
+                    logger.debug(f"Planning {source_file} ({source_code}) → {target_file} ({target_code})")
+                jobs.extend(app_jobs)
+        
+        for source_file in source_files:
+            if source_file not in located:
+                logger.warning(f"Could not determine language for {source_file}")
+        
+        success, translated_files = self.run_jobs(jobs, state)
         
         if translated_files and success:
-            # Create a new branch for translations
-            branch_name = f"auto-translate-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
-            if not self.create_translation_branch(branch_name):
-                logger.error("Failed to create translation branch")
-                return False
-            
-            # Commit translated files
-            if self.commit_translations(translated_files, branch_name):
-                # Create pull request
-                if self.create_pull_request(branch_name, translated_files):
-                    logger.info(f"Pull request created for branch: {branch_name}")
-                else:
-                    logger.error("Failed to create pull request")
-                    success = False
-            else:
-                logger.error("Failed to commit translations")
-                success = False
+            success = self.publish_translations(translated_files)
         else:
             logger.info("No files were actually translated, skipping PR creation")
         
+        self.end_run(success)
         if success:
+            self.record_processed_commit(commit_range[1])
             logger.info("Smart translation completed successfully")
         else:
             logger.error("Smart translation failed")
             
         return success
     
-    def create_translation_branch(self, branch_name: str) -> bool:
-        """Create a new branch for translations."""
-        try:
-            # Configure git user for GitHub Actions
-            if os.getenv('GITHUB_ACTIONS'):
-                subprocess.run(['git', 'config', '--local', 'user.email', 'action@github.com'], check=True)
-                subprocess.run(['git', 'config', '--local', 'user.name', 'GitHub Action'], check=True)
-            
-            # Get current branch
-            result = subprocess.run(['git', 'branch', '--show-current'], 
-                                  capture_output=True, text=True, check=True)
-            current_branch = result.stdout.strip()
-            
-            # Create and checkout new branch
-            subprocess.run(['git', 'checkout', '-b', branch_name], check=True)
-            logger.info(f"Created and switched to branch: {branch_name}")
+    def publish_translations(self, translated_files: List[str]) -> bool:
+        """Commit translated files to a new branch and open a pull request.
+        
+        The translated files stay modified in the working tree either way. Skipped when
+        git_integration.create_pull_requests is false in translation-config.json.
+        """
+        if not self.translation_config.get('git_integration', {}).get('create_pull_requests', True):
+            logger.info(f"Pull request creation disabled; {len(translated_files)} translated files left in the working tree")
             return True
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to create branch {branch_name}: {e}")
+        
+        # Commit translated files to a new branch for translations
+        branch_name = f"auto-translate-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        if not self.commit_translations(translated_files, branch_name):
+            logger.error("Failed to commit translations")
+            return False
+        
+        # Create pull request
+        if not self.create_pull_request(branch_name, translated_files):
+            logger.error("Failed to create pull request")
             return False
+        
+        logger.info(f"Pull request created for branch: {branch_name}")
+        return True
+    
+    def record_processed_commit(self, head_sha: str) -> None:
+        """Remember head as processed so the next run without a push event starts there."""
+        self.manifest.last_processed_commit = head_sha
+        try:
+            self.manifest.save()
+        except OSError as e:
+            logger.warning(f"Could not save translation manifest: {e}")
     
     def commit_translations(self, translated_files: List[str], branch_name: str) -> bool:
-        """Commit translated files to the current branch."""
+        """Commit translated files onto a new branch off HEAD and push it.
+        
+        The commit is built with git plumbing, so the working tree, the index and the
+        checked-out branch are left as they are.
+        """
+        # Create commit message
+        commit_message = f"Auto-translate: Update {len(translated_files)} files\n\n"
+        commit_message += "Translated files:\n"
+        for file_path in translated_files:
+            commit_message += f"- {file_path}\n"
+        commit_message += f"\nBranch: {branch_name}"
+        
+        # Commit as the GitHub Action in workflows, without changing the repository's config
+        identity = None
+        if os.getenv('GITHUB_ACTIONS'):
+            identity = {f"GIT_{role}_{field}": value for role in ('AUTHOR', 'COMMITTER')
+                        for field, value in (('NAME', 'GitHub Action'), ('EMAIL', 'action@github.com'))}
+        
+        builder = CommitBuilder(self.git)
         try:
-            # Add all translated files
-            for file_path in translated_files:
-                subprocess.run(['git', 'add', file_path], check=True)
-            
-            # Create commit message
-            commit_message = f"Auto-translate: Update {len(translated_files)} files\n\n"
-            commit_message += "Translated files:\n"
-            for file_path in translated_files:
-                commit_message += f"- {file_path}\n"
-            commit_message += f"\nBranch: {branch_name}"
-            
-            # Commit
-            subprocess.run(['git', 'commit', '-m', commit_message], check=True)
-            logger.info(f"Committed {len(translated_files)} translated files")
+            commit = builder.commit('HEAD', translated_files, commit_message, identity)
+            builder.create_branch(branch_name, commit)
+            logger.info(f"Committed {len(translated_files)} translated files to {branch_name} ({commit[:12]})")
             
             # Push the branch to remote repository
-            subprocess.run(['git', 'push', 'origin', branch_name], check=True)
+            builder.git('push', 'origin', f"refs/heads/{branch_name}")
             logger.info(f"Pushed branch {branch_name} to remote repository")
-            
             return True
-        except subprocess.CalledProcessError as e:
+        except GitError as e:
             logger.error(f"Failed to commit translations: {e}")
             return False
+        finally:
+            builder.close()
     
     def create_pull_request(self, branch_name: str, translated_files: List[str]) -> bool:
         """Create a pull request for the translation changes."""
@@ -787,10 +1758,26 @@ This pull request contains automated translations for the following files:
                 for file_path in translated_files:
                     pr_body += f"- `{file_path}`\n"
                 
+                if self.language_flags:
+                    pr_body += "\n### Text in the wrong language:\n"
+                    for flag in self.language_flags:
+                        pr_body += (f"- `{flag['file']}` ({flag['expected']}): {flag['share']:.0%} "
+                                    f"{flag['detected']}{' (not translated)' if flag['scope'] == 'page' else ''}\n")
+                
+                if self.review_flags:
+                    pr_body += "\n### Corrected translations to review again (source changed):\n"
+                    for flag in self.review_flags:
+                        pr_body += f"- `{flag['target_file']}`: {flag['locked'][:80]!r}\n"
+                
+                if self.conflicts_found:
+                    pr_body += "\n### Conflicts (not translated):\n"
+                    for conflict in self.conflicts_found:
+                        pr_body += f"- `{conflict.source_file}` ↔ `{conflict.target_file}`: {conflict.reason}\n"
+                
                 pr_body += f"""
 ### Details:
 - **Branch**: `{branch_name}`
-- **Translation Provider**: DeepL API
+- **Translation Provider**: {self.provider.name}
 - **Generated**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
 ### Review Instructions:
@@ -838,7 +1825,8 @@ This PR was automatically generated by the translation system. Please review the
                         'gh', 'pr', 'create',
                         '--title', pr_title,
                         '--body', pr_body,
-                        '--base', 'main'
+                        '--base', 'main',
+                        '--head', branch_name
                     ], check=True)
                     logger.info("Pull request created using GitHub CLI")
                     return True
@@ -885,48 +1873,74 @@ This PR was automatically generated by the translation system. Please review the
 def main():
     parser = argparse.ArgumentParser(description="Automated Translation for NTR Documentation")
     parser.add_argument('--config', default='help-config.json', help='Configuration file path')
-    parser.add_argument('--mode', choices=['git-hook', 'sync-all', 'translate-file', 'translate-lang', 'github-actions', 'smart-translate'], 
+    parser.add_argument('--translation-config', default='translation-config.json', help='Translation settings file path')
+    parser.add_argument('--mode', choices=['git-hook', 'sync-all', 'translate-file', 'translate-lang', 'github-actions', 'smart-translate', 'add-locale', 'seed-memory', 'check-languages', 'export-cache', 'import-cache', 'spool-worker', 'batch'], 
                        default='git-hook', help='Translation mode')
     parser.add_argument('--source-file', help='Source file to translate (for translate-file mode)')
     parser.add_argument('--target-lang', help='Target language code (for translate-file/translate-lang modes)')
     parser.add_argument('--source-lang', default='EN', help='Source language code (for translate-file mode)')
     parser.add_argument('--from-lang', help='Source language for translate-lang mode (e.g., en-se, sv-se)')
     parser.add_argument('--to-lang', help='Target language for translate-lang mode (e.g., en-se, sv-se)')
+    parser.add_argument('--locale', help='New locale to add (for add-locale mode, e.g., de-de)')
+    parser.add_argument('--locale-code', help='Language code of the new locale (for add-locale mode, e.g., DE)')
+    parser.add_argument('--locale-name', help='Display name of the new locale (for add-locale mode, e.g., Deutsch)')
+    parser.add_argument('--min-confidence', type=float, help='Minimum alignment confidence to store a pair (for seed-memory mode)')
+    parser.add_argument('--report', help='Write low-confidence alignments (seed-memory) or language flags (check-languages) to this JSON file')
+    parser.add_argument('--cache-file', help='Cache artifact or directory (for export-cache/import-cache modes)')
+    parser.add_argument('--conflict', choices=['newest', 'local', 'incoming'], help='Which translation wins when caches disagree (for import-cache mode)')
+    parser.add_argument('--max-size-mb', type=float, help='Size cap of the exported cache (for export-cache mode)')
+    parser.add_argument('--apps', help='Comma-separated apps of help-config.json to process (default: all)')
+    parser.add_argument('--deadline-minutes', type=float, help='Stop starting new translation jobs after this many minutes')
+    parser.add_argument('--character-budget', type=int, help='Maximum characters to send to the provider in this run')
+    parser.add_argument('--resume', action='store_true', help='Continue an interrupted run from its journal (for sync-all and smart-translate modes)')
+    parser.add_argument('--daemon', action='store_true', help='Keep polling the spool for new jobs (for spool-worker mode)')
+    parser.add_argument('--poll-seconds', type=float, help='Seconds between spool polls of a daemon worker (for spool-worker mode)')
+    parser.add_argument('--batch-file', help='JSON list of operations to run in one process (for batch mode)')
+    parser.add_argument('--stop-on-failure', action='store_true', help='Stop a batch at the first failed operation')
+    parser.add_argument('--log-format', choices=['text', 'json'], help='Log file format (overrides translation-config.json)')
+    parser.add_argument('--base', help='Base commit of the range to detect changes in (for smart-translate mode)')
+    parser.add_argument('--head', help='Head commit of the range to detect changes in (for smart-translate mode)')
     
     args = parser.parse_args()
     
-    manager = TranslationManager(args.config)
-    
-    if args.mode == 'git-hook':
-        success = manager.translate_changed_files()
-        if not success:
-            sys.exit(1)
-    elif args.mode == 'sync-all':
-        success = manager.sync_all_files()
-        if not success:
-            sys.exit(1)
-    elif args.mode == 'github-actions':
-        success = manager.run_github_actions_workflow()
-        if not success:
-            sys.exit(1)
-    elif args.mode == 'smart-translate':
-        success = manager.translate_only_changed_files()
-        if not success:
-            sys.exit(1)
-    elif args.mode == 'translate-file':
-        if not args.source_file or not args.target_lang:
-            logger.error("--source-file and --target-lang are required for translate-file mode")
-            sys.exit(1)
-        success = manager.translate_specific_file(args.source_file, args.target_lang, args.source_lang)
-        if not success:
-            sys.exit(1)
-    elif args.mode == 'translate-lang':
-        if not args.from_lang or not args.to_lang:
-            logger.error("--from-lang and --to-lang are required for translate-lang mode")
-            sys.exit(1)
-        success = manager.translate_between_languages(args.from_lang, args.to_lang)
-        if not success:
-            sys.exit(1)
+    # Imported here because the API module builds on TranslationManager; the session is handed
+    # this module's class, so running translate.py never loads a second copy of it
+    from translation_api import TranslationSession
+    
+    try:
+        translation_config = load_translation_config(args.translation_config)
+        setup_logging(translation_config.get('logging', {}), args.log_format)
+        # The git hook only queues its changes, without setting up the provider or memory
+        spool_config = translation_config.get('spool', {})
+        if args.mode == 'git-hook' and spool_config.get('enabled', True):
+            queued = enqueue_hook_job(spool_config, worker_command(args.config, args.translation_config))
+            sys.exit(0 if queued else 1)
+        session = TranslationSession(args.config, args.translation_config, TranslationManager)
+    except TranslationError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    atexit.register(session.close)
+    atexit.register(session.manager.log_run_metrics)
+    
+    try:
+        if args.mode == 'batch':
+            if not args.batch_file:
+                raise ConfigurationError("--batch-file is required for batch mode")
+            try:
+                with open(args.batch_file, 'r', encoding='utf-8') as f:
+                    operations = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                raise ConfigurationError(f"Could not read batch file {args.batch_file}: {e}")
+            success = session.run_batch(operations, args.stop_on_failure).success
+        else:
+            operation = {name: value for name, value in vars(args).items() if value is not None}
+            success = session.run(operation).success
+    except TranslationError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    
+    if not success:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Translation API for NTR Documentation
+In-process entry point: run one or several translation modes against one warm TranslationManager
+"""
+
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+from translation_errors import TranslationError, ConfigurationError
+from memory_seeding import DEFAULT_MIN_CONFIDENCE
+
+logger = logging.getLogger(__name__)
+
+MODES = ('git-hook', 'sync-all', 'translate-file', 'translate-lang', 'github-actions', 'smart-translate',
+         'add-locale', 'seed-memory', 'check-languages', 'export-cache', 'import-cache', 'spool-worker')
+
+# Arguments each mode requires, named like the translate.py command-line options
+REQUIRED_ARGUMENTS = {
+    'translate-file': ('source_file', 'target_lang'),
+    'translate-lang': ('from_lang', 'to_lang'),
+    'add-locale': ('locale',),
+}
+
+
+@dataclass
+class OperationResult:
+    """Outcome of one translation mode run."""
+    mode: str
+    success: bool
+    translated_files: List[str] = field(default_factory=list)
+    duration_seconds: float = 0.0
+    # Pipeline counters accumulated during this operation only
+    metrics: Dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def raise_for_status(self) -> None:
+        """Raise TranslationError if the operation failed."""
+        if not self.success:
+            raise TranslationError(f"{self.mode} failed" + (f": {self.error}" if self.error else ""))
+
+
+@dataclass
+class BatchResult:
+    """Outcomes of a batch of operations run in one session."""
+    results: List[OperationResult] = field(default_factory=list)
+
+    @property
+    def success(self) -> bool:
+        return all(result.success for result in self.results)
+
+    @property
+    def translated_files(self) -> List[str]:
+        return [path for result in self.results for path in result.translated_files]
+
+
+class TranslationSession:
+    """One TranslationManager shared by several operations.
+
+    The provider session, translation memory, rate controller and git reader are set up
+    once and stay warm across operations. Configuration problems raise
+    ConfigurationError; failed operations are reported in their OperationResult.
+
+        with TranslationSession() as session:
+            session.translate_lang('sv-se', 'en-se').raise_for_status()
+            session.sync_all()
+    """
+
+    def __init__(self, config_path: str = "help-config.json",
+                 translation_config_path: str = "translation-config.json", manager_class: Optional[type] = None):
+        if manager_class is None:
+            # Imported here so translate.py, run as a script, can pass its own TranslationManager
+            # instead of the module being loaded a second time under its import name
+            from translate import TranslationManager as manager_class
+        self.manager = manager_class(config_path, translation_config_path)
+
+    def __enter__(self) -> 'TranslationSession':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.manager.close()
+
+    def metrics(self) -> Dict:
+        """Run metrics of the whole session."""
+        return self.manager.pipeline.metrics()
+
+    def run_operation(self, mode: str, operation: Callable[[], bool]) -> OperationResult:
+        """Run one manager operation and collect what it wrote and cost."""
+        written_before = len(self.manager.written_files)
+        stats_before = self.manager.pipeline.stats.as_dict()
+        started = time.perf_counter()
+        error = None
+        try:
+            success = operation()
+        except TranslationError as e:
+            logger.error(f"{mode} failed: {e}")
+            success, error = False, str(e)
+        stats_after = self.manager.pipeline.stats.as_dict()
+        return OperationResult(
+            mode=mode,
+            success=bool(success),
+            translated_files=self.manager.written_files[written_before:],
+            duration_seconds=time.perf_counter() - started,
+            metrics={name: stats_after[name] - stats_before[name] for name in stats_after},
+            error=error,
+        )
+
+    def translate_lang(self, from_lang: str, to_lang: str) -> OperationResult:
+        return self.run_operation('translate-lang',
+                                  lambda: self.manager.translate_between_languages(from_lang, to_lang))
+
+    def translate_file(self, source_file: str, target_lang: str, source_lang: str = "EN") -> OperationResult:
+        return self.run_operation('translate-file',
+                                  lambda: self.manager.translate_specific_file(source_file, target_lang, source_lang))
+
+    def sync_all(self, resume: bool = False) -> OperationResult:
+        return self.run_operation('sync-all', lambda: self.manager.sync_all_files(resume))
+
+    def smart_translate(self, base: Optional[str] = None, head: Optional[str] = None,
+                        resume: bool = False) -> OperationResult:
+        return self.run_operation('smart-translate',
+                                  lambda: self.manager.translate_only_changed_files(base, head, resume))
+
+    def add_locale(self, locale: str, locale_code: Optional[str] = None, locale_name: Optional[str] = None,
+                   from_lang: Optional[str] = None) -> OperationResult:
+        return self.run_operation('add-locale',
+                                  lambda: self.manager.bootstrap_locale(locale, locale_code, locale_name, from_lang))
+
+    def seed_memory(self, from_lang: Optional[str] = None, to_lang: Optional[str] = None,
+                    min_confidence: Optional[float] = None, report: Optional[str] = None) -> OperationResult:
+        return self.run_operation('seed-memory', lambda: self.manager.seed_memory(
+            from_lang, to_lang, DEFAULT_MIN_CONFIDENCE if min_confidence is None else min_confidence, report
+        ))
+
+    def check_languages(self, report: Optional[str] = None) -> OperationResult:
+        return self.run_operation('check-languages', lambda: self.manager.check_languages(report))
+
+    def export_cache(self, cache_file: Optional[str] = None, max_size_mb: Optional[float] = None) -> OperationResult:
+        return self.run_operation('export-cache',
+                                  lambda: self.manager.export_cache(cache_file, max_size_mb) is not None)
+
+    def import_cache(self, cache_file: Optional[str] = None, conflict: Optional[str] = None) -> OperationResult:
+        return self.run_operation('import-cache', lambda: self.manager.import_cache(cache_file, conflict))
+
+    def git_hook(self) -> OperationResult:
+        """Queue the working tree's changes for a spool worker, or with spool.enabled false translate them now."""
+        if self.manager.translation_config.get('spool', {}).get('enabled', True):
+            return self.run_operation('git-hook', self.manager.queue_changed_files)
+        return self.run_operation('git-hook', self.manager.translate_changed_files)
+
+    def spool_worker(self, daemon: bool = False, poll_seconds: Optional[float] = None) -> OperationResult:
+        return self.run_operation('spool-worker', lambda: self.manager.drain_spool(daemon, poll_seconds))
+
+    def github_actions(self) -> OperationResult:
+        return self.run_operation('github-actions', self.manager.run_github_actions_workflow)
+
+    def run(self, operation: Dict) -> OperationResult:
+        """Run an operation given as a dict: ``mode`` plus the mode's arguments.
+
+        Argument names match the translate.py options (``from_lang``, ``source_file``...).
+        Raises ConfigurationError for an unknown mode or a missing required argument.
+        """
+        self.validate(operation)
+        mode = operation['mode']
+        # Scheduler cut-offs apply to the operation they are given with
+        deadline_minutes = operation.get('deadline_minutes')
+        self.manager.deadline_seconds = deadline_minutes * 60 if deadline_minutes is not None else None
+        self.manager.character_budget = operation.get('character_budget')
+        # So is an app selection (a list, or comma-separated as on the command line)
+        apps = operation.get('apps')
+        if isinstance(apps, str):
+            apps = [app.strip() for app in apps.split(',') if app.strip()]
+        self.manager.apps = apps or self.manager.translation_config.get('apps')
+        if mode == 'git-hook':
+            return self.git_hook()
+        if mode == 'github-actions':
+            return self.github_actions()
+        if mode == 'sync-all':
+            return self.sync_all(operation.get('resume', False))
+        if mode == 'smart-translate':
+            return self.smart_translate(operation.get('base'), operation.get('head'), operation.get('resume', False))
+        if mode == 'translate-file':
+            return self.translate_file(operation['source_file'], operation['target_lang'],
+                                       operation.get('source_lang') or "EN")
+        if mode == 'translate-lang':
+            return self.translate_lang(operation['from_lang'], operation['to_lang'])
+        if mode == 'add-locale':
+            return self.add_locale(operation['locale'], operation.get('locale_code'),
+                                   operation.get('locale_name'), operation.get('from_lang'))
+        if mode == 'seed-memory':
+            return self.seed_memory(operation.get('from_lang'), operation.get('to_lang'),
+                                    operation.get('min_confidence'), operation.get('report'))
+        if mode == 'check-languages':
+            return self.check_languages(operation.get('report'))
+        if mode == 'export-cache':
+            return self.export_cache(operation.get('cache_file'), operation.get('max_size_mb'))
+        if mode == 'import-cache':
+            return self.import_cache(operation.get('cache_file'), operation.get('conflict'))
+        if mode == 'spool-worker':
+            return self.spool_worker(operation.get('daemon', False), operation.get('poll_seconds'))
+        raise ConfigurationError(f"Unknown translation mode: {mode}")
+
+    def validate(self, operation: Dict) -> None:
+        """Raise ConfigurationError unless operation names a known mode with its required arguments."""
+        mode = operation.get('mode')
+        if mode not in MODES:
+            raise ConfigurationError(f"Unknown translation mode: {mode}")
+        missing = [name for name in REQUIRED_ARGUMENTS.get(mode, ()) if not operation.get(name)]
+        if missing:
+            options = ' and '.join('--' + name.replace('_', '-') for name in missing)
+            raise ConfigurationError(f"{options} {'is' if len(missing) == 1 else 'are'} required for {mode} mode")
+
+    def run_batch(self, operations: Iterable[Dict], stop_on_failure: bool = False) -> BatchResult:
+        """Run several operations in order in this session.
+
+        Every operation is validated before the first one starts.
+        """
+        operations = list(operations)
+        for operation in operations:
+            self.validate(operation)
+        batch = BatchResult()
+        for operation in operations:
+            result = self.run(operation)
+            batch.results.append(result)
+            logger.info(f"{result.mode}: {'succeeded' if result.success else 'failed'}, "
+                        f"{len(result.translated_files)} files written in {result.duration_seconds:.2f}s")
+            if not result.success and stop_on_failure:
+                break
+        return batch
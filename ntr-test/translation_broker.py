@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Translation Broker for NTR Documentation
+Local daemon that owns the provider session, rate limiter and translation memory for every
+translation process on the machine, translating each in-flight segment only once
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import asyncio
+import logging
+import argparse
+import subprocess
+from dataclasses import asdict
+from typing import Dict, List, Optional, Tuple
+
+from translation_errors import ConfigurationError, ProviderError, TranslationError
+from translation_memory import TranslationMemory, DEFAULT_MEMORY_PATH
+from translation_pipeline import TranslationPipeline
+from rate_control import RateController
+from translation_providers import ProviderCapabilities, TranslationProvider, create_provider
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_PATH = ".translation-broker.sock"
+# A broker nobody connected to for this long exits
+DEFAULT_IDLE_MINUTES = 30
+# How long a client waits for a broker it started to come up
+STARTUP_SECONDS = 10
+PROTOCOL_VERSION = 1
+# Longest request or response line (one JSON message per line)
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+# (source_lang, target_lang, tag_handling, text) of a segment being translated
+FlightKey = Tuple[str, str, Optional[str], str]
+
+
+def unix_sockets_supported() -> bool:
+    return hasattr(socket, 'AF_UNIX') and hasattr(asyncio, 'start_unix_server')
+
+
+class TranslationBroker:
+    """Serves translation requests of local TranslationManagers over a Unix socket.
+
+    Requests and responses are JSON objects, one per line. All requests share one
+    provider, rate controller and translation memory, so concurrent runs neither pay
+    twice for a segment nor throttle each other. A segment requested while the same
+    segment is already being translated waits for that translation (single-flight)
+    instead of being sent again.
+    """
+
+    def __init__(self, translation_config: Dict, socket_path: str = DEFAULT_SOCKET_PATH,
+                 idle_seconds: Optional[float] = DEFAULT_IDLE_MINUTES * 60):
+        self.socket_path = socket_path
+        self.idle_seconds = idle_seconds
+        pipeline_config = translation_config.get('pipeline', {})
+        self.provider = create_provider(translation_config)
+        self.memory = TranslationMemory(pipeline_config.get('memory_file', DEFAULT_MEMORY_PATH))
+        self.pipeline = TranslationPipeline(
+            self.provider, self.memory,
+            RateController.from_config(self.provider.capabilities, translation_config.get('rate_control', {})),
+            pipeline_config.get('fuzzy_threshold')
+        )
+        self.in_flight: Dict[FlightKey, asyncio.Future] = {}
+        # Segments served from another request's provider call
+        self.coalesced = 0
+        self.requests = 0
+        self.connections = 0
+        self.last_activity = time.monotonic()
+        self.stopping: Optional[asyncio.Event] = None
+
+    async def translate(self, texts: List[str], source_lang: str, target_lang: str,
+                        tag_handling: Optional[str] = None) -> Tuple[List[str], int]:
+        """Translations of texts, and how many of them came from other requests' calls."""
+        loop = asyncio.get_running_loop()
+        owned: Dict[str, FlightKey] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+        for text in dict.fromkeys(texts):
+            key = (source_lang, target_lang, tag_handling, text)
+            if key in self.in_flight:
+                waiting[text] = self.in_flight[key]
+            else:
+                self.in_flight[key] = loop.create_future()
+                owned[text] = key
+
+        results: Dict[str, str] = {}
+        if owned:
+            try:
+                translations = await self.pipeline.translate(list(owned), source_lang, target_lang, tag_handling)
+            except BaseException as e:
+                for key in owned.values():
+                    future = self.in_flight.pop(key)
+                    if isinstance(e, asyncio.CancelledError):
+                        future.cancel()
+                        continue
+                    future.set_exception(e)
+                    # Marks the exception retrieved when no other request waits for it
+                    future.exception()
+                raise
+            for (text, key), translation in zip(owned.items(), translations):
+                self.in_flight.pop(key).set_result(translation)
+                results[text] = translation
+        for text, future in waiting.items():
+            results[text] = await future
+        self.coalesced += len(waiting)
+        return [results[text] for text in texts], len(waiting)
+
+    def hello(self) -> Dict:
+        return {
+            'version': PROTOCOL_VERSION,
+            'pid': os.getpid(),
+            'provider': self.provider.name,
+            'available': self.provider.is_available(),
+            'capabilities': asdict(self.provider.capabilities),
+        }
+
+    def metrics(self) -> Dict:
+        return {**self.pipeline.metrics(), 'requests': self.requests, 'coalesced': self.coalesced,
+                'in_flight_segments': len(self.in_flight)}
+
+    async def dispatch(self, request: Dict) -> Dict:
+        operation = request['op']
+        if operation == 'hello':
+            return self.hello()
+        if operation == 'supports':
+            return {'supported': self.provider.supports(request['source_lang'], request['target_lang'])}
+        if operation == 'translate':
+            self.requests += 1
+            translations, coalesced = await self.translate(request['texts'], request['source_lang'],
+                                                           request['target_lang'], request.get('tag_handling'))
+            return {'translations': translations, 'coalesced': coalesced}
+        if operation == 'stats':
+            return self.metrics()
+        if operation == 'shutdown':
+            self.stopping.set()
+            return {}
+        raise ConfigurationError(f"Unknown broker operation '{operation}'")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            await self.serve_connection(reader, writer)
+        except asyncio.CancelledError:
+            # Connections still open when the broker shuts down
+            pass
+        finally:
+            self.connections -= 1
+            self.last_activity = time.monotonic()
+            writer.close()
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        while True:
+            try:
+                line = await reader.readline()
+            except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+                logger.warning(f"Dropping broker connection: {e}")
+                break
+            if not line:
+                break
+            self.last_activity = time.monotonic()
+            try:
+                response = {'ok': True, **await self.dispatch(json.loads(line))}
+            except ProviderError as e:
+                response = {'ok': False, 'error': str(e), 'status_code': e.status_code}
+            except TranslationError as e:
+                response = {'ok': False, 'error': str(e)}
+            except (ValueError, KeyError, TypeError) as e:
+                response = {'ok': False, 'error': f"Invalid broker request: {e}"}
+            except Exception as e:
+                logger.exception("Translation broker request failed")
+                response = {'ok': False, 'error': f"Translation broker error: {e}"}
+            writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+            try:
+                await writer.drain()
+            except ConnectionError:
+                break
+
+    async def serve(self) -> None:
+        """Serve until shut down, signalled or idle for idle_seconds."""
+        if not unix_sockets_supported():
+            raise ConfigurationError("The translation broker needs Unix domain sockets")
+        if os.path.exists(self.socket_path):
+            if BrokerClient(self.socket_path).hello() is not None:
+                raise ConfigurationError(f"A translation broker is already serving {self.socket_path}")
+            # Left behind by a broker that did not exit cleanly
+            os.remove(self.socket_path)
+
+        self.stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self.stopping.set)
+        server = await asyncio.start_unix_server(self.handle, path=self.socket_path, limit=MAX_MESSAGE_BYTES)
+        os.chmod(self.socket_path, 0o600)
+        logger.info(f"Translation broker serving {self.socket_path} with provider '{self.provider.name}'")
+        try:
+            while not self.stopping.is_set():
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), timeout=5)
+                except asyncio.TimeoutError:
+                    pass
+                idle = time.monotonic() - self.last_activity
+                if self.idle_seconds and not self.connections and not self.in_flight and idle >= self.idle_seconds:
+                    logger.info(f"Translation broker idle for {idle / 60:.0f} minutes, exiting")
+                    break
+        finally:
+            server.close()
+            await server.wait_closed()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            logger.info(f"Translation broker metrics: {json.dumps(self.metrics())}")
+            await self.provider.close()
+            self.memory.close()
+
+
+class BrokerClient:
+    """Blocking client for one-off broker requests (hello, stats, shutdown)."""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, timeout: float = 5.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def request(self, request: Dict) -> Dict:
+        """Send one request and return the response. Raises TranslationError if it fails."""
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+                connection.settimeout(self.timeout)
+                connection.connect(self.socket_path)
+                connection.sendall(json.dumps(request).encode('utf-8') + b'\n')
+                with connection.makefile('rb') as stream:
+                    line = stream.readline()
+        except OSError as e:
+            raise TranslationError(f"Translation broker at {self.socket_path} not reachable: {e}")
+        if not line:
+            raise TranslationError("Translation broker closed the connection")
+        response = json.loads(line)
+        if not response.pop('ok', False):
+            raise TranslationError(f"Translation broker: {response.get('error')}")
+        return response
+
+    def hello(self) -> Optional[Dict]:
+        """The broker's description, or None if no compatible broker answers."""
+        if not unix_sockets_supported() or not os.path.exists(self.socket_path):
+            return None
+        try:
+            info = self.request({'op': 'hello'})
+        except (TranslationError, ValueError):
+            return None
+        return info if info.get('version') == PROTOCOL_VERSION else None
+
+
+class BrokerProvider(TranslationProvider):
+    """Provider that forwards batches to the local translation broker.
+
+    Retries and rate limits are the broker's business, so its errors are not retried
+    here; only a lost connection is (as a retryable ProviderError).
+    """
+    name = "broker"
+
+    def __init__(self, socket_path: str, info: Dict):
+        super().__init__()
+        self.socket_path = socket_path
+        self.info = info
+        self.supported: Dict[Tuple[str, str], bool] = {}
+        self.requests = 0
+        self.coalesced = 0
+
+    @property
+    def capabilities(self) -> ProviderCapabilities:
+        capabilities = self.info['capabilities']
+        # The broker's rate controller applies the provider's rate limits
+        return ProviderCapabilities(
+            max_batch_size=capabilities['max_batch_size'],
+            max_request_bytes=capabilities['max_request_bytes'],
+            tag_handling=tuple(capabilities['tag_handling']),
+        )
+
+    def is_available(self) -> bool:
+        return self.info['available']
+
+    def supports(self, source_lang: str, target_lang: str) -> bool:
+        pair = (source_lang, target_lang)
+        if pair not in self.supported:
+            request = {'op': 'supports', 'source_lang': source_lang, 'target_lang': target_lang}
+            self.supported[pair] = BrokerClient(self.socket_path).request(request)['supported']
+        return self.supported[pair]
+
+    async def translate_batch(self, segments: List[str], source_lang: str,
+                              target_lang: str, tag_handling: Optional[str] = None) -> List[str]:
+        request = {'op': 'translate', 'texts': segments, 'source_lang': source_lang,
+                   'target_lang': target_lang, 'tag_handling': tag_handling}
+        try:
+            reader, writer = await asyncio.open_unix_connection(self.socket_path, limit=MAX_MESSAGE_BYTES)
+        except OSError as e:
+            raise ProviderError(f"Translation broker not reachable: {e}") from e
+        try:
+            writer.write(json.dumps(request, ensure_ascii=False).encode('utf-8') + b'\n')
+            await writer.drain()
+            line = await reader.readline()
+        except (OSError, asyncio.LimitOverrunError, ValueError) as e:
+            raise ProviderError(f"Translation broker connection failed: {e}") from e
+        finally:
+            writer.close()
+        if not line:
+            raise ProviderError("Translation broker closed the connection")
+        response = json.loads(line)
+        if not response.get('ok'):
+            raise TranslationError(f"Translation broker ({self.info['provider']}): {response.get('error')}")
+        self.requests += 1
+        self.coalesced += response['coalesced']
+        return response['translations']
+
+    def metrics(self) -> Dict:
+        return {'broker': {'provider': self.info['provider'], 'pid': self.info['pid'],
+                           'requests': self.requests, 'coalesced': self.coalesced}}
+
+
+def connect_broker(broker_config: Dict, translation_config_path: str = "translation-config.json") -> Optional[BrokerProvider]:
+    """Provider talking to the configured broker, or None to call the provider directly.
+
+    With start_broker set, a broker that is not running is started in the background.
+    """
+    if not broker_config.get('enabled', False) or not unix_sockets_supported():
+        return None
+    socket_path = broker_config.get('socket', DEFAULT_SOCKET_PATH)
+    client = BrokerClient(socket_path)
+    info = client.hello()
+    if info is None and broker_config.get('start_broker', False):
+        command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'translation_broker.py'),
+                   '--translation-config', translation_config_path, '--socket', socket_path,
+                   '--idle-minutes', str(broker_config.get('idle_minutes', DEFAULT_IDLE_MINUTES))]
+        try:
+            # Detached, so the broker outlives the run that started it
+            subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.DEVNULL, start_new_session=True)
+        except OSError as e:
+            logger.warning(f"Could not start the translation broker: {e}")
+        deadline = time.monotonic() + STARTUP_SECONDS
+        while info is None and time.monotonic() < deadline:
+            time.sleep(0.1)
+            info = client.hello()
+    if info is None:
+        logger.info(f"No translation broker at {socket_path}; calling the provider directly")
+        return None
+    logger.info(f"Using translation broker {socket_path} (pid {info['pid']}, provider '{info['provider']}')")
+    return BrokerProvider(socket_path, info)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared translation broker for NTR Documentation")
+    parser.add_argument('--translation-config', default='translation-config.json', help='Translation settings file path')
+    parser.add_argument('--socket', help='Unix socket to serve (default: broker.socket in translation-config.json)')
+    parser.add_argument('--idle-minutes', type=float, help='Exit after this many minutes without requests (0: never)')
+    parser.add_argument('--stats', action='store_true', help='Print the metrics of the running broker')
+    parser.add_argument('--stop', action='store_true', help='Shut the running broker down')
+
+    args = parser.parse_args()
+
+    # Imported here because translate.py builds on the pipeline modules this one uses
+    from translate import load_translation_config
+    from translation_logging import setup_logging
+
+    translation_config = load_translation_config(args.translation_config)
+    broker_config = translation_config.get('broker', {})
+    socket_path = args.socket or broker_config.get('socket', DEFAULT_SOCKET_PATH)
+    setup_logging(translation_config.get('logging', {}))
+
+    try:
+        if args.stats or args.stop:
+            response = BrokerClient(socket_path).request({'op': 'stats' if args.stats else 'shutdown'})
+            if args.stats:
+                print(json.dumps(response, indent=2))
+            return
+        idle_minutes = args.idle_minutes if args.idle_minutes is not None else broker_config.get('idle_minutes', DEFAULT_IDLE_MINUTES)
+        broker = TranslationBroker(translation_config, socket_path, idle_minutes * 60 if idle_minutes else None)
+        asyncio.run(broker.serve())
+    except TranslationError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Translation Cache Artifacts for NTR Documentation
+Deterministic, content-addressed export and import of the translation memory and manifest,
+so ephemeral CI runners can start with a warm cache
+"""
+
+import os
+import io
+import gzip
+import json
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from translation_errors import TranslationError
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT = "ntr-translation-cache"
+CACHE_VERSION = 1
+# Usage times are stored per day, so re-exporting unchanged content gives identical bytes
+TIME_RESOLUTION_SECONDS = 86400
+
+Row = Tuple[str, str, str, str, float, float]
+
+
+def content_hash(rows: List[Row], manifest: Dict) -> str:
+    """Hash of the translations and manifest an artifact carries (usage times excluded)."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(manifest, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    for source_lang, target_lang, source_text, target_text, _, _ in rows:
+        digest.update(json.dumps([source_lang, target_lang, source_text, target_text],
+                                 ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def write_artifact(path: str, rows: List[Row], manifest: Dict) -> str:
+    """Write rows and manifest as one gzip-compressed JSON-lines artifact.
+
+    If path is a directory, the file is named after the content hash. Returns the file written.
+    """
+    rows = [(source_lang, target_lang, source_text, target_text,
+             int(created_at // TIME_RESOLUTION_SECONDS * TIME_RESOLUTION_SECONDS),
+             int(last_used // TIME_RESOLUTION_SECONDS * TIME_RESOLUTION_SECONDS))
+            for source_lang, target_lang, source_text, target_text, created_at, last_used in rows]
+    digest = content_hash(rows, manifest)
+    if os.path.isdir(path):
+        path = os.path.join(path, f"translation-cache-{digest[:16]}.jsonl.gz")
+
+    buffer = io.BytesIO()
+    # Fixed mtime and no file name in the gzip header keep the output byte-identical
+    with gzip.GzipFile(filename='', mode='wb', fileobj=buffer, mtime=0) as archive:
+        header = {'format': CACHE_FORMAT, 'version': CACHE_VERSION, 'content_hash': digest,
+                  'segments': len(rows), 'manifest': manifest}
+        archive.write((json.dumps(header, sort_keys=True, ensure_ascii=False) + '\n').encode('utf-8'))
+        for row in rows:
+            archive.write((json.dumps(row, ensure_ascii=False) + '\n').encode('utf-8'))
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(buffer.getvalue())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return path
+
+
+def read_artifact(path: str) -> Tuple[Dict, List[Row]]:
+    """Read an artifact, returning its header and rows. Raises TranslationError if it is invalid."""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as archive:
+            header = json.loads(archive.readline())
+            rows = [tuple(json.loads(line)) for line in archive]
+    except (OSError, EOFError, json.JSONDecodeError) as e:
+        raise TranslationError(f"Could not read translation cache {path}: {e}")
+
+    if header.get('format') != CACHE_FORMAT or header.get('version') != CACHE_VERSION:
+        raise TranslationError(f"{path} is not a version {CACHE_VERSION} translation cache")
+    if content_hash(rows, header.get('manifest', {})) != header.get('content_hash'):
+        raise TranslationError(f"Translation cache {path} is corrupt (content hash mismatch)")
+    return header, rows
+
+
+def latest_artifact(directory: str) -> Optional[str]:
+    """Most recently written artifact in directory, if any."""
+    if not os.path.isdir(directory):
+        return None
+    candidates = [os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.startswith('translation-cache-') and name.endswith('.jsonl.gz')]
+    return max(candidates, key=os.path.getmtime) if candidates else None
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Exceptions raised by the NTR documentation translation tooling
+"""
+
+from typing import Optional
+
+
+class TranslationError(Exception):
+    """Base class for all translation tooling errors."""
+
+
+class ProviderError(TranslationError):
+    """A translation provider request failed."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None,
+                 retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        """Whether the request may succeed if sent again (throttling, server or network errors)."""
+        return self.status_code is None or self.status_code == 429 or self.status_code >= 500
+
+
+class ConfigurationError(TranslationError):
+    """A configuration file or requested operation is invalid."""
+
+
+class GitError(TranslationError):
+    """A git command failed."""
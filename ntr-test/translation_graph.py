@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Translation Graph for NTR Documentation
+Decides which locale translates into which (hub-and-spoke, explicit DAG or all pairs), so the
+number of translation directions grows linearly with the number of locales
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from translation_errors import ConfigurationError
+
+logger = logging.getLogger(__name__)
+
+GRAPH_MODES = ('hub', 'dag', 'all-pairs')
+
+
+@dataclass
+class Direction:
+    """One planned translation direction for a page."""
+    source: str
+    target: str
+    # Directions run in stage order; a stage translates pages written by earlier stages onward
+    stage: int = 0
+
+
+class TranslationGraph:
+    """Directed graph of translation directions between locales.
+
+    hub:       every locale translates to and from one pivot locale (``hub``, default
+               languages.default_source); with ``bidirectional`` false only from it.
+    dag:       explicit ``edges``: {"source locale": ["target locale", ...]}.
+    all-pairs: every locale into every other locale (N x (N-1) directions).
+    """
+
+    def __init__(self, locales: List[str], settings: Optional[Dict] = None,
+                 default_source: Optional[str] = None, bidirectional: bool = True):
+        settings = settings or {}
+        self.locales = list(locales)
+        self.mode = settings.get('mode', 'hub' if default_source in self.locales else 'all-pairs')
+        if self.mode not in GRAPH_MODES:
+            raise ConfigurationError(f"Unknown translation graph mode '{self.mode}' (expected one of {', '.join(GRAPH_MODES)})")
+
+        self.edges: Dict[str, List[str]] = {locale: [] for locale in self.locales}
+        if self.mode == 'hub':
+            self.hub = settings.get('hub', default_source)
+            if self.hub not in self.locales:
+                raise ConfigurationError(f"Translation graph hub '{self.hub}' is not a configured locale")
+            for locale in self.locales:
+                if locale != self.hub:
+                    self.edges[self.hub].append(locale)
+                    if bidirectional:
+                        self.edges[locale].append(self.hub)
+        elif self.mode == 'dag':
+            for source, targets in settings.get('edges', {}).items():
+                for target in targets:
+                    if source not in self.edges or target not in self.edges or source == target:
+                        raise ConfigurationError(f"Translation graph edge {source} → {target} "
+                                                 "does not connect two configured locales")
+                    self.edges[source].append(target)
+            # Locales added later (add-locale) hang off the pivot until the DAG lists them
+            if default_source in self.edges:
+                for locale in self.locales:
+                    if locale != default_source and not any(locale in targets for targets in self.edges.values()):
+                        self.edges[default_source].append(locale)
+        else:
+            for source in self.locales:
+                self.edges[source] = [target for target in self.locales if target != source]
+
+    @classmethod
+    def from_config(cls, locales: List[str], languages_config: Dict) -> 'TranslationGraph':
+        """Build the graph from the ``languages`` section of translation-config.json."""
+        return cls(locales, languages_config.get('graph', {}), languages_config.get('default_source'),
+                   languages_config.get('bidirectional', True))
+
+    def targets(self, locale: str) -> List[str]:
+        return self.edges.get(locale, [])
+
+    def routes(self, source: str, target: str) -> bool:
+        """Whether the graph translates source directly into target."""
+        return target in self.edges.get(source, [])
+
+    def plan(self, sources: List[str]) -> Tuple[List[Direction], Dict[str, List[str]]]:
+        """Directions that carry the pages of sources (the locales that changed) to every locale.
+
+        Sources translate into all their targets; locales reached that way then pass the
+        change on to locales not reached yet, so every other locale is written once.
+        Returns the directions in stage order, and the contested locales: those that are
+        not sources but would be written from more than one source (concurrent edits).
+        """
+        sources = [locale for locale in self.locales if locale in sources]
+        directions: List[Direction] = []
+        incoming: Dict[str, List[str]] = {}
+        for source in sources:
+            for target in self.targets(source):
+                directions.append(Direction(source, target))
+                incoming.setdefault(target, []).append(source)
+        contested = {target: froms for target, froms in incoming.items()
+                     if len(froms) > 1 and target not in sources}
+        directions = [direction for direction in directions if direction.target not in contested]
+
+        reached = set(sources) | set(incoming)
+        frontier = [locale for locale in incoming if locale not in sources and locale not in contested]
+        while frontier:
+            next_frontier = []
+            for locale in frontier:
+                for target in self.targets(locale):
+                    if target not in reached:
+                        reached.add(target)
+                        directions.append(Direction(locale, target))
+                        next_frontier.append(target)
+            frontier = next_frontier
+
+        # A direction runs after every direction writing its source page, except one coming
+        # back from its own target (the reverse of a bidirectional edge)
+        for _ in range(len(self.locales)):
+            changed = False
+            for direction in directions:
+                stage = max((other.stage + 1 for other in directions
+                             if other.target == direction.source and other.source != direction.target),
+                            default=0)
+                if stage > direction.stage and stage < len(self.locales):
+                    direction.stage = stage
+                    changed = True
+            if not changed:
+                break
+        directions.sort(key=lambda direction: direction.stage)
+        return directions, contested
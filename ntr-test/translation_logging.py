@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Logging Setup for NTR Documentation translation runs
+Non-blocking, rotating log output with optional JSON-lines records
+"""
+
+import json
+import uuid
+import queue
+import atexit
+import logging
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Iterator, Optional
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - [%(run_id)s%(job_tag)s] %(message)s'
+
+# Fields of the job the current task is working on (source, target, languages, ...)
+current_job: contextvars.ContextVar = contextvars.ContextVar('current_job', default={})
+
+
+@contextmanager
+def job_context(**fields) -> Iterator[None]:
+    """Attach job fields to every log record emitted inside the block (including from async tasks)."""
+    token = current_job.set({**current_job.get(), **fields})
+    try:
+        yield
+    finally:
+        current_job.reset(token)
+
+
+class RunContextFilter(logging.Filter):
+    """Adds the run ID and current job fields to each record before it is queued."""
+
+    def __init__(self, run_id: str):
+        super().__init__()
+        self.run_id = run_id
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        job = current_job.get()
+        record.run_id = self.run_id
+        record.job = job
+        tag = f"{job['source']}→{job.get('target', '')}" if 'source' in job else ''
+        if job.get('app'):
+            tag = f"{job['app']}:{tag}" if tag else job['app']
+        record.job_tag = f" {tag}" if tag else ''
+        return True
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per line, with run ID and job fields as top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'run_id': getattr(record, 'run_id', None),
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'job', {}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def setup_logging(logging_config: Optional[Dict] = None, log_format: Optional[str] = None,
+                  run_id: Optional[str] = None) -> QueueListener:
+    """Route all logging through a queue to a background thread that writes the files.
+
+    The log file rotates at ``max_size_mb`` keeping ``backup_count`` backups, as set in
+    translation-config.json. ``log_format`` ('text' or 'json') overrides the config.
+    """
+    logging_config = logging_config or {}
+    run_id = run_id or uuid.uuid4().hex[:12]
+    log_format = log_format or logging_config.get('format', 'text')
+
+    file_handler = RotatingFileHandler(
+        logging_config.get('file', 'translation.log'),
+        maxBytes=int(logging_config.get('max_size_mb', 10) * 1024 * 1024),
+        backupCount=logging_config.get('backup_count', 5),
+        encoding='utf-8'
+    )
+    file_handler.setFormatter(JsonLinesFormatter() if log_format == 'json' else logging.Formatter(TEXT_FORMAT))
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(RunContextFilter(run_id))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(logging_config.get('level', 'INFO'))
+
+    # One writer thread: records from concurrent jobs are written whole and never interleave
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
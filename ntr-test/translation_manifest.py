@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Translation Manifest for NTR Documentation
+Persists translation state between runs (e.g. the last processed commit)
+"""
+
+import os
+import json
+import logging
+from typing import Dict, Optional
+
+from file_utils import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MANIFEST_PATH = ".translation-manifest.json"
+
+
+class TranslationManifest:
+    def __init__(self, path: str = DEFAULT_MANIFEST_PATH):
+        self.path = path
+        self.data = self.load()
+
+    def load(self) -> Dict:
+        """Load the manifest, starting empty if it does not exist or is unreadable."""
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not read translation manifest {self.path}: {e}. Starting fresh.")
+            return {}
+
+    def save(self) -> None:
+        """Write the manifest atomically so an interrupted run never leaves it truncated."""
+        atomic_write_text(self.path, json.dumps(self.data, indent=2, ensure_ascii=False, sort_keys=True))
+
+    @property
+    def last_processed_commit(self) -> Optional[str]:
+        """Commit SHA the last successful change-detection run processed up to."""
+        return self.data.get('last_processed_commit')
+
+    @last_processed_commit.setter
+    def last_processed_commit(self, sha: str) -> None:
+        self.data['last_processed_commit'] = sha
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Translation Memory for NTR Documentation
+Persistent store of translated segments so unchanged text is never paid for twice
+"""
+
+import time
+import sqlite3
+import hashlib
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fuzzy_matching import (
+    FuzzyMatch, MIN_FUZZY_LENGTH, band_keys, jaccard, normalize, shingles, signature
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_PATH = ".translation-memory.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    source_lang TEXT NOT NULL,
+    target_lang TEXT NOT NULL,
+    source_hash TEXT NOT NULL,
+    source_text TEXT NOT NULL,
+    target_text TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    normalized_hash TEXT,
+    PRIMARY KEY (source_lang, target_lang, source_hash)
+);
+CREATE TABLE IF NOT EXISTS fuzzy_bands (
+    source_lang TEXT NOT NULL,
+    target_lang TEXT NOT NULL,
+    band_key INTEGER NOT NULL,
+    source_hash TEXT NOT NULL,
+    PRIMARY KEY (source_lang, target_lang, band_key, source_hash)
+) WITHOUT ROWID;
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS segments_normalized ON segments (source_lang, target_lang, normalized_hash);
+"""
+
+# Candidates verified per fuzzy lookup, best LSH band agreement first
+MAX_FUZZY_CANDIDATES = 8
+
+
+def segment_hash(text: str) -> str:
+    """Content hash used as the exact-match key of a segment."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class TranslationMemory:
+    def __init__(self, path: str = DEFAULT_MEMORY_PATH):
+        self.path = path
+        # The pipeline and broker access the memory from worker threads
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        self.migrate()
+        self.connection.executescript(INDEXES)
+        self.connection.commit()
+    
+    def migrate(self) -> None:
+        """Add the fuzzy-match columns to memories created before fuzzy matching existed."""
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(segments)")}
+        if 'normalized_hash' in columns:
+            return
+        logger.info(f"Building fuzzy match index for {self.path}")
+        self.connection.execute("ALTER TABLE segments ADD COLUMN normalized_hash TEXT")
+        rows = self.connection.execute("SELECT source_lang, target_lang, source_text FROM segments").fetchall()
+        self.index_fuzzy(rows)
+
+    def lookup(self, source_lang: str, target_lang: str, text: str) -> Optional[str]:
+        """Return the stored translation of text, or None."""
+        return self.lookup_many(source_lang, target_lang, [text]).get(text)
+
+    def lookup_many(self, source_lang: str, target_lang: str, texts: Iterable[str],
+                    touch: bool = True) -> Dict[str, str]:
+        """Return stored translations for the given texts, keyed by source text."""
+        by_hash = {segment_hash(text): text for text in texts}
+        found = {}
+        hashes = list(by_hash)
+        # Stay below SQLite's bound-parameter limit
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            rows = self.connection.execute(
+                f"SELECT source_hash, target_text FROM segments "
+                f"WHERE source_lang = ? AND target_lang = ? AND source_hash IN ({','.join('?' * len(chunk))})",
+                [source_lang, target_lang, *chunk]
+            ).fetchall()
+            for source_hash, target_text in rows:
+                found[by_hash[source_hash]] = target_text
+        if found and touch:
+            self.touch(source_lang, target_lang, [segment_hash(text) for text in found])
+        return found
+
+    def touch(self, source_lang: str, target_lang: str, hashes: List[str]) -> None:
+        """Mark entries as recently used."""
+        now = time.time()
+        self.connection.executemany(
+            "UPDATE segments SET last_used = ? WHERE source_lang = ? AND target_lang = ? AND source_hash = ?",
+            [(now, source_lang, target_lang, source_hash) for source_hash in hashes]
+        )
+        self.connection.commit()
+
+    def store_many(self, source_lang: str, target_lang: str, pairs: Iterable[Tuple[str, str]]) -> None:
+        """Store (source_text, target_text) pairs, committing immediately."""
+        pairs = list(pairs)
+        now = time.time()
+        self.connection.executemany(
+            "INSERT INTO segments (source_lang, target_lang, source_hash, source_text, target_text, created_at, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (source_lang, target_lang, source_hash) DO UPDATE SET "
+            "target_text = excluded.target_text, last_used = excluded.last_used",
+            [(source_lang, target_lang, segment_hash(source), source, target, now, now) for source, target in pairs]
+        )
+        self.index_fuzzy([(source_lang, target_lang, source) for source, _ in pairs])
+        self.connection.commit()
+    
+    def index_fuzzy(self, rows: Iterable[Tuple[str, str, str]]) -> None:
+        """Add (source_lang, target_lang, source_text) rows to the fuzzy match index."""
+        normalized, bands = [], []
+        for source_lang, target_lang, text in rows:
+            if len(text) < MIN_FUZZY_LENGTH:
+                continue
+            source_hash = segment_hash(text)
+            normalized.append((segment_hash(normalize(text)), source_lang, target_lang, source_hash))
+            bands.extend(
+                (source_lang, target_lang, key, source_hash)
+                for key in band_keys(signature(shingles(text)))
+            )
+        self.connection.executemany(
+            "UPDATE segments SET normalized_hash = ? WHERE source_lang = ? AND target_lang = ? AND source_hash = ?",
+            normalized
+        )
+        self.connection.executemany("INSERT OR IGNORE INTO fuzzy_bands VALUES (?, ?, ?, ?)", bands)
+    
+    def fuzzy_lookup(self, source_lang: str, target_lang: str, text: str,
+                     threshold: float) -> Optional[FuzzyMatch]:
+        """Find the stored segment most similar to text, if any reaches threshold.
+        
+        Segments equal up to case, punctuation and whitespace are found with one indexed
+        lookup; other candidates come from the LSH bands and are verified by n-gram
+        Jaccard similarity.
+        """
+        if len(text) < MIN_FUZZY_LENGTH:
+            return None
+        grams = shingles(text)
+        
+        row = self.connection.execute(
+            "SELECT source_text, target_text FROM segments "
+            "WHERE source_lang = ? AND target_lang = ? AND normalized_hash = ? LIMIT 1",
+            (source_lang, target_lang, segment_hash(normalize(text)))
+        ).fetchone()
+        if row:
+            return FuzzyMatch(row[0], row[1], jaccard(grams, shingles(row[0])))
+        
+        keys = band_keys(signature(grams))
+        if not keys:
+            return None
+        candidates = self.connection.execute(
+            f"SELECT s.source_text, s.target_text FROM segments s JOIN ("
+            f"  SELECT source_hash, COUNT(*) AS shared FROM fuzzy_bands "
+            f"  WHERE source_lang = ? AND target_lang = ? AND band_key IN ({','.join('?' * len(keys))}) "
+            f"  GROUP BY source_hash ORDER BY shared DESC LIMIT {MAX_FUZZY_CANDIDATES}"
+            f") b ON s.source_hash = b.source_hash "
+            f"WHERE s.source_lang = ? AND s.target_lang = ?",
+            [source_lang, target_lang, *keys, source_lang, target_lang]
+        ).fetchall()
+        
+        best = None
+        for source_text, target_text in candidates:
+            similarity = jaccard(grams, shingles(source_text))
+            if similarity >= threshold and (best is None or similarity > best.similarity):
+                best = FuzzyMatch(source_text, target_text, similarity)
+        return best
+
+    def export_rows(self, max_bytes: Optional[int] = None) -> List[Tuple[str, str, str, str, float, float]]:
+        """All (source_lang, target_lang, source_text, target_text, created_at, last_used) rows.
+        
+        With max_bytes, only the most recently used rows whose text fits the budget are
+        returned. Rows are sorted by key so exports of the same content are identical.
+        """
+        rows = self.connection.execute(
+            "SELECT source_lang, target_lang, source_text, target_text, created_at, last_used, source_hash "
+            "FROM segments ORDER BY last_used DESC, source_hash"
+        ).fetchall()
+        if max_bytes is not None:
+            kept, size = [], 0
+            for row in rows:
+                size += len(row[2].encode('utf-8')) + len(row[3].encode('utf-8'))
+                if size > max_bytes:
+                    break
+                kept.append(row)
+            rows = kept
+        rows.sort(key=lambda row: (row[0], row[1], row[6]))
+        return [row[:6] for row in rows]
+    
+    def import_rows(self, rows: Iterable[Tuple[str, str, str, str, float, float]],
+                    conflict: str = 'newest') -> Dict[str, int]:
+        """Merge rows from another memory; counts of added, updated and kept entries.
+        
+        When both memories translate a segment differently, ``conflict`` decides: 'newest'
+        keeps the more recently created translation, 'local' keeps ours, 'incoming' takes theirs.
+        """
+        counts = {'added': 0, 'updated': 0, 'kept': 0}
+        upserts, indexed = [], []
+        for source_lang, target_lang, source_text, target_text, created_at, last_used in rows:
+            source_hash = segment_hash(source_text)
+            existing = self.connection.execute(
+                "SELECT target_text, created_at, last_used FROM segments "
+                "WHERE source_lang = ? AND target_lang = ? AND source_hash = ?",
+                (source_lang, target_lang, source_hash)
+            ).fetchone()
+            if existing is None:
+                counts['added'] += 1
+                indexed.append((source_lang, target_lang, source_text))
+            elif existing[0] == target_text:
+                # Same translation: only keep the later usage time for LRU pruning
+                last_used = max(last_used, existing[2])
+                created_at = min(created_at, existing[1])
+            elif conflict == 'incoming' or (conflict == 'newest' and created_at > existing[1]):
+                counts['updated'] += 1
+            else:
+                counts['kept'] += 1
+                continue
+            upserts.append((source_lang, target_lang, source_hash, source_text, target_text, created_at, last_used))
+        self.connection.executemany(
+            "INSERT INTO segments (source_lang, target_lang, source_hash, source_text, target_text, created_at, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (source_lang, target_lang, source_hash) DO UPDATE SET "
+            "target_text = excluded.target_text, created_at = excluded.created_at, last_used = excluded.last_used",
+            upserts
+        )
+        self.index_fuzzy(indexed)
+        self.connection.commit()
+        return counts
+    
+    def prune(self, max_bytes: int) -> int:
+        """Delete least recently used entries until the stored text fits max_bytes; returns the count removed."""
+        keep = {(row[0], row[1], segment_hash(row[2])) for row in self.export_rows(max_bytes)}
+        rows = self.connection.execute("SELECT source_lang, target_lang, source_hash FROM segments").fetchall()
+        stale = [row for row in rows if tuple(row) not in keep]
+        self.connection.executemany(
+            "DELETE FROM segments WHERE source_lang = ? AND target_lang = ? AND source_hash = ?", stale
+        )
+        self.connection.executemany(
+            "DELETE FROM fuzzy_bands WHERE source_lang = ? AND target_lang = ? AND source_hash = ?", stale
+        )
+        self.connection.commit()
+        return len(stale)
+    
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+
+    def close(self) -> None:
+        self.connection.close()
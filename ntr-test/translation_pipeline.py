@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Translation Pipeline for NTR Documentation
+Batching, concurrency and caching for any translation provider
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+from urllib.parse import quote_plus
+
+from fuzzy_matching import join_sentences, plan_partial_reuse, wording
+from translation_errors import TranslationError
+from translation_memory import TranslationMemory
+from rate_control import RateController
+from run_journal import RunJournal
+from translation_providers import TranslationProvider
+
+logger = logging.getLogger(__name__)
+
+# Per-segment overhead of the form encoding ("text=" and the separator)
+SEGMENT_OVERHEAD_BYTES = 6
+
+
+@dataclass
+class PipelineStats:
+    """Counters for one run, reported in the run metrics."""
+    segments: int = 0
+    cache_hits: int = 0
+    fuzzy_reused: int = 0
+    fuzzy_partial: int = 0
+    provider_requests: int = 0
+    characters_sent: int = 0
+    # Segments identified as already in the target language and kept as they are
+    already_in_target: int = 0
+    # Segments kept from reviewers' corrections (human-locked) instead of being translated
+    human_locked: int = 0
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+class TranslationPipeline:
+    def __init__(self, provider: TranslationProvider, memory: Optional[TranslationMemory] = None,
+                 rate_controller: Optional[RateController] = None,
+                 fuzzy_threshold: Optional[float] = None):
+        self.provider = provider
+        self.memory = memory
+        # Minimum n-gram similarity for reusing a near-identical stored segment (None disables)
+        self.fuzzy_threshold = fuzzy_threshold
+        # Every provider call goes through one shared controller
+        self.rate_controller = rate_controller or RateController.from_config(provider.capabilities, {})
+        self.stats = PipelineStats()
+        # Set while a resumable run is active; completed batches are journaled too
+        self.journal: Optional[RunJournal] = None
+
+    def make_batches(self, texts: List[str]) -> List[List[str]]:
+        """Group texts into batches that respect the provider's count and size limits."""
+        capabilities = self.provider.capabilities
+        batches: List[List[str]] = []
+        batch: List[str] = []
+        batch_bytes = 0
+
+        for text in texts:
+            size = len(quote_plus(text)) + SEGMENT_OVERHEAD_BYTES
+            if batch and (len(batch) >= capabilities.max_batch_size
+                          or batch_bytes + size > capabilities.max_request_bytes):
+                batches.append(batch)
+                batch, batch_bytes = [], 0
+            if size > capabilities.max_request_bytes:
+                logger.warning(f"Segment of {len(text)} characters exceeds the provider request size limit")
+            batch.append(text)
+            batch_bytes += size
+
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def translate(self, texts: List[str], source_lang: str, target_lang: str,
+                        tag_handling: Optional[str] = None) -> List[str]:
+        """Translate texts, returning translations in the same order.
+
+        Identical texts are translated once, cached translations are reused and each
+        completed batch is written to the translation memory immediately, so work
+        finished before a failure is never paid for again.
+        """
+        if not self.provider.supports(source_lang, target_lang):
+            raise TranslationError(
+                f"Provider '{self.provider.name}' cannot translate {source_lang} to {target_lang}"
+            )
+
+        results: List[Optional[str]] = [None] * len(texts)
+        pending: Dict[str, List[int]] = {}
+        for index, text in enumerate(texts):
+            if not text.strip():
+                results[index] = text
+            else:
+                pending.setdefault(text, []).append(index)
+        self.stats.segments += len(texts)
+
+        if self.memory is not None and pending:
+            cached = self.memory.lookup_many(source_lang, target_lang, pending)
+            for text, translation in cached.items():
+                for index in pending.pop(text):
+                    results[index] = translation
+                    self.stats.cache_hits += 1
+
+        # Near matches: segments that only differ in the case or spacing of their prose reuse
+        # the stored translation; otherwise only the changed sentences are sent
+        partials: Dict[str, tuple] = {}
+        translated: Dict[str, str] = {}
+        if self.memory is not None and self.fuzzy_threshold and pending:
+            sentences: List[str] = []
+            for text in list(pending):
+                match = self.memory.fuzzy_lookup(source_lang, target_lang, text, self.fuzzy_threshold)
+                if not match:
+                    continue
+                if wording(match.source_text) == wording(text):
+                    for index in pending.pop(text):
+                        results[index] = match.target_text
+                    translated[text] = match.target_text
+                    self.memory.store_many(source_lang, target_lang, [(text, match.target_text)])
+                    self.stats.fuzzy_reused += 1
+                    continue
+                plan = plan_partial_reuse(text, match)
+                if plan:
+                    partials[text] = (plan, pending.pop(text))
+                    self.stats.fuzzy_partial += 1
+                    for sentence, translation in plan[0]:
+                        if translation is None and sentence not in pending:
+                            pending[sentence] = []
+                            sentences.append(sentence)
+            # Changed sentences may have been translated before on their own
+            for sentence, translation in self.memory.lookup_many(source_lang, target_lang, sentences).items():
+                translated[sentence] = translation
+                pending.pop(sentence)
+                self.stats.cache_hits += 1
+
+        async def run_batch(batch: List[str]) -> None:
+            characters = sum(len(text) for text in batch)
+            translations = await self.rate_controller.call(
+                lambda: self.provider.translate_batch(batch, source_lang, target_lang, tag_handling),
+                characters
+            )
+            self.stats.provider_requests += 1
+            self.stats.characters_sent += characters
+            if len(translations) != len(batch):
+                raise TranslationError(
+                    f"Provider returned {len(translations)} translations for {len(batch)} segments"
+                )
+            if self.memory is not None:
+                self.memory.store_many(source_lang, target_lang, zip(batch, translations))
+            if self.journal is not None:
+                self.journal.record_segments(source_lang, target_lang, zip(batch, translations))
+            for text, translation in zip(batch, translations):
+                translated[text] = translation
+                for index in pending[text]:
+                    results[index] = translation
+
+        await asyncio.gather(*(run_batch(batch) for batch in self.make_batches(list(pending))))
+
+        for text, ((plan, separators), indexes) in partials.items():
+            sentences = [translation if translation is not None else translated[sentence]
+                         for sentence, translation in plan]
+            translation = join_sentences(sentences, separators)
+            if self.memory is not None:
+                self.memory.store_many(source_lang, target_lang, [(text, translation)])
+            for index in indexes:
+                results[index] = translation
+        return results
+
+    def metrics(self) -> Dict:
+        """Run metrics: pipeline counters, the controller's current limits and provider counters."""
+        return {**self.stats.as_dict(), 'rate_control': self.rate_controller.snapshot(), **self.provider.metrics()}
+
+    def translate_sync(self, texts: List[str], source_lang: str, target_lang: str,
+                       tag_handling: Optional[str] = None) -> List[str]:
+        """Blocking wrapper around translate() for synchronous callers."""
+        return asyncio.run(self.translate(texts, source_lang, target_lang, tag_handling))
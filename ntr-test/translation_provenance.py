@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Translation Provenance for NTR Documentation
+Records which locale every translated segment came from, so machine output is never
+translated back, reviewers' corrections are kept and pages edited in two locales at once
+are reported instead of overwritten
+"""
+
+import os
+import hashlib
+import logging
+from difflib import SequenceMatcher
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from markdown_segments import split_segments, split_front_matter
+
+logger = logging.getLogger(__name__)
+
+# Decisions for a planned (source, target) job
+TRANSLATE = 'translate'
+SKIP = 'skip'
+CONFLICT = 'conflict'
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def segment_key(text: str) -> str:
+    """Short hash identifying a segment's text; collisions only cost a mislabeled origin."""
+    return text_hash(text)[:16]
+
+
+def translatable_texts(text: str) -> List[str]:
+    """Texts of the translatable segments of a page, front matter excluded."""
+    return [segment.text for segment in split_segments(split_front_matter(text)[0]) if segment.translatable]
+
+
+def read_text(path: str) -> Optional[str]:
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+@dataclass
+class Conflict:
+    """Both pages of a pair changed by people since they were last in sync."""
+    source_file: str
+    target_file: str
+    source_lang: str
+    target_lang: str
+    reason: str
+    # Segments of each page that no translation run wrote
+    human_segments: Dict[str, int]
+    # Content hashes when the conflict was found; editing one page afterwards resolves it
+    hashes: Dict[str, Optional[str]]
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+class ProvenanceTracker:
+    """Provenance of translated pages, kept in the translation manifest.
+
+    For every page a run wrote, the manifest holds the page it was translated from,
+    the content hashes of both at the time, and the origin locale of each segment
+    written. A page whose hash still matches is unedited machine output.
+
+    Each record also pairs the source segments with the hashes of their translations.
+    A segment that no longer matches its translation was corrected by a reviewer and is
+    human-locked: it is kept until its source segment changes.
+    """
+
+    def __init__(self, data: Dict):
+        # Manifest sections, updated in place: target file → record, and open conflicts
+        self.records: Dict[str, Dict] = data.setdefault('provenance', {})
+        self.conflicts: List[Dict] = data.setdefault('conflicts', [])
+
+    def record(self, source_file: str, target_file: str, source_lang: str, target_lang: str,
+               output: str, locked: Optional[Dict[str, str]] = None) -> None:
+        """Remember that target_file now holds output machine-translated from source_file.
+
+        locked maps source segments to the human-locked translations kept in output.
+        """
+        source_text = read_text(source_file) or ''
+        # A source written from this target earlier and since edited is the origin now
+        if self.records.get(source_file, {}).get('origin') == target_file:
+            del self.records[source_file]
+        segments = {segment_key(segment.text): source_lang
+                    for segment in split_segments(output) if segment.translatable}
+        record = {
+            'origin': source_file,
+            'origin_locale': source_lang,
+            'locale': target_lang,
+            'source_hash': text_hash(source_text),
+            'output_hash': text_hash(output),
+            'segments': segments,
+        }
+        sources, translations = translatable_texts(source_text), translatable_texts(output)
+        # Segment by segment tracking needs the page structure kept by the translation
+        if len(sources) == len(translations):
+            record['pairs'] = [[source, segment_key(translation)] for source, translation in zip(sources, translations)]
+            record['locked'] = {segment_key(source): segment_key(text) for source, text in (locked or {}).items()}
+        self.records[target_file] = record
+        # The page now holds the winning version, so conflicts over it are settled
+        self.conflicts[:] = [conflict for conflict in self.conflicts if target_file not in conflict['hashes']]
+
+    def segment_origins(self, path: str, text: str, locale: str) -> Dict[str, int]:
+        """Number of segments of a page per origin locale; segments no run wrote count for locale."""
+        machine = self.records.get(path, {}).get('segments', {})
+        counts: Dict[str, int] = {}
+        for segment in split_segments(text):
+            if segment.translatable:
+                origin = machine.get(segment_key(segment.text), locale)
+                counts[origin] = counts.get(origin, 0) + 1
+        return counts
+
+    def is_machine_output(self, path: str, text: Optional[str]) -> bool:
+        """Whether the page is exactly what a translation run wrote."""
+        record = self.records.get(path)
+        return bool(record and text is not None and record['output_hash'] == text_hash(text))
+
+    def post_edits(self, path: str, text: Optional[str]) -> Tuple[Dict[str, str], bool]:
+        """Segments of a translated page that people corrected, and whether they restructured it.
+
+        Returns {source segment: current text} for the segments edited since the page was
+        written or locked by an earlier run, and True when segments were added, removed,
+        split or merged, so the page no longer matches its source segment by segment.
+        """
+        record = self.records.get(path)
+        if not record or 'pairs' not in record or text is None:
+            return {}, True
+        pairs, locked = record['pairs'], record.get('locked', {})
+        current = translatable_texts(text)
+        matcher = SequenceMatcher(None, [key for _, key in pairs], [segment_key(segment) for segment in current],
+                                  autojunk=False)
+        edits: Dict[str, str] = {}
+        restructured = False
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag not in ('equal', 'replace') or i2 - i1 != j2 - j1:
+                restructured = True
+                continue
+            for (source, _), segment in zip(pairs[i1:i2], current[j1:j2]):
+                if tag == 'replace' or segment_key(source) in locked:
+                    edits[source] = segment
+        return edits, restructured
+
+    def stale_locks(self, path: str, locks: Dict[str, str],
+                    sources: List[str]) -> List[Tuple[str, str, List[str]]]:
+        """Locked segments of a page whose source segment changed since the page was written.
+
+        Returns (previous source segment, locked text, source segments replacing it) for
+        each; the replacing segments are empty when the source segment was removed.
+        """
+        previous = [source for source, _ in self.records.get(path, {}).get('pairs', [])]
+        matcher = SequenceMatcher(None, [segment_key(source) for source in previous],
+                                  [segment_key(source) for source in sources], autojunk=False)
+        stale = []
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag != 'equal':
+                stale.extend((source, locks[source], sources[j1:j2]) for source in previous[i1:i2] if source in locks)
+        return stale
+
+    def open_conflict(self, source_file: str, target_file: str) -> Optional[Dict]:
+        pair = {source_file, target_file}
+        return next((conflict for conflict in self.conflicts if set(conflict['hashes']) == pair), None)
+
+    def resolve(self, source_file: str, target_file: str) -> None:
+        self.conflicts[:] = [conflict for conflict in self.conflicts
+                             if set(conflict['hashes']) != {source_file, target_file}]
+
+    def check(self, source_file: str, target_file: str, source_lang: str, target_lang: str,
+              changed_files: Optional[Set[str]] = None,
+              routes: Optional[Callable[[str, str], bool]] = None) -> Tuple[str, str]:
+        """Decide whether translating source_file over target_file is safe.
+
+        Returns (TRANSLATE, '') or (SKIP or CONFLICT, reason). changed_files are the pages
+        changed in the run's commit range; pages without provenance that both changed
+        there count as edited concurrently. routes(origin, target) tells whether the
+        translation graph translates the origin page straight into target; machine output
+        is only passed on (pivot translation) to pages its origin does not reach itself.
+        """
+        source_text = read_text(source_file)
+        target_text = read_text(target_file)
+        source_record = self.records.get(source_file, {})
+        target_record = self.records.get(target_file, {})
+
+        # An earlier conflict stands until someone edits one of the pages; that page wins
+        conflict = self.open_conflict(source_file, target_file)
+        if conflict:
+            hashes = {source_file: text_hash(source_text) if source_text else None,
+                      target_file: text_hash(target_text) if target_text else None}
+            source_edited = conflict['hashes'].get(source_file) != hashes[source_file]
+            target_edited = conflict['hashes'].get(target_file) != hashes[target_file]
+            if source_edited and not target_edited:
+                return TRANSLATE, ''
+            if target_edited and not source_edited:
+                self.resolve(source_file, target_file)
+                return SKIP, f"conflict resolved in favour of {target_file}"
+            # Both edited again: the next edit of just one page decides
+            conflict['hashes'] = hashes
+            return CONFLICT, conflict['reason']
+
+        # Translating machine output back would only undo the translation it came from
+        if self.is_machine_output(source_file, source_text):
+            origin = source_record['origin']
+            if origin == target_file or (routes is not None and routes(origin, target_file)):
+                return SKIP, f"{source_file} is unedited machine translation of {origin}"
+
+        # Missing pages and unedited machine output can always be (re)written
+        if target_text is None or self.is_machine_output(target_file, target_text):
+            return TRANSLATE, ''
+
+        # From here the target holds text people wrote or edited
+        if target_record.get('origin') == source_file:
+            if target_record['source_hash'] == text_hash(source_text):
+                return SKIP, f"{source_file} is unchanged since {target_file} was translated and then edited"
+            # Corrected segments are kept (human-locked); the others follow the source
+            if not self.post_edits(target_file, target_text)[1]:
+                return TRANSLATE, ''
+            return CONFLICT, f"{source_file} changed and {target_file} was restructured after its last translation"
+        if source_record.get('origin') == target_file:
+            if source_record['source_hash'] != text_hash(target_text):
+                return CONFLICT, f"{source_file} was edited and {target_file} changed since it was translated"
+            # Corrections of a translation are not changes to carry back to its source
+            if not self.post_edits(source_file, source_text)[1]:
+                return SKIP, f"{source_file} only has corrections of its translation from {target_file}"
+            return TRANSLATE, ''
+        if changed_files and source_file in changed_files and target_file in changed_files:
+            return CONFLICT, f"{source_file} and {target_file} both changed in this commit range"
+        return TRANSLATE, ''
+
+    def add_conflict(self, source_file: str, target_file: str, source_lang: str, target_lang: str,
+                     reason: str) -> Conflict:
+        """Record an open conflict for the pair (once) and return it."""
+        source_text = read_text(source_file) or ''
+        target_text = read_text(target_file) or ''
+        conflict = Conflict(
+            source_file, target_file, source_lang, target_lang, reason,
+            {source_file: self.segment_origins(source_file, source_text, source_lang).get(source_lang, 0),
+             target_file: self.segment_origins(target_file, target_text, target_lang).get(target_lang, 0)},
+            {source_file: text_hash(source_text) if source_text else None,
+             target_file: text_hash(target_text) if target_text else None},
+        )
+        if not self.open_conflict(source_file, target_file):
+            self.conflicts.append(conflict.as_dict())
+        return conflict
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Translation Providers for NTR Documentation
+Pluggable backends whose primitive is async batch translation of segments
+"""
+
+import os
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from translation_errors import ProviderError, TranslationError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ProviderCapabilities:
+    """Limits and features a provider declares to the translation pipeline."""
+    max_batch_size: int = 50
+    max_request_bytes: int = 128 * 1024
+    tag_handling: Tuple[str, ...] = ()
+    requests_per_second: Optional[float] = None
+    characters_per_second: Optional[float] = None
+
+
+class TranslationProvider(ABC):
+    """Base class for translation backends.
+
+    Providers only translate batches of plain segments. Batching to the declared
+    capabilities, concurrency and caching are handled by ``TranslationPipeline``.
+    """
+    name = "base"
+
+    def __init__(self, settings: Optional[Dict] = None):
+        self.settings = settings or {}
+
+    @property
+    @abstractmethod
+    def capabilities(self) -> ProviderCapabilities:
+        """Capabilities of this provider."""
+
+    def is_available(self) -> bool:
+        """Whether the provider is configured well enough to be called."""
+        return True
+
+    def supports(self, source_lang: str, target_lang: str) -> bool:
+        """Whether the provider can translate from source_lang to target_lang."""
+        return True
+
+    @abstractmethod
+    async def translate_batch(self, segments: List[str], source_lang: str,
+                              target_lang: str, tag_handling: Optional[str] = None) -> List[str]:
+        """Translate segments, returning translations in the same order.
+
+        Raises ProviderError if the request fails.
+        """
+
+    def metrics(self) -> Dict:
+        """Provider counters for the run metrics, if the provider keeps any."""
+        return {}
+
+    async def close(self) -> None:
+        """Release any resources (sessions, sockets) held by the provider."""
+
+
+class DeepLProvider(TranslationProvider):
+    """DeepL REST API backend."""
+    name = "deepl"
+
+    SOURCE_LANGUAGES = ["EN", "DE", "FR", "IT", "JA", "ES", "PT", "RU", "ZH", "NL", "PL", "BG", "CS", "DA", "EL", "ET", "FI", "HU", "ID", "LT", "LV", "RO", "SK", "SL", "SV", "TR", "UK"]
+    TARGET_LANGUAGES = ["BG", "CS", "DA", "DE", "EL", "EN", "ES", "ET", "FI", "FR", "HU", "ID", "IT", "JA", "LT", "LV", "NL", "PL", "PT", "RO", "RU", "SK", "SL", "SV", "TR", "UK", "ZH"]
+
+    def __init__(self, settings: Optional[Dict] = None):
+        super().__init__(settings)
+        self.api_key = os.getenv('DEEPL_API_KEY')
+        self.api_url = self.settings.get('api_url', "https://api-free.deepl.com/v2/translate")
+        self.timeout = self.settings.get('timeout', 30)
+        self.preserve_formatting = self.settings.get('preserve_formatting', True)
+        # One pooled session shared by all requests of a run
+        self.session = requests.Session()
+
+    @property
+    def capabilities(self) -> ProviderCapabilities:
+        return ProviderCapabilities(
+            max_batch_size=self.settings.get('max_batch_size', 50),
+            max_request_bytes=self.settings.get('max_request_bytes', 128 * 1024),
+            tag_handling=('xml', 'html'),
+            requests_per_second=self.settings.get('requests_per_second'),
+            characters_per_second=self.settings.get('characters_per_second'),
+        )
+
+    def is_available(self) -> bool:
+        return bool(self.api_key)
+
+    def supports(self, source_lang: str, target_lang: str) -> bool:
+        return source_lang in self.SOURCE_LANGUAGES and target_lang in self.TARGET_LANGUAGES
+
+    def _post(self, data: Dict) -> List[str]:
+        try:
+            response = self.session.post(
+                self.api_url,
+                headers={'Authorization': f'DeepL-Auth-Key {self.api_key}'},
+                data=data,
+                timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            raise ProviderError(f"DeepL request failed: {e}") from e
+
+        if response.status_code != 200:
+            retry_after = response.headers.get('Retry-After')
+            raise ProviderError(
+                f"DeepL API error: {response.status_code} - {response.text}",
+                status_code=response.status_code,
+                retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None
+            )
+        return [item['text'] for item in response.json()['translations']]
+
+    async def translate_batch(self, segments: List[str], source_lang: str,
+                              target_lang: str, tag_handling: Optional[str] = None) -> List[str]:
+        data = {
+            'text': segments,
+            'source_lang': source_lang,
+            'target_lang': target_lang,
+            'preserve_formatting': '1' if self.preserve_formatting else '0'
+        }
+        if tag_handling:
+            data['tag_handling'] = tag_handling
+        return await asyncio.to_thread(self._post, data)
+
+    async def close(self) -> None:
+        self.session.close()
+
+
+class LocalProvider(TranslationProvider):
+    """Deterministic offline backend for tests, benchmarks and dry runs.
+
+    Each segment is returned with a target-language marker, so output is stable
+    and obviously machine-generated. An optional latency simulates a remote API.
+    """
+    name = "local"
+
+    @property
+    def capabilities(self) -> ProviderCapabilities:
+        return ProviderCapabilities(
+            max_batch_size=self.settings.get('max_batch_size', 50),
+            max_request_bytes=self.settings.get('max_request_bytes', 128 * 1024),
+            tag_handling=('xml',),
+        )
+
+    async def translate_batch(self, segments: List[str], source_lang: str,
+                              target_lang: str, tag_handling: Optional[str] = None) -> List[str]:
+        latency_ms = self.settings.get('latency_ms', 0)
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        marker = self.settings.get('marker', '[{target_lang}] ').format(
+            source_lang=source_lang, target_lang=target_lang
+        )
+        return [marker + segment for segment in segments]
+
+
+PROVIDERS = {
+    DeepLProvider.name: DeepLProvider,
+    LocalProvider.name: LocalProvider,
+}
+
+
+def create_provider(translation_config: Dict) -> TranslationProvider:
+    """Create the provider named in translation-config.json (overridable via TRANSLATION_PROVIDER)."""
+    name = os.getenv('TRANSLATION_PROVIDER') or translation_config.get('provider', DeepLProvider.name)
+    provider_class = PROVIDERS.get(name)
+    if not provider_class:
+        raise TranslationError(f"Unknown translation provider '{name}'. Available: {', '.join(PROVIDERS)}")
+    settings = translation_config.get('api_settings', {}).get(name, {})
+    return provider_class(settings)
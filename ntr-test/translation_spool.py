@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Translation Spool for NTR Documentation
+Local job queue between the git hook, which only records what changed, and a background
+worker that does the translation and git work
+"""
+
+import os
+import json
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from file_utils import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPOOL_DIRECTORY = ".translation-spool"
+# A worker lock not refreshed for this long belongs to a worker that died
+DEFAULT_STALE_SECONDS = 1800
+# Failed jobs are retried this many times before they are moved to failed/
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+@dataclass
+class SpoolJob:
+    """Changed pages recorded by one hook invocation."""
+    paths: List[str]
+    # HEAD when the hook ran: the commit the changes are compared against
+    commit: Optional[str]
+    enqueued_at: float = field(default_factory=time.time)
+    attempts: int = 0
+    # File name in the spool, set when the job is read back
+    name: str = ''
+
+    def as_dict(self) -> Dict:
+        return {'paths': self.paths, 'commit': self.commit, 'enqueued_at': self.enqueued_at,
+                'attempts': self.attempts}
+
+
+def coalesce(jobs: List[SpoolJob]) -> Dict[str, Optional[str]]:
+    """Changed page → commit to compare it against, one entry per page.
+
+    Jobs are taken oldest first and a page keeps the commit of its oldest job, so changes
+    made across several commits are all seen by the single translation of the page.
+    """
+    bases: Dict[str, Optional[str]] = {}
+    for job in sorted(jobs, key=lambda job: (job.enqueued_at, job.name)):
+        for path in job.paths:
+            bases.setdefault(path, job.commit)
+    return bases
+
+
+class TranslationSpool:
+    """Directory-based queue: queue/ holds waiting jobs, processing/ the jobs a worker claimed.
+
+    Enqueueing is one small atomic file write, so the hook returns at once. Jobs are claimed
+    by renaming them, and only the worker holding worker.lock claims any, so each job is
+    processed once; jobs left in processing/ by a worker that died go back to the queue.
+    """
+
+    def __init__(self, directory: str = DEFAULT_SPOOL_DIRECTORY, stale_seconds: float = DEFAULT_STALE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.directory = directory
+        self.queue_dir = os.path.join(directory, 'queue')
+        self.processing_dir = os.path.join(directory, 'processing')
+        self.failed_dir = os.path.join(directory, 'failed')
+        self.lock_path = os.path.join(directory, 'worker.lock')
+        self.stale_seconds = stale_seconds
+        self.max_attempts = max_attempts
+
+    @classmethod
+    def from_config(cls, spool_config: Dict) -> 'TranslationSpool':
+        """Build the spool from the ``spool`` section of translation-config.json."""
+        return cls(spool_config.get('directory', DEFAULT_SPOOL_DIRECTORY),
+                   spool_config.get('stale_seconds', DEFAULT_STALE_SECONDS),
+                   spool_config.get('max_attempts', DEFAULT_MAX_ATTEMPTS))
+
+    def enqueue(self, paths: List[str], commit: Optional[str]) -> str:
+        """Add a job and return its file name. Names sort in enqueue order."""
+        job = SpoolJob(sorted(set(paths)), commit)
+        name = f"{time.time_ns():020d}-{os.getpid()}.json"
+        atomic_write_text(os.path.join(self.queue_dir, name), json.dumps(job.as_dict()))
+        return name
+
+    def queued(self, directory: Optional[str] = None) -> List[str]:
+        """Job file names waiting in the queue (or another spool directory), oldest first."""
+        directory = directory or self.queue_dir
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name for name in os.listdir(directory) if name.endswith('.json') and not name.startswith('.'))
+
+    def claim(self) -> List[SpoolJob]:
+        """Move every queued job to processing/ and return them. Call only while holding the lock."""
+        os.makedirs(self.processing_dir, exist_ok=True)
+        jobs = []
+        for name in self.queued():
+            path = os.path.join(self.processing_dir, name)
+            os.replace(os.path.join(self.queue_dir, name), path)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    record = json.load(f)
+                jobs.append(SpoolJob(record['paths'], record.get('commit'), record.get('enqueued_at', 0.0),
+                                     record.get('attempts', 0), name))
+            except (OSError, json.JSONDecodeError, KeyError) as e:
+                logger.warning(f"Discarding unreadable spool job {name}: {e}")
+                os.remove(path)
+        return jobs
+
+    def complete(self, jobs: List[SpoolJob]) -> None:
+        for job in jobs:
+            path = os.path.join(self.processing_dir, job.name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def retry(self, jobs: List[SpoolJob]) -> None:
+        """Put failed jobs back in the queue, or in failed/ once they used up their attempts."""
+        for job in jobs:
+            job.attempts += 1
+            directory = self.queue_dir if job.attempts < self.max_attempts else self.failed_dir
+            if directory == self.failed_dir:
+                logger.error(f"Spool job {job.name} failed {job.attempts} times; moved to {self.failed_dir}")
+            atomic_write_text(os.path.join(directory, job.name), json.dumps(job.as_dict()))
+            self.complete([job])
+
+    def worker_running(self) -> bool:
+        """Whether a worker holds a fresh lock."""
+        try:
+            return time.time() - os.path.getmtime(self.lock_path) < self.stale_seconds
+        except OSError:
+            return False
+
+    def acquire(self) -> bool:
+        """Become the spool's only worker; False if another worker is running.
+
+        Jobs a dead worker left in processing/ are put back in the queue.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        for attempt in range(2):
+            try:
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if attempt or self.worker_running():
+                    return False
+                logger.warning(f"Removing stale translation worker lock {self.lock_path}")
+                try:
+                    os.remove(self.lock_path)
+                except FileNotFoundError:
+                    pass
+                continue
+            with os.fdopen(fd, 'w') as f:
+                f.write(str(os.getpid()))
+            break
+        os.makedirs(self.queue_dir, exist_ok=True)
+        for name in self.queued(self.processing_dir):
+            logger.info(f"Requeueing spool job {name} left by an interrupted worker")
+            os.replace(os.path.join(self.processing_dir, name), os.path.join(self.queue_dir, name))
+        return True
+
+    def heartbeat(self) -> None:
+        """Refresh the lock so waiting hooks and workers know this worker is alive."""
+        os.utime(self.lock_path)
+
+    def release(self) -> None:
+        try:
+            os.remove(self.lock_path)
+        except FileNotFoundError:
+            pass